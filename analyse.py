@@ -0,0 +1,169 @@
+"""Analyse a file of positions, one per line, across several processes.
+
+Every line is either a string of the columns played from the empty board ("3324"),
+the rows of a board from top to bottom separated by '/' ("......./......./.../..+#..."),
+or a JSON object with a "moves" or "board" key and an optional "id" that is copied to the result.
+One JSON result is written per line, in the order the analyses finish.
+
+Run with: python3 analyse.py positions.txt --depth 6 --workers 8 --out results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from multiprocessing.pool import Pool
+from queue import SimpleQueue
+
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Board, BitBoard, Game
+
+
+@dataclass
+class AnalysisOptions:
+	depth: int = 6
+	time_budget: float | None = None  # seconds per position, searching deeper and deeper instead of up to depth
+	tt_entries: int = 2 ** 18
+	endgame_threshold: int = 16
+
+
+@dataclass
+class Analysis:
+	line: int  # number of the line in the input, starting at 1
+	id: object = None
+	move: int | None = None
+	score: int | None = None
+	depth: int | None = None
+	nodes: int | None = None
+	time: float | None = None
+	error: str | None = None
+
+	def to_json(self) -> str:
+		return json.dumps({key: value for key, value in asdict(self).items() if value is not None})
+
+
+def parse_moves(moves: str) -> Game:
+	"""Play the columns of the string from the empty board."""
+	game = Game(initial_board=BitBoard())
+	for i, move in enumerate(moves):
+		if game.over:
+			raise ValueError(f"the game is over before move {i}")
+		# the game ignores invalid moves, so they are checked here
+		if not move.isdigit() or int(move) not in game.board.get_valid_columns():
+			raise ValueError(f"{move!r} is not a valid column at move {i}")
+		game.play(int(move))
+	return game
+
+
+def parse_board(rows: list[str]) -> Game:
+	"""Build the game from the rows of a board, from top to bottom."""
+	if len(rows) != Board.HEIGHT or any(len(row) != Board.WIDTH for row in rows):
+		raise ValueError(f"the board must be {Board.HEIGHT} rows of {Board.WIDTH} cells")
+	if any(cell not in (Board.EMPTY, *Game.PLAYERS) for row in rows for cell in row):
+		raise ValueError(f"the cells must be one of {Board.EMPTY!r}, {Game.PLAYERS[0]!r} or {Game.PLAYERS[1]!r}")
+	if any(upper != Board.EMPTY and lower == Board.EMPTY for upper, lower in zip(''.join(rows), ''.join(rows[1:]))):
+		raise ValueError("the board has floating pieces")
+	return Game(initial_board=BitBoard([list(row) for row in rows]))
+
+
+def parse_line(line: str) -> tuple[object, Game]:
+	"""Return the id of the position, if any, and the game it describes."""
+	line = line.strip()
+	if line.startswith('{'):
+		record = json.loads(line)
+		if 'moves' in record:
+			game = parse_moves(str(record['moves']))
+		elif 'board' in record:
+			game = parse_board(record['board'])
+		else:
+			raise ValueError("the object needs a 'moves' or 'board' key")
+		return record.get('id'), game
+	if '/' in line:
+		return None, parse_board(line.split('/'))
+	return None, parse_moves(line)
+
+
+# the options of the worker processes, the same for every position
+_worker_options: AnalysisOptions | None = None
+
+
+def _init_worker(options):
+	global _worker_options
+	_worker_options = options
+
+
+def analyse_line(line_i: int, line: str, options: AnalysisOptions | None = None) -> Analysis:
+	"""Search the best move of the position on the line. Invalid positions give an analysis with an error."""
+	options = options or _worker_options or AnalysisOptions()
+	analysis = Analysis(line_i)
+	try:
+		analysis.id, game = parse_line(line)
+		if game.over:
+			raise ValueError("the game is over")
+	except (ValueError, TypeError) as e:
+		analysis.error = str(e)
+		return analysis
+
+	with FIARMinMax(
+			game, max_depth=options.depth, plays=game.p_i, lazy=True, tt_entries=options.tt_entries,
+			time_budget=options.time_budget, endgame_threshold=options.endgame_threshold) as fiar_mm:
+		analysis.move = fiar_mm.get_best_play()
+		stats = fiar_mm.stats
+	analysis.score = stats.score
+	analysis.depth = stats.depth
+	analysis.nodes = stats.nodes
+	analysis.time = round(stats.time, 6)
+	return analysis
+
+
+def analyse(lines, options: AnalysisOptions, n_workers: int | None = None, max_in_flight: int | None = None):
+	"""Analyse the positions of an iterable of lines across a pool of processes and yield the analyses
+	as they finish. Blank lines are skipped.
+
+	Only max_in_flight lines are read ahead of the analyses that were yielded, so the input can be
+	read lazily and be arbitrarily long.
+	"""
+	n_workers = n_workers or os.cpu_count()
+	max_in_flight = max_in_flight or 4 * n_workers
+	with Pool(n_workers, initializer=_init_worker, initargs=(options,)) as pool:
+		done = SimpleQueue()
+		in_flight = 0
+		for line_i, line in enumerate(lines, start=1):
+			if not line.strip():
+				continue
+			pool.apply_async(analyse_line, (line_i, line), callback=done.put, error_callback=done.put)
+			in_flight += 1
+			if in_flight >= max_in_flight:
+				yield _get_result(done)
+				in_flight -= 1
+		for _ in range(in_flight):
+			yield _get_result(done)
+
+
+def _get_result(done: SimpleQueue) -> Analysis:
+	result = done.get()
+	if isinstance(result, BaseException):
+		raise result
+	return result
+
+
+if __name__ == '__main__':
+	def main():
+		parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+		parser.add_argument('input', help="file of positions, '-' reads from stdin")
+		parser.add_argument('--out', default='-', help="file of results, '-' writes to stdout")
+		parser.add_argument('--depth', type=int, default=AnalysisOptions.depth)
+		parser.add_argument('--time', type=float, help="seconds per position, overrides --depth")
+		parser.add_argument('--workers', type=int, help="defaults to the number of CPUs")
+		parser.add_argument('--in-flight', type=int, help="positions read ahead, defaults to 4 per worker")
+		args = parser.parse_args()
+
+		options = AnalysisOptions(depth=args.depth, time_budget=args.time)
+		lines = sys.stdin if args.input == '-' else open(args.input)
+		out = sys.stdout if args.out == '-' else open(args.out, 'w')
+		with lines, out:
+			for analysis in analyse(lines, options, args.workers, args.in_flight):
+				out.write(analysis.to_json() + '\n')
+
+
+	main()
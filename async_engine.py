@@ -0,0 +1,94 @@
+import asyncio
+import os
+from contextlib import aclosing
+from concurrent.futures import Executor, ThreadPoolExecutor
+from threading import Event
+from typing import AsyncIterator
+
+from fiar_min_max import FIARMinMax
+from search_stats import SearchProgress
+
+# how many searches of the engines that are not given an executor are in progress at once
+SHARED_SEARCHES = min(4, os.cpu_count() or 1)
+_shared_executor: ThreadPoolExecutor | None = None
+
+
+def shared_executor() -> ThreadPoolExecutor:
+	"""The executor of the engines that are not given one. The searches are pure python, so its threads
+	take turns holding the GIL: its size only bounds how many searches are in progress at once,
+	not how many run in parallel. Engines with mt or smp search in worker processes, which do."""
+	global _shared_executor
+	if _shared_executor is None:
+		_shared_executor = ThreadPoolExecutor(SHARED_SEARCHES, thread_name_prefix='fiar-search')
+	return _shared_executor
+
+
+class AsyncEngine:
+	"""Run the searches of an engine in an executor, so they do not block the event loop.
+
+	Engines of different games can share one executor, which bounds how many searches are in progress at once.
+	Each engine searches one move at a time. Cancelling a search sets the stop event the search checks
+	every few thousand nodes, and the engine then forgets its tree so the game can go on as if the
+	search never ran."""
+
+	def __init__(self, fiar_mm: FIARMinMax, executor: Executor | None = None):
+		self.fiar_mm = fiar_mm
+		self.executor = executor
+		self.stop = Event()
+		fiar_mm.stop = self.stop
+		self.lock = asyncio.Lock()
+
+	async def get_best_play(self, time_budget: float | None = None) -> int:
+		"""Return the column the engine wants to play in, see FIARMinMax.get_best_play."""
+		async with aclosing(self.search(time_budget)) as search:
+			async for progress in search:
+				if progress.final:
+					return progress.move
+
+	async def search(self, time_budget: float | None = None) -> AsyncIterator[SearchProgress]:
+		"""Yield the progress of the search after every depth, when it searches deeper and deeper
+		(with a time budget), and finally the move to play with final set.
+		Leaving the loop early cancels the search. The engine is released before the final progress is yielded."""
+		loop = asyncio.get_running_loop()
+		progress = asyncio.Queue()
+
+		def on_progress(event):
+			loop.call_soon_threadsafe(progress.put_nowait, event)
+
+		async with self.lock:
+			self.stop.clear()
+			self.fiar_mm.on_progress = on_progress
+			future = loop.run_in_executor(self.executor or shared_executor(), self.fiar_mm.get_best_play, time_budget)
+			finished = False
+			try:
+				while not future.done() or not progress.empty():
+					next_event = asyncio.ensure_future(progress.get())
+					await asyncio.wait((next_event, future), return_when=asyncio.FIRST_COMPLETED)
+					if next_event.done():
+						yield next_event.result()
+					else:
+						next_event.cancel()
+
+				move = future.result()
+				stats = self.fiar_mm.stats
+				finished = True
+			finally:
+				self.fiar_mm.on_progress = None
+				if not finished:
+					await self._cancel(future)
+		# out of the lock, so a caller that stops iterating here does not hold on to the engine
+		yield SearchProgress(stats.depth, move, stats.score, stats.nodes, stats.time, final=True)
+
+	async def _cancel(self, future):
+		"""Stop the search and wait for it to return, the engine can not be used until then."""
+		self.stop.set()
+		try:
+			await asyncio.shield(future)
+		except Exception:
+			pass
+		# the search may have moved the tree to the move it found, which is not played
+		self.fiar_mm.tree = None
+
+	def close(self):
+		self.fiar_mm.stop = None
+		self.fiar_mm.close()
@@ -0,0 +1,79 @@
+import threading
+
+from fiar_min_max import FIARMinMax
+
+
+class BackgroundEngine:
+	"""Run the searches of an engine in a background thread, so that the caller (like the GUI loop) never waits.
+
+	While the opponent thinks, the engine ponders: it searches its answer to each move the opponent can play,
+	the most likely first. If the opponent plays one of those, the answer is played without searching.
+	Only one search runs at a time, and the engine must not be used directly while a search runs."""
+
+	def __init__(self, fiar_mm: FIARMinMax):
+		self.fiar_mm = fiar_mm
+		self.stop = threading.Event()
+		fiar_mm.stop = self.stop
+		self.thread: threading.Thread | None = None
+		# the move found by the last requested search, until it is taken with poll()
+		self.move: int | None = None
+		self.error: BaseException | None = None
+
+	@property
+	def thinking(self) -> bool:
+		"""Whether a requested search is running, or its move was not taken yet."""
+		return self.thread is not None and self.thread.name == 'search'
+
+	def request_move(self):
+		"""Start searching the move of the engine in the current position of the game, see poll()."""
+		self._stop_thread()
+		self.move = None
+		self._start('search', self._search)
+
+	def poll(self) -> int | None:
+		"""Return the move of the requested search if it finished, None otherwise.
+		The move is only returned once."""
+		if self.error is not None:
+			error, self.error = self.error, None
+			raise error
+		if self.thread is None or self.thread.name != 'search' or self.thread.is_alive():
+			return None
+		move, self.move = self.move, None
+		self.thread = None
+		return move
+
+	def start_pondering(self):
+		"""Search the answers to the moves of the opponent until request_move() is called."""
+		self._stop_thread()
+		self._start('ponder', self._ponder)
+
+	def close(self):
+		self._stop_thread()
+		self.fiar_mm.stop = None
+		self.fiar_mm.close()
+
+	def _start(self, name, target):
+		self.thread = threading.Thread(target=self._run, args=(target,), name=name, daemon=True)
+		self.thread.start()
+
+	def _run(self, target):
+		try:
+			target()
+		except BaseException as e:
+			self.error = e
+
+	def _search(self):
+		self.move = self.fiar_mm.get_best_play()
+
+	def _ponder(self):
+		for move in self.fiar_mm.ponder_moves():
+			if self.stop.is_set():
+				break
+			self.fiar_mm.ponder(move)
+
+	def _stop_thread(self):
+		if self.thread is not None and self.thread.is_alive():
+			self.stop.set()
+			self.thread.join()
+		self.stop.clear()
+		self.thread = None
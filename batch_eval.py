@@ -0,0 +1,126 @@
+import numpy as np
+
+from four_in_a_row import BitBoard, Board, Game
+from min_max_tree import WIN_SCORE, MinMaxTree
+
+# (d_row, d_col) of the 4 directions a window can go in
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+
+def boards_to_array(boards) -> np.ndarray:
+	"""Stack the boards into a (n, 2, HEIGHT, WIDTH) array of booleans, one plane per player."""
+	boards = list(boards)
+	board_cls = type(boards[0]) if boards else Board
+	if all(isinstance(board, BitBoard) for board in boards):
+		return masks_to_array(
+			[tuple(board.masks.get(piece, 0) for piece in Game.PLAYERS) for board in boards],
+			board_cls.WIDTH, board_cls.HEIGHT)
+	planes = np.zeros((len(boards), 2, board_cls.HEIGHT, board_cls.WIDTH), bool)
+	for board_i, board in enumerate(boards):
+		for row_i, row in enumerate(board.state):
+			for col, elem in enumerate(row):
+				if elem in Game.PLAYERS:
+					planes[board_i, Game.PLAYERS.index(elem), row_i, col] = True
+	return planes
+
+
+def masks_to_array(masks, width=Board.WIDTH, height=Board.HEIGHT) -> np.ndarray:
+	"""Unpack the masks of the pieces of both players into a (n, 2, HEIGHT, WIDTH) array like boards_to_array.
+	:param masks: (mask of the first player, mask of the second player) pairs, with HEIGHT + 1 bits
+	per column starting from its bottom cell like BitBoard
+	"""
+	col_bits = height + 1
+	n_bytes = (width * col_bits + 7) // 8
+	data = b''.join(mask.to_bytes(n_bytes, 'little') for pair in masks for mask in pair)
+	bits = np.unpackbits(np.frombuffer(data, np.uint8), bitorder='little').reshape(len(masks), 2, -1)
+	# the bit of a cell h cells above the bottom is in row HEIGHT - 1 - h of the state
+	cells = np.arange(width) * col_bits + np.arange(height - 1, -1, -1)[:, None]
+	return bits[..., cells].view(bool)
+
+
+def window_counts(planes: np.ndarray, connect=Board.CONNECT) -> np.ndarray:
+	"""Count the pieces in every winning window.
+	:param planes: a (n, 2, HEIGHT, WIDTH) array as returned by boards_to_array
+	:param connect: how many aligned pieces win, the length of the windows
+	:return: a (n, 2, n_windows) array of counts
+	"""
+	planes = planes.astype(np.int8)
+	height, width = planes.shape[-2:]
+	reach = connect - 1
+	counts = []
+	for d_row, d_col in DIRECTIONS:
+		# the windows of a direction start on every cell that leaves room for CONNECT - 1 more cells
+		rows = range(max(0, -reach * d_row), height - max(0, reach * d_row))
+		cols = range(max(0, -reach * d_col), width - max(0, reach * d_col))
+		total = sum(
+			planes[..., rows.start + j * d_row:rows.stop + j * d_row, cols.start + j * d_col:cols.stop + j * d_col]
+			for j in range(connect))
+		counts.append(total.reshape(*total.shape[:2], -1))
+	return np.concatenate(counts, axis=-1)
+
+
+def evaluate(planes: np.ndarray, connect=Board.CONNECT) -> np.ndarray:
+	"""Compute the static evaluation of MinMaxTree for a whole batch of boards at once.
+	:param planes: a (n, 2, HEIGHT, WIDTH) array as returned by boards_to_array
+	:param connect: how many aligned pieces win
+	:return: the (n,) array of scores
+	"""
+	counts = window_counts(planes, connect)
+	mine, theirs = counts, counts[:, ::-1]
+
+	# the longest chain of each player among the windows the opponent has no piece in
+	chains = np.where(theirs == 0, mine, 0).max(axis=-1)
+	scores = chains[:, 0] - chains[:, 1]
+
+	# decided boards have a fixed score, a full board without an alignment is a tie
+	p1_won = (counts[:, 0] == connect).any(axis=-1)
+	p2_won = (counts[:, 1] == connect).any(axis=-1)
+	full = planes.any(axis=1).all(axis=(1, 2))
+	win_scores = WIN_SCORE - planes.sum(axis=(1, 2, 3))
+	scores = np.where(full, 0, scores)
+	scores = np.where(p2_won, -win_scores, scores)
+	return np.where(p1_won, win_scores, scores)
+
+
+def evaluate_leaves(tree: MinMaxTree) -> int:
+	"""Evaluate every leaf of the tree in one batch and store the scores in the nodes,
+	where minimax picks them up instead of calling _static_eval.
+	Return how many leaves were evaluated."""
+	board = tree.node.board
+	width, height = board.WIDTH, board.HEIGHT
+	col_bits = height + 1
+	# the masks and heights of the position being walked, the board itself is left alone
+	masks = [0, 0]
+	heights = [0] * width
+	for row_i, row in enumerate(board.state):
+		for col, elem in enumerate(row):
+			if elem in Game.PLAYERS:
+				masks[Game.PLAYERS.index(elem)] |= 1 << (col * col_bits + height - 1 - row_i)
+				heights[col] += 1
+	leaves = []
+	leaf_masks = []
+
+	def collect(subtree):
+		if not subtree.children:
+			if subtree.node.score is None:
+				leaves.append(subtree)
+				leaf_masks.append((masks[0], masks[1]))
+			return
+		player = subtree.node.playing
+		for child in subtree.children:
+			col = child.node.delta
+			bit = 1 << (col * col_bits + heights[col])
+			masks[player] |= bit
+			heights[col] += 1
+			collect(child)
+			masks[player] ^= bit
+			heights[col] -= 1
+
+	collect(tree)
+	if not leaves:
+		return 0
+
+	scores = evaluate(masks_to_array(leaf_masks, width, height), board.CONNECT)
+	for leaf, score in zip(leaves, scores.tolist()):
+		leaf.node.score = score
+	return len(leaves)
@@ -0,0 +1,255 @@
+"""Measure the speed and memory use of the engine, and compare them to a baseline.
+
+Run with: python3 -m benchmarks.engine --out results.json --baseline baseline.json --tolerance 0.1
+Save a baseline with: python3 -m benchmarks.engine --out baseline.json
+"""
+import argparse
+import copy
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from batch_eval import boards_to_array, evaluate, evaluate_leaves
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Board, BitBoard, Game
+from min_max_tree import MinMaxTree
+
+BOARDS = {'board': Board, 'bitboard': BitBoard}
+
+# fixed positions, as the columns played from the empty board
+POSITIONS = [
+	'',  # empty board
+	'3323',
+	'33244252',
+	'3324556601',
+]
+# a position in the middle game for the benchmarks of a single board
+MIDGAME = '33244252161'
+TREE_DEPTHS = (4, 5, 6, 7)
+# (width, height, connect) of the board variants searched from the empty board, to compare their speed
+SIZES = ((7, 6, 4), (8, 7, 4), (9, 7, 4), (10, 8, 4), (9, 7, 5))
+SEARCH_DEPTH = 5
+# the depth of the tree whose leaves are evaluated one by one and in a batch
+EVAL_DEPTH = 4
+SEED = 0
+
+
+@dataclass
+class Benchmark:
+	name: str
+	# builds what the benchmark runs on, it is not timed
+	setup: Callable[[], object]
+	# runs the benchmark on what setup returned and returns how many tree nodes were processed, if that applies
+	run: Callable[[object], int | None]
+	ops: int = 1  # how many operations one run does
+
+
+@dataclass
+class Result:
+	runs: int
+	seconds: float  # time of the fastest run
+	ops_per_second: float
+	nodes_per_second: float | None = None
+	peak_memory: int | None = None  # bytes allocated at most during a run
+
+
+def play_moves(board_cls, moves) -> Game:
+	game = Game(initial_board=board_cls())
+	for move in moves:
+		game.play(int(move))
+	return game
+
+
+def count_nodes(tree: MinMaxTree) -> int:
+	return 1 + sum(count_nodes(child) for child in tree.children)
+
+
+def fill_board(board_cls):
+	board = board_cls()
+	for col in range(board.WIDTH):
+		for row in range(board.HEIGHT):
+			board.insert_piece(col, Game.PLAYERS[row % 2])
+
+
+def leaf_trees(tree: MinMaxTree, board) -> list[MinMaxTree]:
+	"""Return a tree with a board of its own for every leaf of the tree."""
+	if not tree.children:
+		return [MinMaxTree(board.__copy__(), tree.node.playing)]
+	leaves = []
+	for child in tree.children:
+		board.insert_piece(child.node.delta, Game.PLAYERS[tree.node.playing])
+		leaves += leaf_trees(child, board)
+		board.remove_piece(child.node.delta)
+	return leaves
+
+
+def midgame_tree(depth) -> MinMaxTree:
+	game = play_moves(BitBoard, MIDGAME)
+	tree = MinMaxTree(game.board, game.p_i)
+	tree.generate_tree(depth)
+	return tree
+
+
+def search(game: Game, depth: int, lazy: bool) -> int:
+	with FIARMinMax(game, max_depth=depth, plays=game.p_i, lazy=lazy) as fiar_mm:
+		fiar_mm.get_best_play()
+		return fiar_mm.stats.nodes
+
+
+def generate_tree(board_cls, depth) -> int:
+	tree = MinMaxTree(board_cls(), 0)
+	tree.generate_tree(depth)
+	return count_nodes(tree)
+
+
+def get_benchmarks(tree_depths=TREE_DEPTHS, search_depth=SEARCH_DEPTH) -> list[Benchmark]:
+	benchmarks = []
+	for name, board_cls in BOARDS.items():
+		midgame = lambda board_cls=board_cls: play_moves(board_cls, MIDGAME)
+		benchmarks += [
+			Benchmark(f'{name}.insert_piece', lambda: None, lambda _, board_cls=board_cls: fill_board(board_cls),
+				ops=Board.WIDTH * Board.HEIGHT),
+			Benchmark(f'{name}.copy', midgame, lambda game: [copy.copy(game.board) for _ in range(1000)], ops=1000),
+			Benchmark(
+				f'{name}.get_4_in_row', midgame,
+				lambda game: [game.get_4_in_row(i % 2) for i in range(1000)], ops=1000),
+		]
+
+	benchmarks += [
+		Benchmark(
+			'tree._analyze_line', lambda: [list(line) for line in play_moves(Board, MIDGAME).board.gen_all_lines()],
+			lambda lines: [MinMaxTree._analyze_line(line, i % 2) for i in range(100) for line in lines],
+			ops=100 * len(list(Board().gen_all_lines()))),
+		Benchmark(
+			'tree._score', lambda: MinMaxTree(play_moves(Board, MIDGAME).board, 0),
+			lambda tree: [tree._score(i % 2) for i in range(100)], ops=100),
+	]
+	# the same leaves evaluated one at a time and all at once
+	n_leaves = len(leaf_trees(midgame_tree(EVAL_DEPTH), play_moves(BitBoard, MIDGAME).board))
+	benchmarks += [
+		Benchmark(
+			'eval.static_eval', lambda: leaf_trees(midgame_tree(EVAL_DEPTH), play_moves(BitBoard, MIDGAME).board),
+			lambda trees: [tree._static_eval() for tree in trees], ops=n_leaves),
+		Benchmark(
+			'eval.batch', lambda: [tree.node.board for tree in leaf_trees(
+				midgame_tree(EVAL_DEPTH), play_moves(BitBoard, MIDGAME).board)],
+			lambda boards: evaluate(boards_to_array(boards)), ops=n_leaves),
+		Benchmark('eval.evaluate_leaves', lambda: midgame_tree(EVAL_DEPTH), evaluate_leaves, ops=n_leaves),
+	]
+	for depth in tree_depths:
+		benchmarks.append(Benchmark(
+			f'tree.generate_tree[{depth}]', lambda: None, lambda _, depth=depth: generate_tree(BitBoard, depth)))
+	for lazy in (False, True):
+		for moves in POSITIONS:
+			benchmarks.append(Benchmark(
+				f"get_best_play[{'lazy' if lazy else 'tree'},{moves or 'empty'}]",
+				lambda moves=moves: play_moves(BitBoard, moves),
+				lambda game, lazy=lazy: search(game, search_depth, lazy)))
+	for width, height, connect in SIZES:
+		board_cls = BitBoard.variant(width, height, connect)
+		benchmarks.append(Benchmark(
+			f'get_best_play[lazy,{width}x{height}_{connect}]',
+			lambda board_cls=board_cls: Game(initial_board=board_cls()),
+			lambda game: search(game, search_depth, True)))
+	return benchmarks
+
+
+def run_benchmark(benchmark: Benchmark, *, repeat=5, max_time=2., memory=True) -> Result:
+	"""Run the benchmark up to repeat times, or until max_time seconds have passed, and keep the fastest run.
+	The peak memory is measured in one more run, because tracing the allocations slows the run down."""
+	best = float('inf')
+	nodes = None
+	runs = 0
+	start = time.perf_counter()
+	while runs < repeat and (runs == 0 or time.perf_counter() - start < max_time):
+		state = benchmark.setup()
+		# every run starts from the same random state, get_best_play breaks ties at random
+		random.seed(SEED)
+		gc.collect()
+		run_start = time.perf_counter()
+		nodes = benchmark.run(state)
+		best = min(best, time.perf_counter() - run_start)
+		runs += 1
+
+	result = Result(runs, best, benchmark.ops / best)
+	if isinstance(nodes, int):
+		result.nodes_per_second = nodes / best
+	if memory:
+		state = benchmark.setup()
+		random.seed(SEED)
+		gc.collect()
+		tracemalloc.start()
+		try:
+			benchmark.run(state)
+			result.peak_memory = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+	return result
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+	"""Return a description of every benchmark that is slower, or uses more memory, than the baseline
+	by more than the tolerance (0.1 allows 10%)."""
+	regressions = []
+	for name, result in results.items():
+		if name not in baseline:
+			continue
+		base = baseline[name]
+		if result['ops_per_second'] < base['ops_per_second'] * (1 - tolerance):
+			regressions.append(
+				f"{name}: {result['ops_per_second']:.4g} ops/s, baseline {base['ops_per_second']:.4g} ops/s")
+		if result.get('peak_memory') and base.get('peak_memory') \
+				and result['peak_memory'] > base['peak_memory'] * (1 + tolerance):
+			regressions.append(
+				f"{name}: {result['peak_memory']} bytes at peak, baseline {base['peak_memory']} bytes")
+	return regressions
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--out', help="write the results to this JSON file")
+	parser.add_argument('--baseline', help="JSON file of results to compare to")
+	parser.add_argument('--tolerance', type=float, default=0.1, help="allowed regression, 0.1 is 10%%")
+	parser.add_argument('--repeat', type=int, default=5, help="runs per benchmark, the fastest is kept")
+	parser.add_argument('--max-time', type=float, default=2., help="seconds per benchmark before stopping repeats")
+	parser.add_argument('--tree-depths', type=int, nargs='*', default=list(TREE_DEPTHS))
+	parser.add_argument('--search-depth', type=int, default=SEARCH_DEPTH)
+	parser.add_argument('--filter', default='', help="only run the benchmarks whose name contains this")
+	parser.add_argument('--no-memory', action='store_true', help="skip measuring the peak memory")
+	args = parser.parse_args(argv)
+
+	results = {}
+	print(f"{'benchmark':<40} {'ops/s':>12} {'nodes/s':>12} {'peak MB':>9}")
+	for benchmark in get_benchmarks(args.tree_depths, args.search_depth):
+		if args.filter not in benchmark.name:
+			continue
+		result = run_benchmark(benchmark, repeat=args.repeat, max_time=args.max_time, memory=not args.no_memory)
+		results[benchmark.name] = asdict(result)
+		nodes = f'{result.nodes_per_second:.4g}' if result.nodes_per_second is not None else ''
+		memory = f'{result.peak_memory / 2 ** 20:.1f}' if result.peak_memory is not None else ''
+		print(f"{benchmark.name:<40} {result.ops_per_second:>12.4g} {nodes:>12} {memory:>9}")
+
+	if args.out:
+		with open(args.out, 'w') as file:
+			json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, file, indent=2)
+
+	if args.baseline:
+		with open(args.baseline) as file:
+			baseline = json.load(file)['results']
+		if regressions := compare(results, baseline, args.tolerance):
+			print(f"{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+			for regression in regressions:
+				print(f"  {regression}")
+			return 1
+		print(f"No regression beyond {args.tolerance:.0%}")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,51 @@
+"""Measure how the lazy SMP search scales with the number of worker processes.
+
+Run with: python3 -m benchmarks.smp_speedup --depth 8 --workers 1 2 4 8 16 32
+"""
+import argparse
+import time
+
+from fiar_min_max import FIARMinMax
+from four_in_a_row import BitBoard, Game
+
+POSITIONS = [
+	'',  # empty board
+	'3323',
+	'33244252',
+]
+
+
+def time_search(moves, depth, n_workers) -> tuple[float, int]:
+	"""Return how long a move takes to find and how many nodes were searched."""
+	game = Game(initial_board=BitBoard())
+	for move in moves:
+		game.play(int(move))
+	with FIARMinMax(game, max_depth=1, plays=game.p_i, lazy=True, smp=n_workers) as fiar_mm:
+		# a 1 ply search starts the processes, so their start up time is not measured
+		fiar_mm.get_best_play()
+		fiar_mm.tree = None
+		fiar_mm.max_depth = depth
+
+		start = time.perf_counter()
+		fiar_mm.get_best_play()
+		return time.perf_counter() - start, fiar_mm.stats.nodes
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument('--depth', type=int, default=7)
+	parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+	args = parser.parse_args()
+
+	print(f"{'workers':>8} {'time (s)':>10} {'nodes':>10} {'speedup':>8}")
+	baseline = sum(time_search(moves, args.depth, 0)[0] for moves in POSITIONS)
+	print(f"{'single':>8} {baseline:>10.3f} {'':>10} {1:>8.2f}")
+	for n_workers in args.workers:
+		results = [time_search(moves, args.depth, n_workers) for moves in POSITIONS]
+		elapsed = sum(t for t, _ in results)
+		nodes = sum(n for _, n in results)
+		print(f"{n_workers:>8} {elapsed:>10.3f} {nodes:>10} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+	main()
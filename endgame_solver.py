@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from multiprocessing.synchronize import Event
+
+from four_in_a_row import BitBoard, Board, Game
+from min_max_tree import SearchTimeout
+from move_ordering import center_order
+
+# cells of the default board
+CELLS = Board.WIDTH * Board.HEIGHT
+
+
+@dataclass
+class Solution:
+	"""The proven outcome of a position for the player to move."""
+	score: int  # positive for a win, the sooner the higher. Negative for a loss, 0 for a draw
+	plies: int  # how many pieces are played until the end of the game
+
+	@property
+	def result(self) -> str:
+		return 'win' if self.score > 0 else 'loss' if self.score < 0 else 'draw'
+
+
+class EndgameSolver:
+	"""Solves positions exactly with a null-window negamax, fast enough once few cells are left empty.
+
+	A position is two masks in the BitBoard layout: the pieces of the player to move and all the pieces.
+	Scores are from the point of view of the player to move: winning with the k-th last own piece
+	(counting the whole board) scores k, losing the same way scores -k and a draw scores 0."""
+	STOP_CHECK_INTERVAL = 1024
+
+	def __init__(self, tt_entries: int = 2 ** 20, board_cls: type[Board] = Board):
+		"""
+		:param board_cls: the class of the boards to solve, which gives their size
+		"""
+		self.tt_entries = tt_entries
+		# upper bound of the score of every position, keyed by current + mask which is unique
+		self.tt: dict[int, int] = {}
+		self.nodes = 0
+		# raises SearchTimeout once it is set, checked every STOP_CHECK_INTERVAL nodes
+		self.stop: Event | None = None
+
+		self.bit_board_cls = BitBoard.variant(board_cls.WIDTH, board_cls.HEIGHT, board_cls.CONNECT)
+		self.cells = board_cls.WIDTH * board_cls.HEIGHT
+		self.order = center_order(board_cls.WIDTH)
+		# the bottom cell, the top cell and every cell of each column, in the BitBoard layout
+		col_bits = self.bit_board_cls.COL_BITS
+		self.bottom = [1 << (col * col_bits) for col in range(board_cls.WIDTH)]
+		self.top = [1 << (col * col_bits + board_cls.HEIGHT - 1) for col in range(board_cls.WIDTH)]
+		self.column = [((1 << board_cls.HEIGHT) - 1) << (col * col_bits) for col in range(board_cls.WIDTH)]
+
+	def _masks(self, board, playing) -> tuple[int, int]:
+		if not isinstance(board, BitBoard):
+			board = self.bit_board_cls(board.state)
+		current = board.masks.get(Game.PLAYERS[playing], 0)
+		mask = current | board.masks.get(Game.PLAYERS[(playing + 1) % 2], 0)
+		return current, mask
+
+	def _wins(self, current, mask, col) -> bool:
+		"""Whether the player to move connects CONNECT pieces by playing in the column."""
+		return self.bit_board_cls.has_alignment(current | ((mask + self.bottom[col]) & self.column[col]))
+
+	def solve(self, board, playing) -> Solution:
+		"""Solve a position in progress."""
+		current, mask = self._masks(board, playing)
+		moves = bin(mask).count('1')
+		score = self._solve(current, mask, moves)
+		return Solution(score, self.plies_to_end(score, moves, self.cells))
+
+	def solve_moves(self, board, playing, columns=None) -> dict[int, Solution]:
+		"""Solve the position after each of the moves of the player, from that player's point of view.
+		:param columns: the moves to solve, by default every one that can be played
+		"""
+		current, mask = self._masks(board, playing)
+		moves = bin(mask).count('1')
+		solutions = {}
+		for col in range(len(self.top)) if columns is None else columns:
+			if mask & self.top[col]:
+				continue
+			if self._wins(current, mask, col):
+				score = (self.cells + 1 - moves) // 2
+			else:
+				new_mask = mask | (mask + self.bottom[col])
+				score = -self._solve(current ^ mask, new_mask, moves + 1)
+			solutions[col] = Solution(score, self.plies_to_end(score, moves, self.cells))
+		return solutions
+
+	@staticmethod
+	def plies_to_end(score, moves, cells=CELLS) -> int:
+		"""How many pieces are played from a position with that many pieces until the game ends."""
+		if score == 0:
+			return cells - moves
+		# the winner plays the piece that makes CONNECT in a row, which is piece number last_move + 1
+		winner_offset = 0 if score > 0 else 1
+		last_move = cells + 1 - 2 * abs(score)
+		if (last_move - moves - winner_offset) % 2:
+			last_move -= 1
+		return last_move - moves + 1
+
+	def _solve(self, current, mask, moves) -> int:
+		# narrow the window with null-window searches until the exact score is known
+		low, high = -((self.cells - moves) // 2), (self.cells + 1 - moves) // 2
+		while low < high:
+			middle = low + (high - low) // 2
+			# try the windows closer to 0 first, they are cheaper to search
+			if middle <= 0 and int(low / 2) < middle:
+				middle = int(low / 2)
+			elif middle >= 0 and int(high / 2) > middle:
+				middle = int(high / 2)
+			score = self._negamax(current, mask, moves, middle, middle + 1)
+			if score <= middle:
+				high = score
+			else:
+				low = score
+		return low
+
+	def _negamax(self, current, mask, moves, alpha, beta) -> int:
+		self.nodes += 1
+		if self.nodes % self.STOP_CHECK_INTERVAL == 0 and self.stop is not None and self.stop.is_set():
+			raise SearchTimeout()
+		cells, top, bottom = self.cells, self.top, self.bottom
+		if moves == cells:
+			return 0
+
+		# win right away if possible
+		for col in range(len(top)):
+			if not mask & top[col] and self._wins(current, mask, col):
+				return (cells + 1 - moves) // 2
+
+		# otherwise the best is to win with the next own piece
+		high = (cells - 1 - moves) // 2
+		if (bound := self.tt.get(current + mask)) is not None:
+			high = min(high, bound)
+		if beta > high:
+			beta = high
+			if alpha >= beta:
+				return beta
+
+		for col in self.order:
+			if mask & top[col]:
+				continue
+			score = -self._negamax(current ^ mask, mask | (mask + bottom[col]), moves + 1, -beta, -alpha)
+			if score >= beta:
+				return score
+			if score > alpha:
+				alpha = score
+
+		if len(self.tt) >= self.tt_entries:
+			self.tt.clear()
+		self.tt[current + mask] = alpha
+		return alpha
@@ -1,17 +1,96 @@
+import sys
 import time
-from multiprocessing import Pool
+from dataclasses import dataclass
+from threading import Event
+from multiprocessing.pool import Pool
+from typing import Callable
 
-from min_max_tree import MinMaxTree
+from endgame_solver import EndgameSolver
+from four_in_a_row import Board, Game, mirror_move
+from lazy_smp import LazySMP
+from min_max_tree import WIN_SCORE, MinMaxTree, Node, SearchContext, SearchTimeout
 from random import choice
 
+from move_ordering import MoveOrdering, Strategy
+from opening_book import OpeningBook
+from search_stats import SearchCounters, SearchProgress, SearchStats
+from transposition_table import TranspositionTable
+
+
+@dataclass
+class SearchTask:
+	"""A subtree to search in a worker process, described by the position at its root
+	and the moves leading to it so that no tree has to be sent between processes."""
+	board_cls: type
+	rows: list[str]  # the state of the root board, one string per row
+	playing: int  # who's turn it is at the root
+	moves: list[int]
+	depth: int  # how deep to search after playing the moves
+	time_left: float | None = None  # seconds before the search is aborted
+
+
+# the search helpers of a worker process, they are kept from one task to the next
+_worker_ctx: SearchContext | None = None
+
+
+def _init_worker(tt_entries, strategies, width, pvs, threats):
+	global _worker_ctx
+	tt = TranspositionTable(tt_entries) if tt_entries else None
+	_worker_ctx = SearchContext(tt, MoveOrdering(strategies, width), pvs=pvs, threats=threats)
+
 
 class FIARMinMax:
-	def __init__(self, game, *, max_depth=3, plays: int = 1, verbose=False, mt=False):
+	def __init__(
+			self, game, *, max_depth=3, plays: int = 1, verbose=False, mt=False,
+			tt_entries: int | None = 2 ** 20, lazy=False, ordering=tuple(Strategy), time_budget: float | None = None,
+			smp: int = 0, book: str | OpeningBook | None = None, endgame_threshold: int = 16,
+			detailed_stats=False, on_stats: Callable[[SearchStats], None] | None = None, pvs=True,
+			aspiration: int | None = 2, threats=True):
 		self.game = game
 		self.plays = plays  # by default, the algo plays second
 		self.tree = None
 		self.max_depth = max_depth
 		self.mt = mt  # multithreaded processing
+		# only keep the immediate children of the root and generate the rest of the tree while searching
+		self.lazy = lazy
+		# cache of the positions that were already searched, None disables it
+		self.tt_entries = tt_entries
+		self.tt = TranspositionTable(tt_entries) if tt_entries else None
+		# the move ordering strategies to use, an empty list searches the columns left to right
+		self.ordering = MoveOrdering(ordering, game.board.WIDTH)
+		# seconds per move, searching deeper and deeper instead of up to max_depth
+		self.time_budget = time_budget
+		# principal variation search, see MinMaxTree.minimax
+		self.pvs = pvs
+		# how far from the score of the previous iteration the window of the next one starts, None for the full window
+		self.aspiration = aspiration
+		# play immediate wins and forced blocks without searching, and prune the search with the immediate threats
+		self.threats = threats
+		# statistics about the last search
+		self.stats = SearchStats()
+		# also count the nodes ply by ply, the static evaluations and the memory used (searches in this process only)
+		self.detailed_stats = detailed_stats
+		self.counters: SearchCounters | None = None
+		# called with the statistics of every move, see search_stats.StatsLog to write them to a file
+		self.on_stats = on_stats
+		# called after every depth of an iterative deepening search
+		self.on_progress: Callable[[SearchProgress], None] | None = None
+		# the worker processes used when mt is set, created on the first search
+		self.pool: Pool | None = None
+		# how many processes search the root together with a shared table (lazy SMP), 0 disables it
+		self.smp = smp
+		self.smp_search: LazySMP | None = None
+		# precomputed moves for the first plies, looked up before searching
+		self.book = OpeningBook(book) if isinstance(book, str) else book
+		self._owns_book = isinstance(book, str)
+		# below that many empty cells, the position is solved exactly instead of searched
+		self.endgame_threshold = endgame_threshold
+		self.solver = EndgameSolver(board_cls=type(game.board))
+		# the answers found while pondering, by zobrist hash of the position after the opponent's move.
+		# a position and its mirror image share their answer, stored as seen from the smaller hash
+		self.pondered: dict[int, tuple[int, SearchStats, list[int]]] = {}
+		# an event another thread can set to abort the search (pondering or not), in this process only
+		self.stop: Event | None = None
 
 		# TODO: make a debug node with more debug options (useful for unit tests)
 		# the list of all options with the same score on the last move
@@ -23,8 +102,10 @@ class FIARMinMax:
 		if self.verbose:
 			print(*args, **kwargs)
 
-	def _update_tree(self):
-		"""Makes sure the tree is at the right depth and all the children exist at each layer."""
+	def _update_tree(self, time_budget: float | None):
+		"""Makes sure the tree is at the right depth and all the children exist at each layer.
+		:param time_budget: the time budget of the search that follows, see stores_tree
+		"""
 		start_time = time.perf_counter()
 
 		# TODO: implement a multithread tree generation
@@ -32,50 +113,330 @@ class FIARMinMax:
 		# 	# self.tree.generate_tree_mt(self.max_depth)
 		# 	raise NotImplementedError("no multithreading yet :(")
 		# else:
-		self.tree.generate_tree(self.max_depth)
+		# the endgame solver does not use the stored tree either
+		stores_tree = self.stores_tree(time_budget) and not self.in_endgame
+		self.tree.generate_tree(self.max_depth if stores_tree else 1, stop=self.stop)
+		self.stats.generate_time += time.perf_counter() - start_time
 
 		self.debug_print(
-			f"Updating {'(mt) ' if self.mt else ''}tree with depth {self.max_depth} "
+			f"Updating {'(mt) ' if self.mt else ''}{'(lazy) ' if self.lazy else ''}tree with depth {self.max_depth} "
 			f"took {time.perf_counter() - start_time:.3f}s")
 		pass
 
+	@property
+	def tt_size(self) -> int:
+		"""How many positions are stored in the transposition table."""
+		if self.smp_search is not None:
+			return len(self.smp_search.tt)
+		return len(self.tt) if self.tt is not None else 0
+
+	@property
+	def tt_hit_rate(self) -> float:
+		"""Ratio of transposition table probes that found the position (in this process)."""
+		return self.tt.hit_rate if self.tt is not None else 0.
+
+	@property
+	def cutoff_stats(self) -> dict:
+		"""How many nodes were searched and how many alpha-beta cutoffs each ordering strategy caused."""
+		return self.ordering.stats()
+
+	@property
+	def width(self) -> int:
+		return self.game.board.WIDTH
+
+	@property
+	def cells(self) -> int:
+		"""How many cells the board has, the most pieces a game can last."""
+		return self.game.board.WIDTH * self.game.board.HEIGHT
+
+	def stores_tree(self, time_budget: float | None) -> bool:
+		"""Whether the whole tree is generated before searching it. The worker processes
+		and iterative deepening generate the tree while searching, like the lazy mode.
+		:param time_budget: the time budget of the search, the one given to get_best_play if any
+		"""
+		return not (self.lazy or self.mt or self.smp or time_budget is not None)
+
+	@property
+	def in_endgame(self) -> bool:
+		"""Whether the root is close enough to the end of the game for the endgame solver to search it."""
+		return self.cells - self.tree.move_count < self.endgame_threshold
+
+	@property
+	def search_depth(self) -> int | None:
+		"""The depth the children of the root are searched to when the tree is not stored."""
+		return None if self.stores_tree(self.time_budget) else self.max_depth - 1
+
+	def close(self):
+		"""Stop the worker processes, if any."""
+		if self.pool is not None:
+			self.pool.close()
+			self.pool.join()
+			self.pool = None
+		if self.smp_search is not None:
+			self.smp_search.close()
+			self.smp_search = None
+		if self._owns_book and self.book is not None:
+			self.book.close()
+			self.book = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def _get_pool(self) -> Pool:
+		if self.pool is None:
+			# every process uses its own table, sharing one would need synchronisation
+			self.pool = Pool(
+				initializer=_init_worker,
+				initargs=(self.tt_entries, self.ordering.strategies, self.width, self.pvs, self.threats))
+		return self.pool
+
 	@staticmethod
-	def worker(child):
-		return child.get_score(), child
+	def worker(task: SearchTask) -> tuple[int, float, dict]:
+		"""Rebuild the position of the task and search it.
+		Return the first move of the task, the score and statistics about the search."""
+		ctx = _worker_ctx or SearchContext()
+		ctx.nodes = 0
+		ctx.deadline = time.perf_counter() + task.time_left if task.time_left is not None else None
+		if ctx.tt is not None:
+			ctx.tt.new_search()
+
+		tree = MinMaxTree(task.board_cls([list(row) for row in task.rows]), task.playing)
+		for move in task.moves:
+			tree = tree.make_child(move)
+		score = tree.get_score(ctx, task.depth)
+		return task.moves[0], score, {'nodes': ctx.nodes}
 
-	def get_children_scores(self, mt) -> list[tuple[float, MinMaxTree]]:
-		"""Return the list of scores of the immediate children."""
+	def get_children_scores(
+			self, mt, children=None, depth=None, deadline=None, guess=None) -> list[tuple[int, MinMaxTree]]:
+		"""Return the list of scores of the immediate children. Only the best ones are exact, see MinMaxTree.score_children.
+		:param children: the children to score, in the order to search them, see _root_children by default
+		:param depth: how deep to search the children, defaults to the search depth of the engine
+		:param deadline: time.perf_counter() value after which SearchTimeout is raised
+		:param guess: the expected score of the first child, which its aspiration window is centered on
+		"""
+		children = self._root_children() if children is None else children
+		depth = self.search_depth if depth is None else depth
 		if mt:
-			with Pool() as pool:
-				scores = pool.map(self.worker, [child for child in self.tree.children])
+			time_left = deadline - time.perf_counter() if deadline is not None else None
+			board = self.tree.node.board
+			rows = [''.join(row) for row in board]
+			tasks = [
+				SearchTask(type(board), rows, self.tree.node.playing, [child.node.delta], depth, time_left)
+				for child in children]
+			results = self._get_pool().map(self.worker, tasks)
+
+			by_column = {child.node.delta: child for child in children}
+			scores = []
+			for column, score, stats in results:
+				by_column[column].node.score = score
+				scores.append((score, by_column[column]))
+				self.stats.nodes += stats['nodes']
+		else:
+			ctx = SearchContext(
+				self.tt, self.ordering, deadline, stop=self.stop, counters=self.counters, pvs=self.pvs,
+				threats=self.threats)
+			try:
+				scores = self.tree.score_children(ctx, depth, children, guess, self.aspiration)
+			finally:
+				self.stats.nodes += ctx.nodes
+		return scores
+
+	def _smp_scores(self, deadline=None) -> list[tuple[int, MinMaxTree]]:
+		"""Score the children with lazy SMP, to the search depth or as deep as possible before the deadline."""
+		if self.smp_search is None:
+			self.smp_search = LazySMP(
+				self.smp, self.tt_entries or 2 ** 20, self.ordering.strategies, self.width, self.pvs, self.threats)
+		if deadline is None:
+			max_depth = self.search_depth
 		else:
-			scores = [(child.get_score(), child) for child in self.tree.children]
+			max_depth = self.cells - self.tree.move_count - 1
+		result = self.smp_search.search(self.tree.node.board, self.tree.node.playing, max_depth, deadline)
+		self.stats.depth = result.depth + 1
+		self.stats.nodes += result.nodes
+
+		by_column = {child.node.delta: child for child in self.tree.children}
+		scores = []
+		for column, score in result.scores:
+			by_column[column].node.score = score
+			scores.append((score, by_column[column]))
+		return scores
+
+	def _endgame_scores(self) -> list[tuple[int, MinMaxTree]]:
+		"""Solve the position exactly. The scores are those of the search: WIN_SCORE minus the number of pieces
+		on the board when the game is won, and 0 for a draw."""
+		nodes = self.solver.nodes
+		self.solver.stop = self.stop
+		children = self.tree.folded_children()
+		solutions = self.solver.solve_moves(
+			self.tree.node.board, self.tree.node.playing, [child.node.delta for child in children])
+		best = max(solutions.values(), key=lambda solution: solution.score)
+		self.stats.depth = self.cells - self.tree.move_count
+		self.stats.nodes += self.solver.nodes - nodes
+		self.stats.proven = best.result
+		self.stats.plies_to_end = best.plies
+
+		scores = []
+		for child in children:
+			solution = solutions[child.node.delta]
+			score = WIN_SCORE - (self.tree.move_count + solution.plies) if solution.score else 0
+			# the solver scores are from the point of view of the player to move, the tree's are from P1's
+			child.node.score = score if (solution.score >= 0) == self.tree.node.maximizing else -score
+			scores.append((child.node.score, child))
 		return scores
 
-	def get_best_play(self):
+	def _iterative_deepening(self, deadline, start_time) -> list[tuple[int, MinMaxTree]]:
+		"""Search the children 1, 2, 3... plies deep until the deadline passes
+		and return the scores of the deepest search that finished.
+		on_progress is called after every iteration that finished."""
+		children = self._root_children()
+		max_depth = self.cells - self.tree.move_count
+		scores = []
+		best_score = None
+		for depth in range(1, max_depth + 1):
+			if depth > 1 and time.perf_counter() > deadline:
+				break
+			# the scores are cached in the nodes, forget the ones of the previous iteration
+			for child in children:
+				child.node.score = None
+			try:
+				# the first iteration always finishes so there is a move to play
+				new_scores = self.get_children_scores(
+					self.mt, children, depth - 1, deadline if depth > 1 else None, best_score)
+			except SearchTimeout:
+				self.debug_print(f"Search at depth {depth} ran out of time")
+				break
+			scores = new_scores
+			self.stats.depth = depth
+
+			# search the best child of this iteration first in the next one, the table then
+			# holds its lines when the other children are searched
+			better = max if self.tree.node.maximizing else min
+			best_score, best_child = better(scores, key=lambda pair: pair[0])
+			children = [best_child] + [child for child in children if child is not best_child]
+			if self.on_progress is not None:
+				self.on_progress(SearchProgress(
+					depth, best_child.node.delta, best_score, self.stats.nodes,
+					time.perf_counter() - start_time))
+
+		# put the children back in column order
+		return sorted(scores, key=lambda pair: pair[1].node.delta)
+
+	def get_best_play(self, time_budget: float | None = None):
+		"""Return the column the algo wants to play in.
+		:param time_budget: if given, search deeper and deeper until that many seconds have passed,
+		and play the best move of the deepest search that finished. max_depth is then ignored.
+		"""
+		start_time = time.perf_counter()
+		self.stats = SearchStats()
+		time_budget = time_budget if time_budget is not None else self.time_budget
+
 		if not self.tree:
-			self.debug_print("Generating tree...")
 			self.tree = MinMaxTree(self.game.board.__copy__(), playing=self.plays)
-			self._update_tree()
 
 		self.debug_print("Calculating best move...")
 		# if the current board state is not the head of the tree, find the child that corresponds
 		if self.game.board != self.tree.node.board:
 			for child in self.tree.children:
 				if self.game.last_play == child.node.delta:
-					self.tree = child
-					self._update_tree()
+					self._move_root(child)
 					break
+		# the tree is only grown once it is known that the move needs a search,
+		# the moves that are played without one only need the children of the root
+		self.tree.generate_tree(1)
+
+		# a win right away is played even if pondering found another move
+		if self.threats and (forced := self._forced_child()) is not None:
+			return self._play_child(forced, start_time)
+
+		ponder_key, mirrored = self.tree.canonical_hash()
+		if (pondered := self.pondered.get(ponder_key)) is not None:
+			move, self.stats, self.last_play_options = pondered
+			if mirrored:
+				move = mirror_move(move, self.width)
+				self.last_play_options = [mirror_move(option, self.width) for option in self.last_play_options]
+			self.debug_print(f"Playing {move}, found while pondering")
+			self.stats.ponder_hit = True
+			return self._play_child(next(child for child in self.tree.children if child.node.delta == move))
+
+		if self.book is not None and (found := self.book.lookup(self.tree.node.board)) is not None:
+			move, score = found
+			self.debug_print(f"Playing {move} from the opening book (Score: {score})")
+			self.stats.book_hit = True
+			self.stats.score = score
+			self.last_play_options = [move]
+			return self._play_child(next(child for child in self.tree.children if child.node.delta == move), start_time)
+
+		self.debug_print("Generating tree...")
+		self._update_tree(time_budget)
+		return self._play_child(self._search_root(start_time, time_budget), start_time)
+
+	def _forced_child(self) -> MinMaxTree | None:
+		"""Return the child to play if the position leaves no choice and nothing to search: a win right away,
+		or one of the moves that stop the opponent from winning right away when there are more than one of them
+		and the game is lost. A single block is searched, on its own, to know where it leads (see _root_children)."""
+		board = self.tree.node.board
+		playing = self.tree.node.playing
+		sign = 1 if self.tree.node.maximizing else -1
+		options, _ = board.winning_columns(Game.PLAYERS[playing])
+		if options:
+			self.stats.score = sign * (WIN_SCORE - self.tree.move_count - 1)
+			self.stats.proven, self.stats.plies_to_end = 'win', 1
+		else:
+			options, _ = board.winning_columns(Game.PLAYERS[(playing + 1) % 2])
+			if len(options) < 2:
+				return None
+			self.stats.score = -sign * (WIN_SCORE - self.tree.move_count - 2)
+			self.stats.proven, self.stats.plies_to_end = 'loss', 2
+		self.stats.forced = True
+		self.last_play_options = options
+		move = choice(options)
+		self.debug_print(f"Playing {move} without searching, out of {options}")
+		return next(child for child in self.tree.children if child.node.delta == move)
+
+	def _root_children(self) -> list[MinMaxTree]:
+		"""The children of the root to search, see MinMaxTree.safe_children."""
+		return self.tree.safe_children() if self.threats else self.tree.folded_children()
+
+	def _search_root(self, start_time, time_budget) -> MinMaxTree:
+		"""Score the children of the root of the tree and return the one to play."""
+		tt_probes, tt_hits = (self.tt.probes, self.tt.hits) if self.tt is not None else (0, 0)
+		cutoffs, first_move_cutoffs = self.ordering.cutoffs, self.ordering.first_move_cutoffs
+		if self.detailed_stats:
+			self.counters = SearchCounters(self.tree.move_count, self.cells - self.tree.move_count)
 
 		# kinda hacky and against best practice, but it's readable and gets the work done
 		better, worse = (max, min) if self.tree.node.maximizing else (min, max)
 
 		# get a list of the best options (the children in the list are tied)
 		best_children = []
-		best_score = worse((-5, 5))
+		best_score = worse(-float('inf'), float('inf'))
 
 		# get the scores and pick the best ones
-		scores = self.get_children_scores(self.mt)
+		if self.tt is not None:
+			self.tt.new_search()
+		search_start = time.perf_counter()
+		if self.in_endgame:
+			scores = self._endgame_scores()
+		elif self.smp:
+			scores = self._smp_scores(start_time + time_budget if time_budget is not None else None)
+		elif time_budget is not None:
+			scores = self._iterative_deepening(start_time + time_budget, start_time)
+		else:
+			scores = self.get_children_scores(self.mt)
+			self.stats.depth = self.max_depth
+		self.stats.search_time = time.perf_counter() - search_start
+		if self.tt is not None:
+			self.stats.tt_probes, self.stats.tt_hits = self.tt.probes - tt_probes, self.tt.hits - tt_hits
+		self.stats.cutoffs = self.ordering.cutoffs - cutoffs
+		self.stats.first_move_cutoffs = self.ordering.first_move_cutoffs - first_move_cutoffs
+		if self.counters is not None:
+			self._collect_counters()
+		# the children that were not searched get the scores of their mirror images,
+		# so tied mirrored moves are picked from just as often
+		scores = self._unfold_scores(scores)
 		for score, child in scores:
 			if score == best_score:
 				best_children.append(child)
@@ -87,15 +448,136 @@ class FIARMinMax:
 		# pick a random option out of the available ones
 		chosen = choice(best_children)
 		self.debug_print(
-			f"Chose random out of {len(best_children)} options (Score: {best_score:.2f}):"
+			f"Chose random out of {len(best_children)} options (Score: {best_score}):"
 			f" {[c.node.delta for c in best_children]}")
+		if self.tt is not None:
+			self.debug_print(f"Transposition table: {self.tt_size} entries, {self.tt_hit_rate:.1%} hit rate")
+		self.debug_print(f"Cutoffs: {self.cutoff_stats}")
 		self.last_play_options = [child.node.delta for child in best_children]
+		self.stats.score = best_score
+		return chosen
+
+	def _unfold_scores(self, scores: list[tuple[int, MinMaxTree]]) -> list[tuple[int, MinMaxTree]]:
+		"""Add the mirrored children of a symmetric root, which are not searched, with the scores of their mirror images."""
+		if not self.tree.symmetric:
+			return scores
+		scored = {child.node.delta for _, child in scores}
+		by_column = {child.node.delta: child for child in self.tree.children}
+		for score, child in list(scores):
+			if (mirror := mirror_move(child.node.delta, self.width)) not in scored:
+				by_column[mirror].node.score = score
+				scores.append((score, by_column[mirror]))
+		return sorted(scores, key=lambda pair: pair[1].node.delta)
+
+	def _collect_counters(self):
+		"""Add the detailed counts of the search to the statistics."""
+		counters = self.counters
+		# the stored tree was generated for the search, the lazy searches generate the nodes below it
+		generated = counters.generated
+		stack = [(self.tree, 0)]
+		stored_nodes = stored_depth = 0
+		while stack:
+			subtree, ply = stack.pop()
+			generated[ply] += 1
+			stored_nodes += 1
+			stored_depth = max(stored_depth, ply)
+			stack.extend((child, ply + 1) for child in subtree.children)
+		last_ply = max(ply for ply, count in enumerate(generated) if count)
+
+		self.stats.generated_per_ply = generated[:last_ply + 1]
+		self.stats.searched_per_ply = counters.searched[:counters.deepest_ply + 1]
+		self.stats.static_evals = counters.static_evals
+		self.stats.static_eval_time = counters.static_eval_time
+		# a lazy search only keeps the line it is searching in memory
+		self.stats.peak_nodes = stored_nodes + max(0, counters.deepest_ply - stored_depth)
+		# only the root has a board
+		node_size = _approx_size(self.tree.children[0]) if self.tree.children else 0
+		self.stats.peak_bytes = _approx_size(self.tree) + (self.stats.peak_nodes - 1) * node_size
+
+	def ponder_moves(self) -> list[int]:
+		"""Return the moves the opponent can play, the most likely first."""
+		if self.tree is None:
+			return []
+		moves = [child.node.delta for child in self.tree.children]
+		likely = self.tree.node.best_move
+		return sorted(moves, key=lambda move: (move != likely, self.ordering.center_order.index(move)))
 
-		# adjust the tree after the move
-		self.tree = chosen
+	def ponder(self, move):
+		"""Search the answer to a move of the opponent before they play it.
+		If they do, get_best_play plays the answer right away. Setting the stop event aborts the search
+		and the answer is then forgotten."""
+		child = next((child for child in self.tree.children if child.node.delta == move), None) if self.tree else None
+		ponder_key, mirrored = child.canonical_hash() if child is not None else (None, False)
+		if child is None or child.node.game_state is not Game.GameState.IN_PROGRESS or ponder_key in self.pondered:
+			return
 
+		start_time = time.perf_counter()
+		root, stats, options = self.tree, self.stats, self.last_play_options
+		self.stats = SearchStats()
+		self.tree = child
+		try:
+			self.tree.generate_tree(1)
+			if not self.threats or (answer := self._forced_child()) is None:
+				self._update_tree(self.time_budget)
+				answer = self._search_root(start_time, self.time_budget)
+			self.stats.time = time.perf_counter() - start_time
+			if self.stop is None or not self.stop.is_set():
+				move, options = answer.node.delta, self.last_play_options
+				if mirrored:
+					move = mirror_move(move, self.width)
+					options = [mirror_move(option, self.width) for option in options]
+				self.pondered[ponder_key] = (move, self.stats, options)
+		except SearchTimeout:
+			pass
+		finally:
+			self.tree, self.stats, self.last_play_options = root, stats, options
+
+	def _move_root(self, child: MinMaxTree):
+		"""Make the child the root of the tree. The rest of the tree is dropped, the child keeps its subtree
+		along with the best moves of the last search which are searched first by the next one.
+		The plies the child is missing are only generated by the next search, see _update_tree."""
+		for sibling in self.tree.children:
+			if sibling is not child:
+				# the children themselves may still be referenced by the caller, but not their subtrees
+				sibling.children = []
+		self.tree = child
+		self.tree.node.make_root()
+
+	def _play_child(self, chosen: MinMaxTree, start_time=None):
+		"""Move the root of the tree to the chosen child and return its column.
+		:param start_time: when the call that chose the move started, the stats keep their time if it is not given
+		"""
+		self.pondered.clear()
+
+		# adjust the tree after the move, only the moves of the opponent are needed until the next search
 		self.debug_print("Updating the tree...")
-		self._update_tree()
+		self._move_root(chosen)
+		self.tree.generate_tree(1)
+		if start_time is not None:
+			self.stats.time = time.perf_counter() - start_time
 		self.debug_print("Your turn!")
+		if self.on_stats is not None:
+			self.on_stats(self.stats)
 
 		return chosen.node.delta
+
+
+def _approx_size(tree: MinMaxTree) -> int:
+	"""Roughly how many bytes a node of the tree takes, not counting its parent and children."""
+	seen = set()
+	size = 0
+	stack = [tree]
+	while stack:
+		obj = stack.pop()
+		if id(obj) in seen:
+			continue
+		seen.add(id(obj))
+		size += sys.getsizeof(obj)
+		if isinstance(obj, dict):
+			stack.extend(obj.values())
+		elif isinstance(obj, (list, tuple)):
+			stack.extend(obj)
+		elif isinstance(obj, (MinMaxTree, Node, Board)):
+			names = getattr(obj, '__slots__', None) or vars(obj)
+			stack.extend(getattr(obj, name) for name in names if name not in ('children', 'parent'))
+	return size
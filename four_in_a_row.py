@@ -1,14 +1,33 @@
+import re
 from enum import Enum, auto
 
 from colorama import Fore, Style
 
 
 class Board:
-	"""A board is a 7 * 6 board of red, black or empty pieces"""
+	"""A board is a 7 * 6 board of red, black or empty pieces.
+	Boards of other sizes are instances of the classes returned by variant()."""
 	WIDTH = 7
 	HEIGHT = 6
+	CONNECT = 4  # how many aligned pieces win the game
 	EMPTY = '.'
 
+	@classmethod
+	def variant(cls, width, height, connect=4) -> type['Board']:
+		"""Return the class of the boards of that size (the class itself for the default size).
+		There is one class per size, which the search keeps its precomputed tables for."""
+		base = vars(cls).get('_base', cls)
+		if (width, height, connect) == (base.WIDTH, base.HEIGHT, base.CONNECT):
+			return base
+		if width < 1 or height < 1 or connect < 2:
+			raise ValueError("The board needs at least one column, one row and a connect length of 2")
+		# the classes are named after their size and stored in the module, so they can be pickled
+		name = f'{base.__name__}_{width}x{height}_{connect}'
+		if name not in globals():
+			globals()[name] = type(base)(name, (base,), {
+				'WIDTH': width, 'HEIGHT': height, 'CONNECT': connect, '_base': base, '__qualname__': name})
+		return globals()[name]
+
 	def __init__(self, initial_state=None):
 		if initial_state:
 			self.state = initial_state
@@ -18,13 +37,34 @@ class Board:
 	def reset(self, *, initial_state=None):
 		self.__init__(initial_state=initial_state)
 
+	@classmethod
+	def from_moves(cls, moves):
+		"""Build the board reached by playing the columns (ints, or a string of digits) from the empty board.
+		The pieces are only dropped, whether the game ended along the way is not checked."""
+		board = cls()
+		for i, column in enumerate(moves):
+			board.insert_piece(int(column), Game.PLAYERS[i % 2])
+		return board
+
+	@classmethod
+	def from_key(cls, key):
+		"""Build the board of a key returned by get_key."""
+		state = [[cls.EMPTY for _ in range(cls.WIDTH)] for _ in range(cls.HEIGHT)]
+		for col in range(cls.WIDTH):
+			column = key >> (col * (cls.HEIGHT + 1)) & ((1 << (cls.HEIGHT + 1)) - 1)
+			# the highest bit of the column is the one above the top piece
+			for height in range(column.bit_length() - 1):
+				state[cls.HEIGHT - 1 - height][col] = Game.PLAYERS[0 if column >> height & 1 else 1]
+		return cls(state)
+
 	def get_valid_columns(self):
 		"""Returns the indices of non-empty columns."""
-		for i in range(Board.WIDTH):
+		for i in range(self.WIDTH):
 			if self.state[0][i] == self.EMPTY:
 				yield i
 
-	def insert_piece(self, column, piece):
+	def insert_piece(self, column, piece) -> int:
+		"""Drop a piece in the given column and return the row it landed on."""
 		if column not in range(self.WIDTH):
 			raise ValueError("The column is invalid")
 
@@ -38,7 +78,79 @@ class Board:
 			if row == self.HEIGHT - 1 or self.state[row + 1][column] != self.EMPTY:
 				# place the piece and move on
 				self.state[row][column] = piece
-				break
+				return row
+
+	def remove_piece(self, column) -> int:
+		"""Take the top piece out of the given column and return the row it was on."""
+		if column not in range(self.WIDTH):
+			raise ValueError("The column is invalid")
+
+		for row in range(self.HEIGHT):
+			if self.state[row][column] != self.EMPTY:
+				self.state[row][column] = self.EMPTY
+				return row
+		raise ValueError("The column is empty")
+
+	def winning_columns(self, piece) -> tuple[list[int], list[int]]:
+		"""Return the columns the piece wins in if it is played there now, and the columns
+		it wins in if it is played there right after another piece."""
+		other = Game.PLAYERS[Game.PLAYERS.index(piece) - 1]
+		now, next_ = [], []
+		for col in list(self.get_valid_columns()):
+			row = self.insert_piece(col, piece)
+			try:
+				if self.get_alignment_at(row, col, piece):
+					now.append(col)
+				if row > 0:
+					self.state[row][col] = other
+					self.insert_piece(col, piece)
+					if self.get_alignment_at(row - 1, col, piece):
+						next_.append(col)
+					self.remove_piece(col)
+			finally:
+				self.remove_piece(col)
+		return now, next_
+
+	def count_pieces(self) -> int:
+		"""Return how many pieces have been played on the board."""
+		return sum(self.WIDTH - row.count(self.EMPTY) for row in self.state)
+
+	def get_key(self, mirror=False) -> int:
+		"""Return a number that identifies the position (or its left-right mirror image).
+		Each column takes HEIGHT + 1 bits: one bit per piece of the first player,
+		counted from the bottom, plus one bit right above the top piece."""
+		key = 0
+		for i in range(self.WIDTH):
+			col = self.WIDTH - 1 - i if mirror else i
+			height = 0
+			for row in range(self.HEIGHT - 1, -1, -1):
+				elem = self.state[row][col]
+				if elem == self.EMPTY:
+					break
+				if elem == Game.PLAYERS[0]:
+					key |= 1 << (i * (self.HEIGHT + 1) + height)
+				height += 1
+			key |= 1 << (i * (self.HEIGHT + 1) + height)
+		return key
+
+	def get_alignment_at(self, row, col, piece) -> list[tuple]:
+		"""Return the coordinates of CONNECT aligned pieces going through (row, col), or an empty list.
+		Only the 4 lines going through that cell are looked at, which is all that can change
+		when a piece is dropped there."""
+		for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+			# walk back to the first piece of the chain, then forward to the last one
+			start_row, start_col = row, col
+			while 0 <= start_row - d_row < self.HEIGHT and 0 <= start_col - d_col < self.WIDTH \
+					and self.state[start_row - d_row][start_col - d_col] == piece:
+				start_row, start_col = start_row - d_row, start_col - d_col
+			chain = []
+			y, x = start_row, start_col
+			while 0 <= y < self.HEIGHT and 0 <= x < self.WIDTH and self.state[y][x] == piece:
+				chain.append((y, x))
+				y, x = y + d_row, x + d_col
+			if len(chain) >= self.CONNECT:
+				return chain[:self.CONNECT]
+		return []
 
 	def gen_row(self, row_i):
 		"""Returns a generator for the given row."""
@@ -51,13 +163,13 @@ class Board:
 	def gen_up_diag(self, diag_i):
 		"""Returns a generator for the given up diag (SW to NE)."""
 		# if the diag starts on the first column
-		if diag_i < Board.HEIGHT:
+		if diag_i < self.HEIGHT:
 			row_i = diag_i
 			col_i = 0
 		# if the diag starts on the bottom row
 		else:
-			row_i = Board.HEIGHT - 1
-			col_i = diag_i - Board.HEIGHT + 1
+			row_i = self.HEIGHT - 1
+			col_i = diag_i - self.HEIGHT + 1
 
 		# keep going NE until off the grid
 		while row_i >= 0 and col_i < self.WIDTH:
@@ -68,16 +180,16 @@ class Board:
 	def gen_dn_diag(self, diag_i):
 		"""Returns a generator for the given down diag (NW to SE)."""
 		# if the diag starts on the first column
-		if diag_i < Board.HEIGHT:
-			row_i = Board.HEIGHT - diag_i - 1
+		if diag_i < self.HEIGHT:
+			row_i = self.HEIGHT - diag_i - 1
 			col_i = 0
 		# if the diag starts on the top row
 		else:
 			row_i = 0
-			col_i = diag_i - Board.HEIGHT + 1
+			col_i = diag_i - self.HEIGHT + 1
 
 		# keep going SE until off the grid
-		while row_i < Board.HEIGHT and col_i < Board.WIDTH:
+		while row_i < self.HEIGHT and col_i < self.WIDTH:
 			yield self.state[row_i][col_i]
 			row_i += 1
 			col_i += 1
@@ -100,7 +212,7 @@ class Board:
 
 	def __copy__(self):
 		copied_state = [row.copy() for row in self.state]
-		return Board(copied_state)
+		return type(self)(copied_state)
 
 	def __eq__(self, other):
 		assert len(self.state) == len(other.state)
@@ -132,8 +244,265 @@ class Board:
 		return res
 
 
+def _winning_cells_plan(shifts, connect) -> tuple:
+	"""For every shift: the shifts of the runs of aligned bits to build, and for every place of the missing cell
+	in an alignment (how many of its bits are below it), the shift of the run below and the length of the run above."""
+	return tuple(
+		(shift, tuple(length * shift for length in range(1, connect - 1)),
+			tuple((before, before * shift, connect - 1 - before) for before in range(connect)))
+		for shift in shifts)
+
+
+class BitBoard(Board):
+	"""A board backed by one integer bitboard per piece and a column height array.
+
+	Bit (col * COL_BITS + h) of a piece's mask is set when that piece occupies height h
+	(counted from the bottom) of column col. Each column has one extra sentinel bit on
+	top, so shifting a mask never carries an alignment over to the next column.
+	The masks are python integers, so boards of any size fit in them."""
+	COL_BITS = Board.HEIGHT + 1
+	# shifts between two consecutive cells of a line: vertical, horizontal, down diag, up diag
+	SHIFTS = (1, COL_BITS, COL_BITS - 1, COL_BITS + 1)
+	# the runs of aligned bits are doubled in length until they reach CONNECT: 1 + 1 + 2 for 4
+	RUN_STEPS = (1, 2)
+	# the bottom cell of every column, and every cell of the board
+	BOTTOM_MASK = ((1 << (Board.WIDTH * COL_BITS)) - 1) // ((1 << COL_BITS) - 1)
+	BOARD_MASK = BOTTOM_MASK * ((1 << Board.HEIGHT) - 1)
+	WINNING_CELLS_PLAN = _winning_cells_plan(SHIFTS, Board.CONNECT)
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		# the layout depends on the size of the board
+		cls.COL_BITS = cls.HEIGHT + 1
+		cls.SHIFTS = (1, cls.COL_BITS, cls.COL_BITS - 1, cls.COL_BITS + 1)
+		steps = []
+		length = 1
+		while length < cls.CONNECT:
+			steps.append(min(length, cls.CONNECT - length))
+			length += steps[-1]
+		cls.RUN_STEPS = tuple(steps)
+		cls.BOTTOM_MASK = ((1 << (cls.WIDTH * cls.COL_BITS)) - 1) // ((1 << cls.COL_BITS) - 1)
+		cls.BOARD_MASK = cls.BOTTOM_MASK * ((1 << cls.HEIGHT) - 1)
+		cls.WINNING_CELLS_PLAN = _winning_cells_plan(cls.SHIFTS, cls.CONNECT)
+
+	def __init__(self, initial_state=None):
+		self.masks: dict[str, int] = {}
+		self.heights = [0] * self.WIDTH
+		# list of lists view of the board, built lazily and dropped on every insert
+		self._state = None
+		if initial_state:
+			self.state = initial_state
+
+	@property
+	def state(self):
+		"""A list of lists view of the board. It is rebuilt after every insert,
+		so it should be treated as read only."""
+		if self._state is None:
+			self._state = [[self.EMPTY for _ in range(self.WIDTH)] for _ in range(self.HEIGHT)]
+			for piece, mask in self.masks.items():
+				while mask:
+					low = mask & -mask
+					row, col = self.bit_to_coord(low.bit_length() - 1)
+					self._state[row][col] = piece
+					mask ^= low
+		return self._state
+
+	@state.setter
+	def state(self, state):
+		self.masks = {}
+		self.heights = [0] * self.WIDTH
+		self._state = None
+		# the rows are stored top to bottom, so read them in reverse to get the heights
+		for h, row in enumerate(reversed(state)):
+			for col, elem in enumerate(row):
+				if elem == self.EMPTY:
+					continue
+				self.masks[elem] = self.masks.get(elem, 0) | self.coord_to_bit(self.HEIGHT - 1 - h, col)
+				self.heights[col] = h + 1
+
+	@classmethod
+	def coord_to_bit(cls, row, col) -> int:
+		"""Return the single bit mask of the cell at (row, col)."""
+		return 1 << (col * cls.COL_BITS + cls.HEIGHT - 1 - row)
+
+	@classmethod
+	def bit_to_coord(cls, index) -> tuple[int, int]:
+		"""Return the (row, col) coordinates of the cell at the given bit index."""
+		col, h = divmod(index, cls.COL_BITS)
+		return cls.HEIGHT - 1 - h, col
+
+	@classmethod
+	def from_key(cls, key):
+		board = cls()
+		column_mask = (1 << cls.COL_BITS) - 1
+		first = second = 0
+		for col in range(cls.WIDTH):
+			height = (key >> (col * cls.COL_BITS) & column_mask).bit_length() - 1
+			board.heights[col] = height
+			occupied = ((1 << height) - 1) << (col * cls.COL_BITS)
+			first |= key & occupied
+			second |= ~key & occupied
+		board.masks = {Game.PLAYERS[0]: first, Game.PLAYERS[1]: second}
+		return board
+
+	def get_valid_columns(self):
+		"""Returns the indices of non-empty columns."""
+		for i in range(self.WIDTH):
+			if self.heights[i] < self.HEIGHT:
+				yield i
+
+	def insert_piece(self, column, piece) -> int:
+		"""Drop a piece in the given column and return the row it landed on."""
+		if column not in range(self.WIDTH):
+			raise ValueError("The column is invalid")
+
+		# if there is no more room in that column
+		height = self.heights[column]
+		if height == self.HEIGHT:
+			raise ValueError("The column is full")
+
+		self.masks[piece] = self.masks.get(piece, 0) | (1 << (column * self.COL_BITS + height))
+		self.heights[column] = height + 1
+		self._state = None
+		return self.HEIGHT - 1 - height
+
+	def remove_piece(self, column) -> int:
+		"""Take the top piece out of the given column and return the row it was on."""
+		if column not in range(self.WIDTH):
+			raise ValueError("The column is invalid")
+
+		height = self.heights[column] - 1
+		if height < 0:
+			raise ValueError("The column is empty")
+
+		bit = 1 << (column * self.COL_BITS + height)
+		for piece, mask in self.masks.items():
+			if mask & bit:
+				self.masks[piece] = mask ^ bit
+				break
+		self.heights[column] = height
+		self._state = None
+		return self.HEIGHT - 1 - height
+
+	@classmethod
+	def alignment_starts(cls, mask, shift) -> int:
+		"""Return the bits of the mask that start CONNECT aligned bits in the direction of the shift."""
+		for step in cls.RUN_STEPS:
+			mask &= mask >> (step * shift)
+		return mask
+
+	@classmethod
+	def has_alignment(cls, mask) -> bool:
+		"""Return True if the mask contains CONNECT aligned bits in any direction."""
+		for shift in cls.SHIFTS:
+			run = mask
+			for step in cls.RUN_STEPS:
+				run &= run >> (step * shift)
+			if run:
+				return True
+		return False
+
+	@classmethod
+	def winning_cells(cls, mask) -> int:
+		"""Return the bits that complete CONNECT aligned bits with the mask, some of them may be set or off the board."""
+		cells = 0
+		for shift, run_shifts, places in cls.WINNING_CELLS_PLAN:
+			# runs[k] has the bits that start k aligned bits of the mask, every bit starts 0 of them
+			runs = [-1, mask]
+			run = mask
+			for run_shift in run_shifts:
+				run &= mask >> run_shift
+				runs.append(run)
+			# a cell with `before` aligned bits right below it and `after` right above it
+			for before, before_shift, after in places:
+				cells |= runs[before] << before_shift & runs[after] >> shift
+		return cells
+
+	def winning_columns(self, piece) -> tuple[list[int], list[int]]:
+		occupied = sum(self.masks.values())
+		cells = self.winning_cells(self.masks.get(piece, 0)) & self.BOARD_MASK & ~occupied
+		# the cell each column is played in next
+		playable = (occupied + self.BOTTOM_MASK) & self.BOARD_MASK
+		columns = []
+		for mask in (cells & playable, cells & (playable << 1)):
+			found = []
+			while mask:
+				low = mask & -mask
+				found.append((low.bit_length() - 1) // self.COL_BITS)
+				mask ^= low
+			columns.append(found)
+		return columns[0], columns[1]
+
+	def get_alignment(self, piece) -> list[tuple]:
+		"""Return the coordinates of CONNECT aligned pieces of the given kind, or an empty list."""
+		mask = self.masks.get(piece, 0)
+		for shift in self.SHIFTS:
+			if starts := self.alignment_starts(mask, shift):
+				start = (starts & -starts).bit_length() - 1
+				return [self.bit_to_coord(start + j * shift) for j in range(self.CONNECT)]
+		return []
+
+	def count_pieces(self) -> int:
+		return sum(self.heights)
+
+	def get_key(self, mirror=False) -> int:
+		# the bit layout is the same as the one of the masks
+		key = self.masks.get(Game.PLAYERS[0], 0)
+		for col, height in enumerate(self.heights):
+			key |= 1 << (col * self.COL_BITS + height)
+		if mirror:
+			column_mask = (1 << self.COL_BITS) - 1
+			key = sum(
+				(key >> (col * self.COL_BITS) & column_mask) << ((self.WIDTH - 1 - col) * self.COL_BITS)
+				for col in range(self.WIDTH))
+		return key
+
+	def get_alignment_at(self, row, col, piece) -> list[tuple]:
+		mask = self.masks.get(piece, 0)
+		index = col * self.COL_BITS + self.HEIGHT - 1 - row
+		if not mask >> index & 1:
+			return []
+		for shift in self.SHIFTS:
+			# the sentinel bits are never set, so the walk stops at the edges of the board
+			start = index
+			while start - shift >= 0 and mask >> (start - shift) & 1:
+				start -= shift
+			end = index
+			while mask >> (end + shift) & 1:
+				end += shift
+			if end - start >= (self.CONNECT - 1) * shift:
+				return [self.bit_to_coord(start + j * shift) for j in range(self.CONNECT)]
+		return []
+
+	def __copy__(self):
+		copied = type(self)()
+		copied.masks = self.masks.copy()
+		copied.heights = self.heights.copy()
+		return copied
+
+	def __eq__(self, other):
+		if isinstance(other, BitBoard):
+			return self.heights == other.heights and \
+				{p: m for p, m in self.masks.items() if m} == {p: m for p, m in other.masks.items() if m}
+		return super().__eq__(other)
+
+
+def mirror_move(move, width=Board.WIDTH) -> int:
+	"""Return the column that mirrors the given one."""
+	return width - 1 - move
+
+
+def canonical_key(board) -> tuple[int, bool]:
+	"""Return the smallest key out of the position and its mirror image,
+	and whether that is the key of the mirror image."""
+	key, mirror_key = board.get_key(), board.get_key(mirror=True)
+	return (mirror_key, True) if mirror_key < key else (key, False)
+
+
 class Game:
 	PLAYERS = ['#', '+']
+	# when True, every incremental state update is cross-checked against a full scan of the board
+	validate_state = False
 
 	class GameState(Enum):
 		IN_PROGRESS = auto()
@@ -153,10 +522,17 @@ class Game:
 		# column that was last played
 		# (used by the algo to figure out how to move around the tree)
 		self.last_play: int | None = None
+		# the columns played since the initial board, in order, so they can be undone
+		self.moves: list[int] = []
 
-		# if the given board is a list, convert it to a board first
-		if isinstance(initial_board, list):
-			initial_board = Board(initial_board)
+		# if the given board is a list, convert it to a board of its size first
+		if isinstance(initial_board, list) and initial_board:
+			if len({len(row) for row in initial_board}) != 1:
+				raise ValueError("The rows of the board need to be the same length")
+			initial_board = Board.variant(len(initial_board[0]), len(initial_board))(initial_board)
+
+		# the coordinate of the 4 pieces in a row (used for graphics)
+		self.alignment = []
 
 		# if an initial board was given, set it and update the board state
 		self.board = initial_board or Board()
@@ -164,10 +540,20 @@ class Game:
 			self._update_board_state()
 		else:
 			self._state = self.GameState.IN_PROGRESS
-		# the coordinate of the 4 pieces in a row (used for graphics)
-		self.alignment = []
+		# how many pieces are on the board, a full board is a tie
+		self.move_count = self.board.count_pieces()
 		self.verbose = verbose
 
+	@classmethod
+	def from_record(cls, record, board_cls=BitBoard, *, verbose=False):
+		"""Build the game of a record: the columns played from the empty board, as a string of digits.
+		The moves are not replayed one by one, the state of the game is found with a single scan of the board."""
+		moves = [int(column) for column in record]
+		game = cls(initial_board=board_cls.from_moves(moves), verbose=verbose)
+		game.moves = moves
+		game.last_play = moves[-1] if moves else None
+		return game
+
 	def debug_print(self, *args, **kwargs):
 		if self.verbose:
 			print(*args, **kwargs)
@@ -194,15 +580,34 @@ class Game:
 
 	@staticmethod
 	def get_state_static(board):
+		"""Get the state of any board with a full scan. Prefer get_state_after_move when the last move is known."""
 		temp = Game(initial_board=board)
 		return temp.get_state()
 
+	@staticmethod
+	def get_state_after_move(board, row, col, player, move_count) -> tuple[GameState, list[tuple]]:
+		"""Get the state of a board that was in progress before the given player dropped a piece at (row, col).
+		:param move_count: how many pieces are on the board, including the one that was just played
+		:return: the new state and the alignment that ended the game, if any
+		"""
+		if alignment := board.get_alignment_at(row, col, Game.PLAYERS[player]):
+			state = Game.GameState.P1_WON if player == 0 else Game.GameState.P2_WON
+		elif move_count == board.WIDTH * board.HEIGHT:
+			state = Game.GameState.TIE
+		else:
+			state = Game.GameState.IN_PROGRESS
+
+		if Game.validate_state:
+			full_scan_state = Game.get_state_static(board)
+			assert state is full_scan_state, f"Incremental state {state} does not match full scan {full_scan_state}"
+		return state, alignment
+
 	def _update_board_state(self):
 		if alignment := self.get_4_in_row(0):
 			self._state = self.GameState.P1_WON
 		elif alignment := self.get_4_in_row(1):
 			self._state = self.GameState.P2_WON
-		elif not any(self.board.get_valid_columns()):
+		elif next(self.board.get_valid_columns(), None) is None:
 			self._state = self.GameState.TIE
 		else:
 			self._state = self.GameState.IN_PROGRESS
@@ -214,12 +619,16 @@ class Game:
 			self.debug_print('Game is over!')
 			return
 		try:
-			self.board.insert_piece(column, self.playing)
+			row = self.board.insert_piece(column, self.playing)
 		except ValueError as e:
 			self.debug_print("Error: ", e)
 		else:
+			# only the lines going through the new piece need to be checked
+			self.move_count += 1
+			self._state, self.alignment = self.get_state_after_move(
+				self.board, row, column, self.p_i, self.move_count)
 			self.switch_player()
-		self._update_board_state()
+			self.moves.append(column)
 
 		if self._state == self.GameState.P1_WON:
 			self.debug_print('P1 won')
@@ -230,6 +639,21 @@ class Game:
 
 		self.last_play = column
 
+	def undo(self) -> int:
+		"""Take back the last move and return its column."""
+		if not self.moves:
+			raise ValueError("There is no move to undo")
+
+		column = self.moves.pop()
+		self.board.remove_piece(column)
+		self.move_count -= 1
+		self.switch_player()
+		# moves are only played while the game is in progress
+		self._state = self.GameState.IN_PROGRESS
+		self.alignment = []
+		self.last_play = self.moves[-1] if self.moves else None
+		return column
+
 	def get_4_in_row(self, player: int) -> list[tuple]:
 		"""
 		Check if a player has won the game and get the coordinates of the alignment
@@ -237,43 +661,47 @@ class Game:
 		:return: a list of tuples representing the aligned pieces
 		"""
 
-		# we need to find the symbol 4 times in a row
+		# we need to find the symbol CONNECT times in a row
 		p_sym = self.PLAYERS[player]
-		to_find = p_sym * 4
+		if isinstance(self.board, BitBoard):
+			return self.board.get_alignment(p_sym)
+
+		height, connect = self.board.HEIGHT, self.board.CONNECT
+		to_find = p_sym * connect
 
 		# check rows
-		for row_i in range(self.board.HEIGHT):
+		for row_i in range(height):
 			row_s = ''.join(self.board.gen_row(row_i))
 			if (col_i := row_s.find(to_find)) >= 0:
-				return [(row_i, col_i + j) for j in range(4)]
+				return [(row_i, col_i + j) for j in range(connect)]
 
 		# check columns
 		for col_i in range(self.board.WIDTH):
 			col_s = ''.join(self.board.gen_col(col_i))
 			if (row_i := col_s.find(to_find)) >= 0:
-				return [(row_i + j, col_i) for j in range(4)]
+				return [(row_i + j, col_i) for j in range(connect)]
 
 		# check the positive slope diags
-		for up_diag_i in range(Board.HEIGHT + Board.WIDTH - 1):
+		for up_diag_i in range(height + self.board.WIDTH - 1):
 			up_diag_s = ''.join(self.board.gen_up_diag(up_diag_i))
 			if (i := up_diag_s.find(to_find)) >= 0:
 				# get the starting coordinates for the alignment
-				if up_diag_i < Board.HEIGHT:
+				if up_diag_i < height:
 					y, x = up_diag_i - i, i
 				else:
-					y, x = Board.HEIGHT - i - 1, up_diag_i - Board.HEIGHT + i + 1
-				return [(y - j, x + j) for j in range(4)]
+					y, x = height - i - 1, up_diag_i - height + i + 1
+				return [(y - j, x + j) for j in range(connect)]
 
 		# check the negative slope diags
-		for dn_diag_i in range(Board.HEIGHT + Board.WIDTH - 1):
+		for dn_diag_i in range(height + self.board.WIDTH - 1):
 			dn_diag_s = ''.join(self.board.gen_dn_diag(dn_diag_i))
 			if (i := dn_diag_s.find(to_find)) >= 0:
 				# get the starting coordinates for the alignment
-				if dn_diag_i < Board.HEIGHT:
-					y, x = Board.HEIGHT - dn_diag_i + i - 1, i
+				if dn_diag_i < height:
+					y, x = height - dn_diag_i + i - 1, i
 				else:
-					y, x = i, dn_diag_i - Board.HEIGHT + i + 1
-				return [(y + j, x + j) for j in range(4)]
+					y, x = i, dn_diag_i - height + i + 1
+				return [(y + j, x + j) for j in range(connect)]
 
 		return []
 
@@ -281,6 +709,14 @@ class Game:
 		return self.board.__str__(*args, **kwargs)
 
 
+def __getattr__(name):
+	# the classes of the other board sizes are created when they are first needed, like when they are unpickled
+	if match := re.fullmatch(r'(Board|BitBoard)_(\d+)x(\d+)_(\d+)', name):
+		base, width, height, connect = match.groups()
+		return globals()[base].variant(int(width), int(height), int(connect))
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == '__main__':
 	def main():
 		g = Game()
@@ -7,9 +7,6 @@ pygame.init()
 
 W, H = 800, 600
 
-NUM_ROW = 6
-NUM_COL = 7
-
 # leave a 5% margin on left and right
 HORIZ_MARGIN = 0.05
 MARGIN_WIDTH = W * HORIZ_MARGIN
@@ -43,9 +40,9 @@ def draw_grid(screen, n_rows, n_cols):
 		draw_horiz_line(screen, MARGIN_HEIGHT + (GRID_HEIGHT / n_rows) * i, min_x=MARGIN_WIDTH, max_x=W - MARGIN_WIDTH)
 
 
-def draw_piece(screen, row, col, color):
-	square_width = GRID_WIDTH / NUM_COL
-	square_height = GRID_HEIGHT / NUM_ROW
+def draw_piece(screen, board, row, col, color):
+	square_width = GRID_WIDTH / board.WIDTH
+	square_height = GRID_HEIGHT / board.HEIGHT
 	x = MARGIN_WIDTH + square_width * (col + 0.5)
 	y = MARGIN_HEIGHT + square_height * (row + 0.5)
 
@@ -74,10 +71,10 @@ def draw_pieces(screen, board, alignment, last_play_col):
 				color = P0_SPEC_COL if special else P0_COL
 			else:
 				color = P1_SPEC_COL if special else P1_COL
-			draw_piece(screen, row_i, col_i, color)
+			draw_piece(screen, board, row_i, col_i, color)
 
 
-def get_column_from_coord(x: int) -> int | None:
+def get_column_from_coord(x: int, n_cols: int) -> int | None:
 	"""Translate x coordinate from mouse click to a column on the board.
 	Returns None if the mouse was not on any column."""
 	if not MARGIN_WIDTH <= x <= W - MARGIN_WIDTH:
@@ -87,5 +84,5 @@ def get_column_from_coord(x: int) -> int | None:
 	ratio = (x - MARGIN_WIDTH) / GRID_WIDTH
 
 	# convert that ratio to a column
-	col = int(ratio * NUM_COL)
+	col = int(ratio * n_cols)
 	return col
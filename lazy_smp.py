@@ -0,0 +1,127 @@
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Event
+from multiprocessing.pool import Pool
+from queue import SimpleQueue
+
+from four_in_a_row import Board, mirror_move
+from min_max_tree import MinMaxTree, SearchContext, SearchTimeout
+from move_ordering import MoveOrdering
+from transposition_table import SharedTranspositionTable
+
+
+@dataclass
+class SMPTask:
+	"""The root every worker searches, along with what makes this worker's search different."""
+	board_cls: type
+	rows: list[str]  # the state of the root board, one string per row
+	playing: int
+	worker_i: int
+	max_depth: int  # how deep the children of the root are searched at most
+	time_left: float | None = None  # seconds before the search is aborted
+
+
+@dataclass
+class SMPResult:
+	depth: int = -1  # how deep the children of the root were searched in the deepest iteration that finished
+	scores: list[tuple[int, float]] = field(default_factory=list)  # (column, score) for every child of the root
+	nodes: int = 0
+
+
+# the search helpers of a worker process, the table is shared with every other worker
+_worker_ctx: SearchContext | None = None
+
+
+def _init_worker(tt, stop, strategies, width, pvs, threats):
+	global _worker_ctx
+	_worker_ctx = SearchContext(tt, MoveOrdering(strategies, width), stop=stop, pvs=pvs, threats=threats)
+
+
+def search_root(task: SMPTask) -> SMPResult:
+	"""Search the children of the root deeper and deeper, until max_depth, the deadline or the stop event."""
+	ctx = _worker_ctx
+	ctx.nodes = 0
+	deadline = time.perf_counter() + task.time_left if task.time_left is not None else None
+
+	tree = MinMaxTree(task.board_cls([list(row) for row in task.rows]), task.playing)
+	tree.generate_tree(1)
+	# every worker starts with a different child, so they fill the table with different lines
+	children = tree.safe_children() if ctx.threats else tree.folded_children()
+	shift = task.worker_i % len(children) if children else 0
+	children = children[shift:] + children[:shift]
+
+	result = SMPResult()
+	# every other worker skips the first iteration, so the workers are not all at the same depth
+	first_depth = min(task.worker_i % 2, task.max_depth)
+	for depth in range(first_depth, task.max_depth + 1):
+		# the first worker always finishes its first iteration so there is a move to play
+		ctx.deadline = None if task.worker_i == 0 and depth == first_depth else deadline
+		for child in children:
+			child.node.score = None
+		try:
+			scores = [(child.node.delta, score) for score, child in tree.score_children(ctx, depth, children)]
+		except SearchTimeout:
+			break
+		if tree.symmetric:
+			# the mirrored moves have the same scores
+			width = task.board_cls.WIDTH
+			scores += [(mirror_move(col, width), score) for col, score in scores if mirror_move(col, width) != col]
+		result.depth = depth
+		result.scores = sorted(scores)
+
+	result.nodes = ctx.nodes
+	return result
+
+
+class LazySMP:
+	"""Search the same root in several processes sharing one transposition table.
+
+	Every worker runs its own iterative deepening with a different root order and starting depth.
+	What one worker stores in the table speeds up the others, so the search scales past the
+	7 children of the root. The result of the deepest search that finished is used."""
+
+	def __init__(
+			self, n_workers: int, tt_entries: int = 2 ** 20, strategies=(), width=Board.WIDTH, pvs=True, threats=True):
+		self.n_workers = n_workers
+		self.tt = SharedTranspositionTable(tt_entries)
+		# set to make the workers give up their current iteration
+		self.stop = Event()
+		self.pool = Pool(n_workers, initializer=_init_worker, initargs=(self.tt, self.stop, strategies, width, pvs, threats))
+
+	def search(self, board, playing, max_depth, deadline=None) -> SMPResult:
+		"""Search the children of the root max_depth plies deep, or as deep as possible before the deadline.
+		:param deadline: time.perf_counter() value after which the workers stop
+		"""
+		self.stop.clear()
+		self.tt.new_search()
+		time_left = deadline - time.perf_counter() if deadline is not None else None
+		rows = [''.join(row) for row in board]
+
+		done = SimpleQueue()
+		for worker_i in range(self.n_workers):
+			task = SMPTask(type(board), rows, playing, worker_i, max_depth, time_left)
+			self.pool.apply_async(search_root, (task,), callback=done.put, error_callback=done.put)
+
+		results = []
+		error = None
+		for _ in range(self.n_workers):
+			result = done.get()
+			if isinstance(result, BaseException):
+				error = result
+				self.stop.set()
+				continue
+			# once a worker reaches the full depth, the others are not needed anymore
+			if result.depth == max_depth:
+				self.stop.set()
+			results.append(result)
+		# every task has returned at this point, so none of them is left running with the stop event set
+		if error is not None:
+			raise error
+
+		best = max(results, key=lambda result: result.depth)
+		return SMPResult(best.depth, best.scores, sum(result.nodes for result in results))
+
+	def close(self):
+		self.pool.close()
+		self.pool.join()
+		self.tt.close()
@@ -1,10 +1,13 @@
+import sys
+
 import pygame
 from pygame.color import THECOLORS
 from pygame.locals import *
 
+from background_engine import BackgroundEngine
 from fiar_min_max import FIARMinMax
 from four_in_a_row import Game
-from gui import get_column_from_coord, draw_grid, draw_pieces, W, H, NUM_ROW, NUM_COL
+from gui import get_column_from_coord, draw_grid, draw_pieces, W, H
 
 pygame.init()
 
@@ -24,43 +27,56 @@ def main():
 	]
 	game = Game(verbose=True)
 	fiar_mm = FIARMinMax(game, max_depth=5, plays=1, verbose=True, mt=False)
+	# the engine searches in the background, and ponders while the human thinks.
+	# the search thread hands the GIL back more often, so the window keeps rendering smoothly
+	sys.setswitchinterval(0.001)
+	engine = BackgroundEngine(fiar_mm)
+	algo_player_sym = Game.PLAYERS[fiar_mm.plays]
 
 	running = True
 	while running:
 		screen.fill(THECOLORS['black'])
 
+		# the human can only play while the engine is not searching its move
+		human_turn = game.playing != algo_player_sym and not engine.thinking
 		for event in pygame.event.get():
 			if event.type == QUIT:
 				running = False
 			elif event.type == MOUSEBUTTONDOWN:
 				x, y = event.pos
-				col = get_column_from_coord(x)
-				if col is not None:
+				col = get_column_from_coord(x, game.board.WIDTH)
+				if col is not None and human_turn:
 					game.play(col)
 			elif event.type == KEYDOWN:
 				# reset
 				if event.key == K_r:
+					engine.close()
 					game.__init__()
 					fiar_mm.__init__(
 						game, max_depth=fiar_mm.max_depth,
 						plays=fiar_mm.plays, verbose=fiar_mm.verbose, mt=fiar_mm.mt)
+					engine = BackgroundEngine(fiar_mm)
 
 				# column input
-				elif event.unicode in [str(i) for i in range(NUM_COL)]:
+				elif event.unicode in [str(i) for i in range(game.board.WIDTH)] and human_turn:
 					col = int(event.unicode)
 					game.play(col)
 
 		draw_pieces(screen, game.board, game.alignment, game.last_play)
-		draw_grid(screen, NUM_ROW, NUM_COL)
+		draw_grid(screen, game.board.HEIGHT, game.board.WIDTH)
 		pygame.display.update()
 
-		algo_player_sym = Game.PLAYERS[fiar_mm.plays]
-		if game.playing == algo_player_sym and not game.over:
-			col = fiar_mm.get_best_play()
+		if game.playing == algo_player_sym and not game.over and not engine.thinking:
+			engine.request_move()
+		if (col := engine.poll()) is not None:
 			game.play(col)
+			if not game.over:
+				engine.start_pondering()
 
 		clock.tick(30)
 
+	engine.close()
+
 
 def bot_vs_bot():
 	screen = pygame.display.set_mode((W, H))
@@ -80,7 +96,7 @@ def bot_vs_bot():
 				running = False
 
 		draw_pieces(screen, game.board, game.alignment, game.last_play)
-		draw_grid(screen, NUM_ROW, NUM_COL)
+		draw_grid(screen, game.board.HEIGHT, game.board.WIDTH)
 		pygame.display.update()
 
 		fiar = fiar_mm0 if game.playing == Game.PLAYERS[fiar_mm0.plays] else fiar_mm1
@@ -90,6 +106,9 @@ def bot_vs_bot():
 
 		clock.tick(1)
 
+	fiar_mm0.close()
+	fiar_mm1.close()
+
 
 if __name__ == '__main__':
 	main()
@@ -1,91 +1,414 @@
+import time
 from dataclasses import dataclass
+from multiprocessing.synchronize import Event
 
-from four_in_a_row import Board, Game
+from four_in_a_row import BitBoard, Board, Game, mirror_move
+from move_ordering import MoveOrdering
+from search_stats import SearchCounters
+from transposition_table import Bound, TranspositionTable, zobrist_hash, zobrist_keys
+from winning_windows import WindowCounts
 
+# a won position scores WIN_SCORE minus how many pieces are on the board, so the sooner a win the higher it scores
+# and the loser prefers the longest loss. the static evaluation of the other positions is at most CONNECT
+WIN_SCORE = 1000
 
-@dataclass
+
+@dataclass(slots=True)
 class Node:
-	"""A node is a block of data used in trees"""
-	board: Board
+	"""A node is a block of data used in trees.
+	Only roots keep a board, the other nodes rebuild theirs from their parent when it is asked for."""
+	_board: Board | None
 	game_state: Game.GameState
 	delta: int  # the move that resulted in the current board
 	playing: int  # who's turn is it to play
 	score: int | None = None  # the minmax score associated with the board
-	alpha = beta = None  # these will get initiated when calculating the score
+	# the best child found by the last search of the node, searched first by the next one
+	best_move: int | None = None
+	parent: 'Node | None' = None
 
 	@property
 	def maximizing(self):
 		# the convention is that P1 maximizes while P2 minimizes
 		return self.playing == 0
 
+	@property
+	def board(self) -> Board:
+		"""The board of the node. Unless the node is a root, it is a new copy every time."""
+		if self._board is not None:
+			return self._board
+		board = self.parent.board.__copy__()
+		board.insert_piece(self.delta, Game.PLAYERS[self.parent.playing])
+		return board
 
-class MinMaxTree:
-	"""A tree is recursively defined as being a block of data (a node) along with
-	a list of trees (subtrees)."""
+	def make_root(self):
+		"""Give the node a board of its own and forget its parent, so the rest of the tree can be freed."""
+		self._board = self.board
+		self.parent = None
+
+
+class SearchTimeout(Exception):
+	"""Raised inside the search when the deadline of the context has passed."""
+
+
+@dataclass
+class SearchContext:
+	"""The helpers shared by every node of a search."""
+	tt: TranspositionTable | None = None
+	ordering: MoveOrdering | None = None
+	deadline: float | None = None  # time.perf_counter() value after which the search is aborted
+	nodes: int = 0  # how many nodes were searched
+	# piece counts of the winning windows for the board of the node being searched
+	windows: WindowCounts | None = None
+	# an event other processes can set to abort the search, like the deadline
+	stop: Event | None = None
+	# detailed counts of the search, None skips counting
+	counters: SearchCounters | None = None
+	# how many columns the board of the search has, which mirrored moves depend on
+	width: int = Board.WIDTH
+	# search every child after the first with a null window, see MinMaxTree.minimax
+	pvs: bool = True
+	# only search the moves that answer the immediate threats, see MinMaxTree.minimax
+	threats: bool = True
+
+	# how many nodes are searched between two checks of the deadline
+	DEADLINE_CHECK_INTERVAL = 1024
+
+	def count_node(self):
+		self.nodes += 1
+		if self.nodes % self.DEADLINE_CHECK_INTERVAL == 0 and (
+				(self.deadline is not None and time.perf_counter() > self.deadline)
+				or (self.stop is not None and self.stop.is_set())):
+			raise SearchTimeout()
 
-	def __init__(self, board, playing: int, *, delta=None):
-		game_state = Game.get_state_static(board)
-		self.node = Node(board, game_state, delta, playing)
 
-		# used to make more distant results less valuable than closer ones.
-		# this forces the algo to win in the fastest way possible and lose in the longest way
-		self.damping_factor = 0.9
+class MinMaxTree:
+	"""A tree is recursively defined as being a block of data (a node) along with
+	a list of trees (subtrees).
+
+	The tree is generated and searched by playing and undoing the moves on the board of the root,
+	so the nodes below it do not need a board of their own."""
+	__slots__ = ('node', 'row', 'move_count', 'key', 'mirror_key', 'depth', 'children')
+
+	def __init__(
+			self, board, playing: int, *, delta=None, row=None, game_state=None, move_count=None, key=None,
+			mirror_key=None, parent: Node | None = None):
+		# the root needs a full scan, children get their state from the move that created them
+		if game_state is None:
+			game_state = Game.get_state_static(board)
+		self.node = Node(board, game_state, delta, playing, parent=parent)
+		# the row the last piece landed on
+		self.row = row
+		self.move_count = board.count_pieces() if move_count is None else move_count
+		# zobrist hash of the board, used to find transpositions
+		self.key = zobrist_hash(board) if key is None else key
+		# and of its mirror image, the transposition table keys the position by the smaller one
+		self.mirror_key = zobrist_hash(board, mirror=True) if mirror_key is None else mirror_key
+		# how many plies of the tree exist below this node
+		self.depth = 0
 
 		# the children will be generated later
 		# TODO: should it actually??
 		self.children: list[MinMaxTree] = []
 
+	@property
+	def symmetric(self) -> bool:
+		"""Whether the position is its own mirror image (its hashes are then the same).
+		Mirrored moves have the same score, so only one of each pair needs to be searched."""
+		return self.key == self.mirror_key
+
+	def canonical_hash(self) -> tuple[int, bool]:
+		"""Return the smaller hash out of the position and its mirror image, and whether it is the mirror's."""
+		return (self.mirror_key, True) if self.mirror_key < self.key else (self.key, False)
+
+	def folded_children(self, width=None) -> list['MinMaxTree']:
+		"""The children to search: one of each pair of mirrored moves if the position is symmetric, all of them otherwise.
+		:param width: how many columns the board has, read from the board of the node by default
+		"""
+		if not self.symmetric:
+			return self.children
+		width = self.node.board.WIDTH if width is None else width
+		return [child for child in self.children if child.node.delta <= mirror_move(child.node.delta, width)]
+
+	def safe_children(self, board=None) -> list['MinMaxTree']:
+		"""The folded children that answer the immediate threats, like minimax does: only the wins if the player
+		can win right away, otherwise only the blocks if the opponent can, otherwise the moves that do not play
+		right under a cell the opponent wins in, unless every move does. The opponent would win right after them.
+		:param board: the board of this node, if it is known
+		"""
+		board = self.node.board if board is None else board
+		children = self.folded_children(board.WIDTH)
+		wins, _ = board.winning_columns(Game.PLAYERS[self.node.playing])
+		if wins:
+			return [child for child in children if child.node.delta in wins] or children
+		blocks, unsafe = board.winning_columns(Game.PLAYERS[(self.node.playing + 1) % 2])
+		if blocks:
+			return [child for child in children if child.node.delta in blocks] or children
+		return [child for child in children if child.node.delta not in unsafe] or children
+
 	def child_already_exists(self, col):
 		return any(filter(lambda child: child.node.delta == col, self.children))
 
-	def generate_tree(self, depth):
+	def make_child(self, col, board=None):
+		"""Return the tree of the board after the player plays in the given column.
+		:param board: the board of this node. The move is played on it and undone, and the child
+		rebuilds its board from this node when needed. By default, the child gets a copy of its own
+		"""
+		if board is None:
+			new_board = self.node.board.__copy__()
+			row = new_board.insert_piece(col, Game.PLAYERS[self.node.playing])
+			child = self._child_after(new_board, row, col)
+			child.node.make_root()
+			return child
+
+		row = board.insert_piece(col, Game.PLAYERS[self.node.playing])
+		try:
+			return self._child_after(board, row, col)
+		finally:
+			board.remove_piece(col)
+
+	def _child_after(self, board, row, col):
+		"""Return the child for the move that was just played on the board of this node, without a board."""
+		game_state, _ = Game.get_state_after_move(board, row, col, self.node.playing, self.move_count + 1)
+		keys = zobrist_keys(board.WIDTH, board.HEIGHT)[self.node.playing][row]
+		return MinMaxTree(
+			None, (self.node.playing + 1) % 2, delta=col, row=row, game_state=game_state,
+			move_count=self.move_count + 1, key=self.key ^ keys[col],
+			mirror_key=self.mirror_key ^ keys[mirror_move(col, board.WIDTH)], parent=self.node)
+
+	def gen_children(self):
+		"""Yield every child without storing them in the tree."""
+		for col in self.node.board.get_valid_columns():
+			yield self.make_child(col)
+
+	def generate_tree(self, depth, board=None, stop: Event | None = None):
 		"""Makes sure the tree is the right depth,
-		needs to be called every time the tree is moved to one of its children."""
+		needs to be called every time the tree is moved to one of its children.
+		Only the missing plies are generated, and the best moves of the last search are kept.
+		:param board: the board of this node, the moves are played and undone on it while generating
+		:param stop: raises SearchTimeout once it is set. The tree is then only partly generated,
+		the next call generates the rest
+		"""
+
+		# reset the score so it gets recalculated, the deeper tree gives a different one
+		self.node.score = None
 
 		# if the tree is already deep enough or the node is a leaf
 		if depth <= 0 or self.node.game_state is not Game.GameState.IN_PROGRESS:
 			return
-
-		# reset the score so it gets recalculated
-		self.node.score = None
-
-		# make sure every direct child exists
-		for col in self.node.board.get_valid_columns():
-			if self.child_already_exists(col):
-				continue
-			new_board = self.node.board.__copy__()
-			new_board.insert_piece(col, Game.PLAYERS[self.node.playing])
-			new_player = (self.node.playing + 1) % 2
-			child = MinMaxTree(new_board, new_player, delta=col)
-			self.children.append(child)
-
-		# call the method recursively for every child
-		for child in self.children:
-			child.generate_tree(depth - 1)
-
-	def get_score(self):
-		# if the score hasn't been calculated yet
-		if self.node.score is None:
-			self.node.score = self.minimax(alpha=-float('inf'), beta=float('inf'))
-		return self.node.score
-
-	def minimax(self, alpha, beta) -> float:
-		"""https://www.geeksforgeeks.org/minimax-algorithm-in-game-theory-set-4-alpha-beta-pruning/."""
+		self.depth = max(self.depth, depth)
+		if board is None:
+			board = self.node.board
+
+		# make sure every direct child exists, and call the method recursively for every child
+		existing = {child.node.delta for child in self.children}
+		for col in list(board.get_valid_columns()):
+			if col not in existing:
+				self.children.append(self.make_child(col, board))
+		piece = Game.PLAYERS[self.node.playing]
+		# the mirrored children of a symmetric position are never searched, they are only kept to be played
+		for child in self.folded_children(board.WIDTH):
+			# the last ply is not checked, it is quick to generate
+			if stop is not None and depth > 1 and stop.is_set():
+				raise SearchTimeout()
+			board.insert_piece(child.node.delta, piece)
+			try:
+				child.generate_tree(depth - 1, board, stop)
+			finally:
+				board.remove_piece(child.node.delta)
+
+	def get_score(self, ctx: SearchContext | None = None, depth: int | None = None, alpha=-float('inf'), beta=float('inf')):
+		"""Return the score of the node, searching it if it is not known yet.
+		A score outside of the (alpha, beta) window only bounds the real score, and is not kept in the node."""
+		if self.node.score is not None:
+			return self.node.score
+		ctx = ctx or SearchContext()
+		board = self.node.board
+		if not isinstance(board, BitBoard):
+			# the search plays on a copy, the threats are much faster to find on a bit board
+			board = BitBoard.variant(board.WIDTH, board.HEIGHT, board.CONNECT)(board.state)
+		# the window counts are then updated along the search instead of scanning every leaf
+		ctx.windows = WindowCounts(board)
+		ctx.width = board.WIDTH
+		score = self.minimax(alpha=alpha, beta=beta, ctx=ctx, depth=depth, board=board)
+		if alpha < score < beta:
+			self.node.score = score
+		return score
+
+	def score_children(
+			self, ctx: SearchContext | None = None, depth: int | None = None, children=None, guess=None,
+			aspiration=None) -> list[tuple[int, 'MinMaxTree']]:
+		"""Score the children in order (the folded ones by default) and return the (score, child) pairs.
+
+		The best score is exact, and so is the score of every child tied with it, so that any of them can be played.
+		With PVS (see SearchContext), the other children are only searched until they are known to be worse,
+		and their score bounds the real one. The first child is searched with a window of aspiration around
+		the guess, the score of the previous search, if both are given, and with the full window if it falls outside."""
+		ctx = ctx or SearchContext()
+		children = self.folded_children() if children is None else children
+		better = max if self.node.maximizing else min
+		scores = []
+		best_score = None
+		for child in children:
+			if best_score is None:
+				score = None
+				if guess is not None and aspiration is not None:
+					score = child.get_score(ctx, depth, guess - aspiration, guess + aspiration)
+					if not guess - aspiration < score < guess + aspiration:
+						score = None
+				if score is None:
+					score = child.get_score(ctx, depth)
+			elif ctx.pvs:
+				# the window only holds the best score: a worse child fails low, a tied one is exact
+				score = child.get_score(ctx, depth, best_score - 1, best_score + 1)
+				if score != best_score and better(score, best_score) == score:
+					# better than the best, the real score is only known with the window on that side of it
+					alpha, beta = (best_score, float('inf')) if self.node.maximizing else (-float('inf'), best_score)
+					score = child.get_score(ctx, depth, alpha, beta)
+			else:
+				score = child.get_score(ctx, depth)
+			best_score = score if best_score is None else better(best_score, score)
+			scores.append((score, child))
+		return scores
+
+	def minimax(
+			self, alpha, beta, ctx: SearchContext | None = None, depth: int | None = None, board=None) -> int:
+		"""https://www.geeksforgeeks.org/minimax-algorithm-in-game-theory-set-4-alpha-beta-pruning/.
+		The search fails soft: a score outside of the (alpha, beta) window is a bound of the real score.
+
+		If the context has a transposition table, it is probed before looking at the children
+		and updated with the result of the search. If it has a move ordering, the children are
+		searched in the order it gives.
+
+		If a depth is given, the stored children are ignored. The children are generated while
+		searching and dropped as soon as they are scored, so only the current line of play is in memory.
+		Their moves are played and undone on the board of this node, which can be passed if it is known.
+
+		Unless the threats of the context are off, the immediate threats are looked for before the children.
+		A node whose player can win right away scores that win without searching. Otherwise, when the opponent
+		can win right away only the moves that block them are searched, and the moves that play right under
+		a cell the opponent wins in are left out unless every move does. They could only lose faster.
+
+		With PVS (principal variation search), only the first child is searched with the full window.
+		The ordering should put the best move first, so the other children are searched with a null window
+		that only tells whether they are better, which prunes more. The scores are integers so the
+		null window (alpha, alpha + 1) holds no score, and a child that turns out better is searched again.
+
+		Raises SearchTimeout if the deadline of the context passes during the search."""
+		ctx = ctx or SearchContext()
+		ctx.count_node()
+		counters = ctx.counters
+		if counters is not None:
+			counters.searched[self.move_count - counters.root_move_count] += 1
+		tt = ctx.tt
+		lazy = depth is not None
+		if not lazy:
+			depth = self.depth
+
+		# the same position (or its mirror image) may already have been searched through another move order.
+		# a position and its mirror image share their entry, whose best move is the one of the smaller key
+		hash_move = None
+		if tt is not None:
+			tt_key, mirrored = self.canonical_hash()
+			if (entry := tt.probe(tt_key)) is not None:
+				if entry.depth >= depth and (
+						entry.bound is Bound.EXACT
+						or (entry.bound is Bound.LOWER and entry.score >= beta)
+						or (entry.bound is Bound.UPPER and entry.score <= alpha)):
+					return entry.score
+				hash_move = entry.best_move
+				if mirrored and hash_move is not None:
+					hash_move = mirror_move(hash_move, ctx.width)
+		if hash_move is None:
+			hash_move = self.node.best_move
 
 		# if the node is a leaf, perform a static evaluation
-		if not self.children:
-			return self._static_eval()
-
-		# TODO: find a way to arrange children by order of likeliness to be good
+		if (depth <= 0 or self.node.game_state is not Game.GameState.IN_PROGRESS) if lazy else not self.children:
+			# the leaves of a stored tree may have been evaluated in a batch already
+			if not lazy and self.node.score is not None:
+				value = self.node.score
+			elif counters is None:
+				value = self._static_eval(ctx.windows)
+			else:
+				start = time.perf_counter()
+				value = self._static_eval(ctx.windows)
+				counters.static_eval_time += time.perf_counter() - start
+				counters.static_evals += 1
+			if tt is not None:
+				tt.store(tt_key, 0, value, Bound.EXACT)
+			return value
+
+		# arrange children by order of likeliness to be good
+		if board is None:
+			board = self.node.board
+		if lazy:
+			moves = list(board.get_valid_columns())
+		else:
+			children = {child.node.delta: child for child in self.children}
+			moves = list(children)
+		if ctx.threats:
+			piece, other = Game.PLAYERS[self.node.playing], Game.PLAYERS[(self.node.playing + 1) % 2]
+			wins, _ = board.winning_columns(piece)
+			if wins:
+				score = WIN_SCORE - self.move_count - 1
+				score = score if self.node.maximizing else -score
+				if not lazy:
+					self.node.best_move = wins[0]
+				if tt is not None:
+					tt.store(tt_key, depth, score, Bound.EXACT, mirror_move(wins[0], ctx.width) if mirrored else wins[0])
+				return score
+			blocks, unsafe = board.winning_columns(other)
+			if blocks:
+				# with more than one, every move loses
+				moves = [move for move in moves if move in blocks] or moves
+			elif unsafe:
+				moves = [move for move in moves if move not in unsafe] or moves
+		if self.key == self.mirror_key:
+			# mirrored moves have the same score
+			moves = [move for move in moves if move <= mirror_move(move, ctx.width)]
+			if hash_move is not None:
+				hash_move = min(hash_move, mirror_move(hash_move, ctx.width))
+		if ctx.ordering is not None:
+			ordered = ctx.ordering.order(moves, self.move_count, self.node.playing, hash_move)
+		else:
+			ordered = [(move, 'none') for move in moves]
 
 		# if not perform a dynamic evaluation
 		best, worse = (max, min) if self.node.maximizing else (min, max)
+		alpha_orig, beta_orig = alpha, beta
 
 		best_val = worse(-float('inf'), float('inf'))
-		for child in self.children:
-			value = child.minimax(alpha, beta)
-			child.node.score = value
-
+		best_move = None
+		# a stored tree is searched as deep as it goes
+		child_depth = depth - 1 if lazy else None
+		for i, (move, source) in enumerate(ordered):
+			# the moves are played on the board, which the threats are found on
+			row = board.insert_piece(move, Game.PLAYERS[self.node.playing])
+			if lazy:
+				child = self._child_after(board, row, move)
+				if counters is not None:
+					counters.generated[child.move_count - counters.root_move_count] += 1
+			else:
+				child = children[move]
+			if ctx.windows is not None:
+				ctx.windows.place(child.row, move, self.node.playing)
+			try:
+				if i == 0 or not ctx.pvs or beta - alpha <= 1:
+					value = child.minimax(alpha, beta, ctx, child_depth, board)
+				else:
+					null_alpha, null_beta = (alpha, alpha + 1) if self.node.maximizing else (beta - 1, beta)
+					value = child.minimax(null_alpha, null_beta, ctx, child_depth, board)
+					if alpha < value < beta:
+						value = child.minimax(alpha, beta, ctx, child_depth, board)
+			finally:
+				if ctx.windows is not None:
+					ctx.windows.remove(child.row, move, self.node.playing)
+				board.remove_piece(move)
+			# the score of a leaf of a stored tree is its static evaluation, which the table may not have returned
+			if lazy or child.children:
+				child.node.score = value
+
+			if best_move is None or best(best_val, value) != best_val:
+				best_move = move
 			best_val = best(best_val, value)
 			# if maximizing, update alpha
 			if self.node.maximizing:
@@ -95,44 +418,61 @@ class MinMaxTree:
 				beta = best(beta, best_val)
 			# check if we can prune the branch
 			if beta <= alpha:
+				if ctx.ordering is not None:
+					ctx.ordering.record_cutoff(move, i, self.move_count, self.node.playing, depth, source)
 				break
 
-		return best_val * self.damping_factor
-
-	def _static_eval(self) -> int:
-		"""Let _score(p) be the length of the longest chain of player p that can still be expanded to 4.
-		The static score of a board is defined as _score(P1) - _score(P2)."""
+		score = best_val
+		if not lazy:
+			self.node.best_move = best_move
+		if tt is not None:
+			# a value outside the original window only bounds the real score
+			if best_val <= alpha_orig:
+				bound = Bound.UPPER
+			elif best_val >= beta_orig:
+				bound = Bound.LOWER
+			else:
+				bound = Bound.EXACT
+			tt.store(tt_key, depth, score, bound, mirror_move(best_move, ctx.width) if mirrored else best_move)
+		return score
+
+	def _static_eval(self, windows: WindowCounts | None = None) -> int:
+		"""Let _score(p) be the length of the longest chain of player p that can still be expanded to CONNECT.
+		The static score of a board is defined as _score(P1) - _score(P2), and a win scores WIN_SCORE - move_count.
+		If the window counts of the board are given, the scores are read from them instead."""
 		# if the state is decisive, the score is obvious
 		if self.node.game_state is Game.GameState.P1_WON:
-			return 5
+			return WIN_SCORE - self.move_count
 		elif self.node.game_state is Game.GameState.P2_WON:
-			return -5
+			return self.move_count - WIN_SCORE
 		elif self.node.game_state is Game.GameState.TIE:
 			return 0
 		# otherwise calculate the score with the proposed algo
+		if windows is not None:
+			return windows.score(0) - windows.score(1)
 		return self._score(player=0) - self._score(player=1)
 
 	@staticmethod
-	def _analyze_line(line: list, player) -> int:
-		"""Return 4 - (the minimum number of pieces the player has to add to the line
-		in order to get a 4 in a row on that line). If there is not enough space to get a 4
-		in a row, return 0"""
+	def _analyze_line(line: list, player, connect=Board.CONNECT) -> int:
+		"""Return connect - (the minimum number of pieces the player has to add to the line
+		in order to get a connect in a row on that line). If there is not enough space to get a
+		connect in a row, return 0"""
 
-		# if making a 4 in a row is impossible, return immediately
-		if len(line) < 4 or line.count(Board.EMPTY) + line.count(Game.PLAYERS[player]) < 4:
+		# if making a connect in a row is impossible, return immediately
+		if len(line) < connect or line.count(Board.EMPTY) + line.count(Game.PLAYERS[player]) < connect:
 			return 0
 
 		# split the line on every opponent piece and treat each segment independently
 		other_player = Game.PLAYERS[(player + 1) % 2]
 		if line.count(other_player):  # if the line can be split
 			segments = [list(seg) for seg in "".join(line).split(other_player)]
-			results = (MinMaxTree._analyze_line(seg, player) for seg in segments)
+			results = (MinMaxTree._analyze_line(seg, player, connect) for seg in segments)
 			return max(results)
 
-		# at this point, the line only contains empty or player pieces, and it is possible to get a line of 4
+		# at this point, the line only contains empty or player pieces, and it is possible to get a line of connect
 		counts = []
 
-		left = 4  # how many slots left before it is not possible to make a 4 in a row
+		left = connect  # how many slots left before it is not possible to make a connect in a row
 		count = 0  # how long the chain is
 		started: None | int = None  # index of where the chain starts, None if it didn't start yet
 
@@ -144,7 +484,7 @@ class MinMaxTree:
 				# start the chain
 				if sym == Game.PLAYERS[player]:
 					started = i
-			if started:
+			if started is not None:
 				if sym == Game.PLAYERS[player]:
 					# add one piece to the chain
 					left -= 1
@@ -157,7 +497,7 @@ class MinMaxTree:
 					counts.append(count)
 					i = started + 1
 					count = 0
-					left = 4
+					left = connect
 					started = None
 
 			i += 1
@@ -171,7 +511,8 @@ class MinMaxTree:
 		Return the length of the longest chain in the board for the given player.
 		"""
 
-		chain_lengths = (self._analyze_line(list(line), player) for line in self.node.board.gen_all_lines())
+		board = self.node.board
+		chain_lengths = (self._analyze_line(list(line), player, board.CONNECT) for line in board.gen_all_lines())
 		return max(chain_lengths)
 
 	def __repr__(self):
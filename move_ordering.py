@@ -0,0 +1,97 @@
+from collections import Counter
+from enum import Enum
+from functools import cache
+
+from four_in_a_row import Board, Game
+
+
+class Strategy(Enum):
+	"""The ways minimax can pick which child to search first."""
+	HASH_MOVE = 'hash'  # best move stored in the transposition table (previous search or iteration)
+	KILLER = 'killer'  # moves that caused a cutoff in another node of the same ply
+	HISTORY = 'history'  # moves that caused cutoffs anywhere in the search, weighted by depth
+	CENTER = 'center'  # static order, central columns take part in more alignments
+
+
+@cache
+def center_order(width) -> tuple[int, ...]:
+	"""The columns of a board of that width, central columns first."""
+	return tuple(sorted(range(width), key=lambda col: abs(col - (width - 1) / 2)))
+
+
+class MoveOrdering:
+	"""Sorts the moves of a node by how likely they are to be good, so alpha-beta prunes as early as possible.
+	Also keeps statistics about the cutoffs, per strategy that brought the cutting move to the front."""
+	KILLERS_PER_PLY = 2
+
+	def __init__(self, strategies=tuple(Strategy), width=Board.WIDTH):
+		""":param width: how many columns the boards have"""
+		self.strategies = {Strategy(strategy) for strategy in strategies}
+		self.center_order = center_order(width)
+
+		# killer moves for every ply (number of pieces on the board)
+		self.killers: dict[int, list[int]] = {}
+		# how often each move of each player caused a cutoff
+		self.history = [[0] * width for _ in Game.PLAYERS]
+
+		# statistics
+		self.nodes = 0  # interior nodes searched
+		self.cutoffs = 0
+		self.first_move_cutoffs = 0  # cutoffs caused by the first child searched
+		self.cutoffs_by_source: Counter[str] = Counter()
+
+	def order(self, moves, ply, playing, hash_move=None) -> list[tuple[int, str]]:
+		"""Return the given moves from the most to the least promising,
+		along with the name of the strategy that placed each of them."""
+		self.nodes += 1
+		ordered = [(move, 'none') for move in moves]
+		if Strategy.CENTER in self.strategies:
+			ordered = sorted(((move, Strategy.CENTER.value) for move, _ in ordered), key=lambda pair: self.center_order.index(pair[0]))
+		if Strategy.HISTORY in self.strategies:
+			# the sort is stable, so moves that never caused a cutoff keep the previous order
+			history = self.history[playing]
+			ordered = sorted(
+				((move, Strategy.HISTORY.value if history[move] else source) for move, source in ordered),
+				key=lambda pair: -history[pair[0]])
+
+		# the promoted moves are put in front, the most trusted last
+		promoted = []
+		if Strategy.HASH_MOVE in self.strategies and hash_move is not None:
+			promoted.append((hash_move, Strategy.HASH_MOVE.value))
+		if Strategy.KILLER in self.strategies:
+			promoted += [(killer, Strategy.KILLER.value) for killer in self.killers.get(ply, [])]
+		for move, source in reversed(promoted):
+			for i, (other, _) in enumerate(ordered):
+				if other == move:
+					del ordered[i]
+					ordered.insert(0, (move, source))
+					break
+		return ordered
+
+	def record_cutoff(self, move, index, ply, playing, depth, source='none'):
+		"""Remember a move that caused a beta cutoff.
+		:param index: how many children were searched before the move
+		:param source: the strategy that placed the move first
+		"""
+		self.cutoffs += 1
+		if index == 0:
+			self.first_move_cutoffs += 1
+		self.cutoffs_by_source[source] += 1
+
+		killers = self.killers.setdefault(ply, [])
+		if move not in killers:
+			killers.insert(0, move)
+			del killers[self.KILLERS_PER_PLY:]
+		self.history[playing][move] += depth * depth
+
+	@property
+	def first_move_cutoff_rate(self) -> float:
+		return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
+
+	def stats(self) -> dict:
+		return {
+			'nodes': self.nodes,
+			'cutoffs': self.cutoffs,
+			'first_move_cutoff_rate': self.first_move_cutoff_rate,
+			'cutoffs_by_source': dict(self.cutoffs_by_source),
+		}
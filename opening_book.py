@@ -0,0 +1,135 @@
+"""Precomputed best moves for the first plies of the game.
+
+Build a book with: python3 opening_book.py --plies 8 --depth 8 --out book.bin
+"""
+import argparse
+import mmap
+import struct
+import time
+
+from four_in_a_row import BitBoard, Game, canonical_key, mirror_move
+from min_max_tree import MinMaxTree, SearchContext
+from move_ordering import MoveOrdering, Strategy, center_order
+from transposition_table import TranspositionTable
+
+MAGIC = b'FIARBOOK'
+# 2 since the scores are integers, see min_max_tree.WIN_SCORE
+VERSION = 2
+# magic, version, max ply, number of entries
+HEADER = struct.Struct('<8sHHI')
+# position key, score, best move
+ENTRY = struct.Struct('<QiB')
+
+
+class OpeningBook:
+	"""A book file, looked up through mmap so it is never read in full."""
+
+	def __init__(self, path):
+		self.file = open(path, 'rb')
+		self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, self.max_ply, self.size = HEADER.unpack_from(self.mm)
+		if magic != MAGIC or version != VERSION:
+			self.close()
+			raise ValueError(f"{path} is not an opening book")
+
+	def __len__(self):
+		return self.size
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		self.mm.close()
+		self.file.close()
+
+	def _find(self, key) -> tuple[int, int] | None:
+		"""Binary search the entries for the key and return the move and score."""
+		low, high = 0, self.size
+		while low < high:
+			middle = (low + high) // 2
+			entry_key, score, move = ENTRY.unpack_from(self.mm, HEADER.size + middle * ENTRY.size)
+			if entry_key == key:
+				return move, score
+			if entry_key < key:
+				low = middle + 1
+			else:
+				high = middle
+		return None
+
+	def lookup(self, board) -> tuple[int, int] | None:
+		"""Return the best move and its score for the position, if it is in the book.
+		Books are built for the default board, the positions of other sizes or rules are never in them."""
+		if board.count_pieces() > self.max_ply:
+			return None
+		if (board.WIDTH, board.HEIGHT, board.CONNECT) != (BitBoard.WIDTH, BitBoard.HEIGHT, BitBoard.CONNECT):
+			return None
+		key, mirrored = canonical_key(board)
+		if (found := self._find(key)) is None:
+			return None
+		move, score = found
+		return (mirror_move(move) if mirrored else move), score
+
+
+def gen_positions(max_ply):
+	"""Yield every position in progress up to max_ply pieces, one board per pair of mirror images,
+	along with the index of the player to move."""
+	positions = {canonical_key(BitBoard())[0]: Game(initial_board=BitBoard())}
+	for _ in range(max_ply + 1):
+		next_positions = {}
+		for game in positions.values():
+			yield game.board, game.p_i
+			for col in game.board.get_valid_columns():
+				child = Game(initial_board=game.board.__copy__())
+				child.play(col)
+				if not child.over:
+					next_positions.setdefault(canonical_key(child.board)[0], child)
+		positions = next_positions
+
+
+def search_position(board, playing, depth, ctx) -> tuple[int, int]:
+	"""Return the best move of the position and its score.
+	Out of tied moves, the most central one is picked."""
+	tree = MinMaxTree(board, playing)
+	tree.generate_tree(1)
+	better = max if tree.node.maximizing else min
+	scores = {child.node.delta: child.get_score(ctx, depth - 1) for child in tree.children}
+	best_score = better(scores.values())
+	best_move = next(col for col in center_order(board.WIDTH) if scores.get(col) == best_score)
+	return best_move, best_score
+
+
+def build_book(path, max_ply, depth, *, tt_entries=2 ** 22, verbose=False) -> int:
+	"""Search every position up to max_ply pieces and write the book file. Return the number of entries."""
+	ctx = SearchContext(TranspositionTable(tt_entries), MoveOrdering(tuple(Strategy)))
+	entries = []
+	start_time = time.perf_counter()
+	for board, playing in gen_positions(max_ply):
+		key, mirrored = canonical_key(board)
+		move, score = search_position(board, playing, depth, ctx)
+		entries.append((key, score, mirror_move(move) if mirrored else move))
+		if verbose and len(entries) % 1000 == 0:
+			print(f"{len(entries)} positions searched in {time.perf_counter() - start_time:.1f}s")
+
+	entries.sort()
+	with open(path, 'wb') as file:
+		file.write(HEADER.pack(MAGIC, VERSION, max_ply, len(entries)))
+		for entry in entries:
+			file.write(ENTRY.pack(*entry))
+	return len(entries)
+
+
+if __name__ == '__main__':
+	def main():
+		parser = argparse.ArgumentParser(description="Build an opening book.")
+		parser.add_argument('--plies', type=int, default=6, help="how many pieces can be on the board")
+		parser.add_argument('--depth', type=int, default=7, help="how deep every position is searched")
+		parser.add_argument('--out', default='book.bin')
+		args = parser.parse_args()
+		size = build_book(args.out, args.plies, args.depth, verbose=True)
+		print(f"Wrote {size} positions to {args.out}")
+
+
+	main()
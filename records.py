@@ -0,0 +1,134 @@
+"""Compact records of games and positions, and files of millions of them.
+
+A game is recorded as the columns played from the empty board, one digit per move: "3324".
+Game files hold one game per line.
+
+A position is packed in POSITION_BYTES bytes: its key (see Board.get_key), which holds the pieces
+of the first player and the height of every column. Only positions of the default board size can be packed. Position files are a short header followed
+by the packed positions, and are read through mmap so they are never loaded in full.
+"""
+import mmap
+import struct
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from four_in_a_row import BitBoard, Board, Game
+
+# a key takes HEIGHT + 1 bits per column
+POSITION_BYTES = (Board.WIDTH * (Board.HEIGHT + 1) + 7) // 8
+MAGIC = b'FIARPOS\0'
+VERSION = 1
+# magic, version, bytes per position
+HEADER = struct.Struct('<8sHH')
+
+
+def to_record(game: Game) -> str:
+	return ''.join(map(str, game.moves))
+
+
+def write_games(path, records: Iterable[str | Game]):
+	"""Write the games (records or games) to a file, one per line."""
+	with open(path, 'w') as file:
+		for record in records:
+			file.write((to_record(record) if isinstance(record, Game) else record) + '\n')
+
+
+def read_games(path) -> Iterator[str]:
+	"""Yield the records of a game file, one at a time. An empty line is a game with no moves."""
+	with open(path) as file:
+		for line in file:
+			yield line.rstrip('\r\n')
+
+
+def load_games(path, board_cls=BitBoard) -> Iterator[Game]:
+	"""Yield the games of a game file, see Game.from_record."""
+	for record in read_games(path):
+		yield Game.from_record(record, board_cls)
+
+
+def _position_key(board: Board | int) -> int:
+	"""Return the key of the position, raising ValueError if it is not one of the default board size."""
+	if isinstance(board, int):
+		if board < 0 or board.bit_length() > Board.WIDTH * (Board.HEIGHT + 1):
+			raise ValueError(f"{board} is not the key of a {Board.WIDTH}x{Board.HEIGHT} position")
+		return board
+	if (board.WIDTH, board.HEIGHT) != (Board.WIDTH, Board.HEIGHT):
+		raise ValueError(
+			f"Only {Board.WIDTH}x{Board.HEIGHT} positions can be packed, not {board.WIDTH}x{board.HEIGHT}")
+	return board.get_key()
+
+
+def pack_position(board: Board) -> bytes:
+	return _position_key(board).to_bytes(POSITION_BYTES, 'little')
+
+
+def unpack_position(data: bytes, board_cls=BitBoard) -> Board:
+	return board_cls.from_key(int.from_bytes(data, 'little'))
+
+
+def write_positions(path, boards: Iterable[Board | int]) -> int:
+	"""Write the positions (boards, or their keys) to a file and return how many there are.
+	Raises ValueError for a position that is not of the default board size."""
+	count = 0
+	with open(path, 'wb') as file:
+		file.write(HEADER.pack(MAGIC, VERSION, POSITION_BYTES))
+		buffer = bytearray()
+		for board in boards:
+			buffer += _position_key(board).to_bytes(POSITION_BYTES, 'little')
+			count += 1
+			# write in chunks, so any number of positions can be written
+			if len(buffer) >= 1 << 20:
+				file.write(buffer)
+				buffer.clear()
+		file.write(buffer)
+	return count
+
+
+class PositionFile:
+	"""A file of packed positions, read through mmap."""
+
+	def __init__(self, path):
+		self.file = open(path, 'rb')
+		self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, version, position_bytes = HEADER.unpack_from(self.mm)
+		if magic != MAGIC or version != VERSION or position_bytes != POSITION_BYTES:
+			self.close()
+			raise ValueError(f"{path} is not a position file")
+		self.size = (len(self.mm) - HEADER.size) // POSITION_BYTES
+
+	def __len__(self):
+		return self.size
+
+	def __getitem__(self, i) -> BitBoard:
+		return BitBoard.from_key(self.key(i))
+
+	def __iter__(self) -> Iterator[BitBoard]:
+		for i in range(self.size):
+			yield self[i]
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		self.mm.close()
+		self.file.close()
+
+	def key(self, i) -> int:
+		if i not in range(self.size):
+			raise IndexError(i)
+		start = HEADER.size + i * POSITION_BYTES
+		return int.from_bytes(self.mm[start:start + POSITION_BYTES], 'little')
+
+	def keys(self, start=0, stop=None) -> np.ndarray:
+		"""Return the keys of a range of positions at once, as an array of uint64."""
+		stop = self.size if stop is None else min(stop, self.size)
+		data = np.frombuffer(
+			self.mm, np.uint8, (stop - start) * POSITION_BYTES, HEADER.size + start * POSITION_BYTES)
+		# pad every position to 8 bytes, so each one can be read as a single integer
+		padded = np.zeros((stop - start, 8), np.uint8)
+		padded[:, :POSITION_BYTES] = data.reshape(-1, POSITION_BYTES)
+		return padded.view('<u8').ravel()
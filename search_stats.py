@@ -0,0 +1,107 @@
+import json
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class SearchStats:
+	"""Statistics about the search of a single move."""
+	depth: int = 0  # depth of the deepest search that finished
+	nodes: int = 0  # nodes searched, including the ones of an aborted iteration
+	time: float = 0.  # how long the search took in seconds
+	score: int | None = None  # score of the move that was played
+	book_hit: bool = False  # whether the move came from the opening book
+	ponder_hit: bool = False  # whether the move was found while pondering on the opponent's time
+	forced: bool = False  # whether the move was played without searching: a win right away, or a block in a lost position
+	# 'win', 'loss' or 'draw' when the position was solved exactly, along with how many plies are left to play
+	proven: str | None = None
+	plies_to_end: int | None = None
+	# alpha-beta cutoffs, and how many of them the first child searched caused
+	cutoffs: int = 0
+	first_move_cutoffs: int = 0
+	tt_probes: int = 0
+	tt_hits: int = 0
+	# how the time was spent: generating the stored tree (before and after the move)
+	# and scoring the children of the root, which includes the static evaluations
+	generate_time: float = 0.
+	search_time: float = 0.
+
+	# the fields below are only filled when the engine collects detailed statistics.
+	# the lists are indexed by ply, 0 being the root of the search
+	# nodes generated for the search: the stored tree, plus the children generated while searching
+	generated_per_ply: list[int] = field(default_factory=list)
+	searched_per_ply: list[int] = field(default_factory=list)
+	static_evals: int = 0
+	static_eval_time: float = 0.
+	# the most nodes in memory at once, and roughly how many bytes they take
+	peak_nodes: int = 0
+	peak_bytes: int = 0
+
+	@property
+	def nodes_per_second(self) -> float:
+		return self.nodes / self.time if self.time else 0.
+
+	@property
+	def first_move_cutoff_rate(self) -> float:
+		return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
+
+	@property
+	def tt_hit_rate(self) -> float:
+		return self.tt_hits / self.tt_probes if self.tt_probes else 0.
+
+	def to_dict(self) -> dict:
+		return {
+			**asdict(self), 'nodes_per_second': self.nodes_per_second,
+			'first_move_cutoff_rate': self.first_move_cutoff_rate, 'tt_hit_rate': self.tt_hit_rate}
+
+
+@dataclass
+class SearchProgress:
+	"""How far a search got, sent while it runs."""
+	depth: int  # depth of the last iteration that finished
+	move: int  # best move of that iteration
+	score: int
+	nodes: int  # nodes searched so far
+	time: float  # seconds since the search started
+	final: bool = False  # whether this is the move that is played
+
+	@property
+	def nodes_per_second(self) -> float:
+		return self.nodes / self.time if self.time else 0.
+
+
+class SearchCounters:
+	"""What a search does, counted ply by ply. The search only counts when its context holds counters."""
+	__slots__ = ('root_move_count', 'generated', 'searched', 'static_evals', 'static_eval_time')
+
+	def __init__(self, root_move_count: int, max_plies: int):
+		# how many pieces were on the board at the root, the ply of a node is counted from there
+		self.root_move_count = root_move_count
+		self.generated = [0] * (max_plies + 1)
+		self.searched = [0] * (max_plies + 1)
+		self.static_evals = 0
+		self.static_eval_time = 0.
+
+	@property
+	def deepest_ply(self) -> int:
+		return max((ply for ply, count in enumerate(self.searched) if count), default=0)
+
+
+class StatsLog:
+	"""Write the statistics of every move to a file, one JSON object per line.
+	Pass it as the on_stats callback of the engine."""
+
+	def __init__(self, path):
+		self.file = open(path, 'a')
+
+	def __call__(self, stats: SearchStats):
+		self.file.write(json.dumps(stats.to_dict()) + '\n')
+		self.file.flush()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		self.file.close()
@@ -1,7 +1,27 @@
+from random import Random
+from typing import Iterator
+
 import pytest
-from four_in_a_row import Board
+from four_in_a_row import BitBoard, Board, Game
 
 
 @pytest.fixture
 def board():
 	return Board()
+
+
+def random_games(n, n_moves=None, seed=0, board_cls=BitBoard, in_progress=False) -> Iterator[Game]:
+	"""Yield n games of random moves.
+	:param n_moves: how many moves each game is played for at most, a random number by default
+	:param in_progress: only yield the games that are not over, playing as many as needed
+	"""
+	rng = Random(seed)
+	while n:
+		game = Game(initial_board=board_cls())
+		moves = rng.randrange(board_cls.WIDTH * board_cls.HEIGHT + 1) if n_moves is None else n_moves
+		while game.move_count < moves and not game.over:
+			game.play(rng.choice(list(game.board.get_valid_columns())))
+		if in_progress and game.over:
+			continue
+		n -= 1
+		yield game
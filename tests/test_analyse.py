@@ -0,0 +1,49 @@
+from analyse import AnalysisOptions, analyse, analyse_line, parse_line
+from four_in_a_row import Game
+
+
+def test_parse_line():
+	_, game = parse_line('3324\n')
+	assert game.move_count == 4 and game.p_i == 0
+	assert game.board.state[-1][2:5] == ['#', '#', '+']
+	assert game.board.state[-2][3] == '+'
+
+	board_id, game = parse_line('{"id": 7, "board": [".......", ".......", ".......", ".......", "..+....", "..#...."]}')
+	assert board_id == 7 and game.move_count == 2
+
+	_, game = parse_line('......./......./......./......./...#.../..+#+..')
+	assert game.board.state[-1][2:5] == ['+', '#', '+']
+	assert game.p_i == 0
+
+
+def test_invalid_lines():
+	assert 'not a valid column' in analyse_line(1, '37').error
+	assert 'not a valid column' in analyse_line(1, '0000000').error
+	assert 'game is over' in analyse_line(1, '0101010').error
+	assert 'rows' in analyse_line(1, '....../......').error
+	assert 'floating' in analyse_line(1, '#....../......./......./......./......./.......').error
+	assert analyse_line(1, '{"id": 1}').error
+
+
+def test_analyse_line():
+	analysis = analyse_line(3, '{"id": "x", "moves": "3344"}', AnalysisOptions(depth=3))
+	assert analysis.error is None
+	assert analysis.line == 3 and analysis.id == 'x'
+	assert analysis.move in range(Game().board.WIDTH)
+	assert analysis.depth == 3
+	assert analysis.nodes > 0
+
+
+def test_bounded_read_ahead():
+	read = []
+
+	def lines():
+		for i in range(10):
+			read.append(i)
+			yield str(i % 7)
+
+	analyses = analyse(lines(), AnalysisOptions(depth=2), n_workers=1, max_in_flight=2)
+	next(analyses)
+	assert len(read) == 2
+	assert len([*analyses]) == 9
+	assert len(read) == 10
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_engine import AsyncEngine
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Game
+
+
+def test_get_best_play():
+	async def play():
+		game = Game()
+		engine = AsyncEngine(FIARMinMax(game, max_depth=4, plays=0))
+		for _ in range(3):
+			game.play(await engine.get_best_play())
+			assert not engine.lock.locked()
+			game.play(3)
+
+		# a caller that stops at the final progress, without closing the search, does not keep the engine
+		search = engine.search()
+		async for progress in search:
+			if progress.final:
+				break
+		assert not engine.lock.locked()
+		await search.aclose()
+		return game
+
+	assert asyncio.run(play()).move_count == 6
+
+
+def test_progress():
+	async def search():
+		engine = AsyncEngine(FIARMinMax(Game(), plays=0, lazy=True))
+		return [progress async for progress in engine.search(time_budget=0.3)]
+
+	events = asyncio.run(search())
+	assert events[-1].final
+	assert [event.depth for event in events[:-1]] == list(range(1, len(events)))
+	assert events[-1].depth == events[-2].depth
+	assert all(event.nodes_per_second > 0 for event in events)
+
+
+def test_cancel():
+	async def cancel():
+		game = Game()
+		engine = AsyncEngine(FIARMinMax(game, max_depth=12, plays=0, lazy=True))
+		task = asyncio.create_task(engine.get_best_play())
+		await asyncio.sleep(0.2)
+		start = time.perf_counter()
+		task.cancel()
+		with pytest.raises(asyncio.CancelledError):
+			await task
+		assert time.perf_counter() - start < 1
+		# the engine can search the same position again
+		engine.fiar_mm.max_depth = 3
+		return await engine.get_best_play()
+
+	assert asyncio.run(cancel()) in range(7)
+
+
+def test_concurrent_games():
+	async def play_all():
+		executor = ThreadPoolExecutor(2)
+		games = [Game() for _ in range(4)]
+		engines = [AsyncEngine(FIARMinMax(game, max_depth=3, plays=0, lazy=True), executor) for game in games]
+
+		async def play(game, engine):
+			for _ in range(2):
+				game.play(await engine.get_best_play())
+				game.play(0)
+			return game.move_count
+
+		# the event loop keeps running while the games are searched
+		ticks = 0
+
+		async def tick():
+			nonlocal ticks
+			while True:
+				ticks += 1
+				await asyncio.sleep(0.001)
+
+		ticker = asyncio.create_task(tick())
+		counts = await asyncio.gather(*(play(game, engine) for game, engine in zip(games, engines)))
+		ticker.cancel()
+		executor.shutdown()
+		return counts, ticks
+
+	counts, ticks = asyncio.run(play_all())
+	assert counts == [4] * 4
+	assert ticks > 1
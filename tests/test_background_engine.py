@@ -0,0 +1,136 @@
+import time
+from threading import Event
+
+from background_engine import BackgroundEngine
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Game, mirror_move
+from min_max_tree import MinMaxTree
+
+
+def wait_for_move(engine, timeout=30):
+	end = time.perf_counter() + timeout
+	while (move := engine.poll()) is None:
+		assert time.perf_counter() < end
+		time.sleep(0.001)
+	return move
+
+
+def test_ponder():
+	game = Game()
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=0)
+	game.play(fiar_mm.get_best_play())
+	assert sorted(fiar_mm.ponder_moves()) == list(range(7))
+	fiar_mm.ponder(3)
+	answer, stats, options = next(iter(fiar_mm.pondered.values()))
+	assert stats.nodes > 0 and answer in options
+	# the answer is stored for the smaller hash out of the position and its mirror image
+	child = next(child for child in fiar_mm.tree.children if child.node.delta == 3)
+	if child.mirror_key < child.key:
+		answer = mirror_move(answer)
+
+	game.play(3)
+	assert fiar_mm.get_best_play() == answer
+	assert fiar_mm.stats.ponder_hit
+	assert fiar_mm.stats.nodes == stats.nodes
+	assert not fiar_mm.pondered
+
+
+def test_ponder_plays_win():
+	# the opponent misses its win, the pondered answer wins instead of blocking it
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('#.....+'),
+		list('#.....+'),
+		list('#.#...+'),
+	]
+	game = Game(initial_board=initial)
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=0)
+	fiar_mm.tree = MinMaxTree(game.board.__copy__(), playing=1)
+	fiar_mm.tree.generate_tree(1)
+	fiar_mm.ponder(3)
+	answer, stats, options = next(iter(fiar_mm.pondered.values()))
+	child = next(child for child in fiar_mm.tree.children if child.node.delta == 3)
+	assert (mirror_move(answer) if child.mirror_key < child.key else answer) == 0
+	assert stats.forced
+
+	game.play(3)
+	assert fiar_mm.get_best_play() == 0
+	assert fiar_mm.stats.proven == 'win'
+
+
+def test_ponder_stopped():
+	game = Game()
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=0)
+	game.play(fiar_mm.get_best_play())
+	root = fiar_mm.tree
+	fiar_mm.stop = Event()
+	fiar_mm.stop.set()
+	fiar_mm.ponder(3)
+	assert not fiar_mm.pondered
+	assert fiar_mm.tree is root
+	fiar_mm.stop = None
+	game.play(3)
+	fiar_mm.get_best_play()
+	assert not fiar_mm.stats.ponder_hit
+
+
+def test_background_engine():
+	game = Game()
+	engine = BackgroundEngine(FIARMinMax(game, max_depth=4, plays=0))
+	try:
+		engine.request_move()
+		assert engine.thinking
+		game.play(wait_for_move(engine))
+		assert not engine.thinking
+
+		engine.start_pondering()
+		end = time.perf_counter() + 30
+		# every move was pondered when the thread returns (mirrored moves share their answer)
+		while engine.thread.is_alive():
+			assert time.perf_counter() < end
+			time.sleep(0.01)
+		game.play(2)
+		engine.request_move()
+		game.play(wait_for_move(engine))
+		assert engine.fiar_mm.stats.ponder_hit
+	finally:
+		engine.close()
+
+
+def test_pondering_interrupted():
+	game = Game()
+	engine = BackgroundEngine(FIARMinMax(game, max_depth=6, plays=0, lazy=True))
+	try:
+		engine.request_move()
+		game.play(wait_for_move(engine))
+		engine.start_pondering()
+		time.sleep(0.05)
+		game.play(3)
+		# the move is searched as soon as it is requested, even if pondering did not get to it
+		engine.request_move()
+		assert wait_for_move(engine) in range(7)
+	finally:
+		engine.close()
+
+
+def test_pondering_interrupted_while_generating():
+	game = Game()
+	engine = BackgroundEngine(FIARMinMax(game, max_depth=7, plays=0, tt_entries=None))
+	try:
+		engine.fiar_mm.max_depth = 2
+		engine.request_move()
+		game.play(wait_for_move(engine))
+		# pondering spends its time generating the depth 7 trees, which is stopped too
+		engine.fiar_mm.max_depth = 7
+		engine.start_pondering()
+		time.sleep(0.1)
+		game.play(3)
+		start = time.perf_counter()
+		engine.fiar_mm.max_depth = 2
+		engine.request_move()
+		assert time.perf_counter() - start < .5
+		assert wait_for_move(engine) in range(7)
+	finally:
+		engine.close()
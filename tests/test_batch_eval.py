@@ -0,0 +1,44 @@
+from batch_eval import boards_to_array, evaluate, evaluate_leaves
+from conftest import random_games
+from four_in_a_row import Board, BitBoard
+from min_max_tree import MinMaxTree
+
+
+def random_positions(n, seed=0, board_cls=Board):
+	"""Yield the trees of n random positions, including won and tied ones."""
+	for game in random_games(n, seed=seed, board_cls=board_cls):
+		yield MinMaxTree(game.board, game.p_i)
+
+
+def test_same_as_static_eval():
+	trees = list(random_positions(500))
+	scores = evaluate(boards_to_array(tree.node.board for tree in trees))
+	assert scores.tolist() == [tree._static_eval() for tree in trees]
+
+
+def test_bit_boards_same_as_list_boards():
+	for size in ((7, 6, 4), (9, 7, 5)):
+		trees = list(random_positions(100, board_cls=Board.variant(*size)))
+		bit_boards = [BitBoard.variant(*size)(tree.node.board.state) for tree in trees]
+		assert (boards_to_array(bit_boards) == boards_to_array(tree.node.board for tree in trees)).all()
+
+
+def test_variants():
+	for size in ((8, 7, 4), (9, 7, 5)):
+		board_cls = Board.variant(*size)
+		trees = list(random_positions(200, board_cls=board_cls))
+		scores = evaluate(boards_to_array(tree.node.board for tree in trees), board_cls.CONNECT)
+		assert scores.tolist() == [tree._static_eval() for tree in trees]
+
+
+def test_evaluate_leaves():
+	tree = next(random_positions(1, seed=3))
+	tree.generate_tree(3)
+	state = [row.copy() for row in tree.node.board.state]
+	assert evaluate_leaves(tree) > 0
+	assert tree.node.board.state == state
+	batch_score = tree.get_score()
+
+	tree.generate_tree(3)
+	assert tree.get_score() == batch_score
+
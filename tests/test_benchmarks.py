@@ -0,0 +1,25 @@
+from benchmarks.engine import compare, get_benchmarks, run_benchmark
+
+
+def test_benchmarks_run():
+	for benchmark in get_benchmarks(tree_depths=(2,), search_depth=2):
+		result = run_benchmark(benchmark, repeat=1, memory=benchmark.name.startswith('tree.generate_tree'))
+		assert result.runs == 1
+		assert result.ops_per_second > 0
+		if benchmark.name.startswith('tree.generate_tree'):
+			assert result.nodes_per_second > 0
+			assert result.peak_memory > 0
+
+
+def test_compare():
+	baseline = {
+		'a': {'ops_per_second': 100., 'peak_memory': 1000},
+		'b': {'ops_per_second': 100., 'peak_memory': None},
+	}
+	results = {
+		'a': {'ops_per_second': 91., 'peak_memory': 1090},
+		'b': {'ops_per_second': 50., 'peak_memory': 5000},
+		'c': {'ops_per_second': 1., 'peak_memory': 1},
+	}
+	assert compare(results, baseline, 0.1) == ['b: 50 ops/s, baseline 100 ops/s']
+	assert len(compare(results, baseline, 0.05)) == 3
@@ -0,0 +1,164 @@
+import pickle
+
+import pytest
+from pytest import raises
+
+from conftest import random_games
+from four_in_a_row import Board, BitBoard, Game
+from min_max_tree import MinMaxTree
+
+
+def play_random_game(seed, size=(Board.WIDTH, Board.HEIGHT, Board.CONNECT)):
+	"""Play the same random game on a list board and a bit board, yielding both games after every move."""
+	game = next(random_games(1, size[0] * size[1], seed, Board.variant(*size)))
+	list_game = Game(initial_board=Board.variant(*size)())
+	bit_game = Game(initial_board=BitBoard.variant(*size)())
+	for col in game.moves:
+		list_game.play(col)
+		bit_game.play(col)
+		yield list_game, bit_game
+
+
+def test_column_invalid():
+	board = BitBoard()
+	with raises(ValueError):
+		board.insert_piece(-1, '#')
+	with raises(ValueError):
+		board.insert_piece(0.5, '#')
+	with raises(ValueError):
+		board.insert_piece(board.WIDTH, '#')
+
+
+def test_column_full():
+	board = BitBoard()
+	for _ in range(board.HEIGHT):
+		board.insert_piece(0, '#')
+	assert list(board.get_valid_columns()) == list(range(1, board.WIDTH))
+	with raises(ValueError):
+		board.insert_piece(0, '#')
+
+
+def test_same_as_list_board():
+	for seed in range(50):
+		for list_game, bit_game in play_random_game(seed):
+			assert bit_game.board.state == list_game.board.state
+			assert bit_game.board == list_game.board
+			assert list(bit_game.board.get_valid_columns()) == list(list_game.board.get_valid_columns())
+			assert bit_game.get_state() is list_game.get_state()
+			assert str(bit_game) == str(list_game)
+			# both boards may report different alignments when there are several, but they must be valid
+			assert len(bit_game.alignment) == len(list_game.alignment)
+			assert len({bit_game.board.state[y][x] for y, x in bit_game.alignment}) <= 1
+
+
+def test_from_state():
+	state = [
+		list('.......'),
+		list('.......'),
+		list('....+..'),
+		list('...++#.'),
+		list('..###+.'),
+		list('+#+##+.'),
+	]
+	board = BitBoard(initial_state=[row.copy() for row in state])
+	assert board.state == state
+	assert board == Board(state)
+	assert board.heights == [1, 1, 2, 3, 4, 3, 0]
+	assert board.__copy__() == board
+
+
+def test_tree_score_matches():
+	state = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('....++.'),
+		list('..#+#+.'),
+		list('..#+###'),
+	]
+	list_tree = MinMaxTree(Board(state), 1)
+	bit_tree = MinMaxTree(BitBoard(state), 1)
+	list_tree.generate_tree(3)
+	bit_tree.generate_tree(3)
+	assert bit_tree.get_score() == list_tree.get_score()
+
+
+def test_incremental_state_matches_full_scan(monkeypatch):
+	monkeypatch.setattr(Game, 'validate_state', True)
+	for seed in range(50):
+		for list_game, bit_game in play_random_game(seed):
+			assert list_game.move_count == bit_game.move_count == list_game.board.count_pieces()
+	MinMaxTree(BitBoard(), 0).generate_tree(3)
+
+
+def test_remove_piece():
+	for list_game, bit_game in play_random_game(0):
+		pass
+	while list_game.moves:
+		assert list_game.undo() == bit_game.undo()
+		assert bit_game.board.state == list_game.board.state
+		assert bit_game.board == BitBoard(list_game.board.state)
+	assert bit_game.board.masks == {'#': 0, '+': 0}
+
+
+def test_tree_without_boards():
+	tree = MinMaxTree(BitBoard(), 0)
+	tree.generate_tree(3)
+	child = tree.children[3]
+	assert child.node._board is None
+	grandchild = child.children[4]
+	assert grandchild.node.board.state[-1][3:5] == ['#', '+']
+	# the search plays and undoes the moves on the board of the root
+	tree.get_score(depth=4)
+	assert tree.node.board == BitBoard()
+	child.node.make_root()
+	assert child.node.parent is None and child.node.board.state[-1][3] == '#'
+
+
+def test_variants():
+	assert BitBoard.variant(7, 6) is BitBoard
+	board_cls = BitBoard.variant(10, 8, 5)
+	assert board_cls is BitBoard.variant(10, 8, 5)
+	assert board_cls.variant(7, 6, 4) is BitBoard
+	assert (board_cls.COL_BITS, board_cls.RUN_STEPS) == (9, (1, 2, 1))
+	assert not issubclass(Board.variant(10, 8, 5), BitBoard)
+	with raises(ValueError):
+		BitBoard.variant(0, 6)
+
+	# past 64 cells
+	board = Game.from_record('0123456789' * 3, board_cls).board
+	copy = pickle.loads(pickle.dumps(board))
+	assert type(copy) is board_cls and copy == board and copy.heights == board.heights
+
+
+@pytest.mark.parametrize('size', [(8, 7, 4), (9, 7, 5), (5, 4, 3)])
+def test_variant_same_as_list_board(size):
+	for seed in range(10):
+		for list_game, bit_game in play_random_game(seed, size):
+			assert bit_game.board.state == list_game.board.state
+			assert bit_game.get_state() is list_game.get_state()
+			assert len(bit_game.alignment) == len(list_game.alignment) in (0, size[2])
+
+
+def test_connect_5():
+	board_cls = BitBoard.variant(9, 7, 5)
+	game = Game(initial_board=board_cls())
+	for move in '0011223':
+		game.play(int(move))
+	# 4 in a row does not win
+	assert not game.over
+	game.play(8)
+	game.play(4)
+	assert game.get_state() is Game.GameState.P1_WON
+	assert sorted(game.alignment) == [(6, col) for col in range(5)]
+
+
+@pytest.mark.parametrize('size', [(7, 6, 4), (8, 7, 4), (9, 7, 5), (5, 4, 3)])
+def test_winning_columns_same_as_list_board(size):
+	for seed in range(10):
+		for list_game, bit_game in play_random_game(seed, size):
+			if list_game.over:
+				break
+			for piece in Game.PLAYERS:
+				now, next_ = bit_game.board.winning_columns(piece)
+				assert (sorted(now), sorted(next_)) == tuple(map(sorted, list_game.board.winning_columns(piece)))
@@ -1,5 +1,7 @@
 from pytest import raises
 
+from four_in_a_row import Game
+
 
 def test_column_valid(board):
 	for i in range(board.WIDTH):
@@ -15,3 +17,50 @@ def test_column_invalid(board):
 		board.insert_piece(board.WIDTH, '#')
 	with raises(ValueError):
 		board.insert_piece(board.WIDTH + 1, '#')
+
+
+def test_alignment_at(board):
+	for col in range(3):
+		board.insert_piece(col, '#')
+	assert board.get_alignment_at(5, 2, '#') == []
+	row = board.insert_piece(3, '#')
+	assert board.get_alignment_at(row, 3, '#') == [(5, 0), (5, 1), (5, 2), (5, 3)]
+	assert board.get_alignment_at(row, 3, '+') == []
+
+
+def test_remove_piece(board):
+	board.insert_piece(2, '#')
+	board.insert_piece(2, '+')
+	assert board.remove_piece(2) == 4
+	assert board.state[4][2] == '.' and board.state[5][2] == '#'
+	assert board.remove_piece(2) == 5
+	with raises(ValueError):
+		board.remove_piece(2)
+
+
+def test_undo():
+	game = Game()
+	for col in (3, 3, 2):
+		game.play(col)
+	assert game.undo() == 2
+	assert game.moves == [3, 3] and game.last_play == 3
+	assert game.move_count == 2 and game.playing == '#'
+
+	# undoing the winning move puts the game back in progress
+	for col in (2, 4, 2, 4, 2, 4, 2):
+		game.play(col)
+	assert game.over
+	game.undo()
+	assert not game.over and game.alignment == []
+	game.play(2)
+	assert game.over
+
+
+def test_list_board_size():
+	game = Game(initial_board=[list('.........') for _ in range(7)])
+	assert (game.board.WIDTH, game.board.HEIGHT, game.board.CONNECT) == (9, 7, 4)
+	game.play(8)
+	assert game.board.state[6][8] == '#'
+
+	with raises(ValueError):
+		Game(initial_board=[list('.......'), list('......')])
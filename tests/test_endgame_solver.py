@@ -0,0 +1,78 @@
+from threading import Event
+
+import pytest
+
+from conftest import random_games
+from endgame_solver import CELLS, EndgameSolver
+from fiar_min_max import FIARMinMax
+from four_in_a_row import BitBoard, Game
+from min_max_tree import SearchTimeout
+
+
+def brute_force(board, playing, moves) -> int:
+	"""Score of the position for the player to move, trying every line of play."""
+	cells = board.WIDTH * board.HEIGHT
+	best = None
+	for col in board.get_valid_columns():
+		child = board.__copy__()
+		row = child.insert_piece(col, Game.PLAYERS[playing])
+		if child.get_alignment_at(row, col, Game.PLAYERS[playing]):
+			score = (cells + 1 - moves) // 2
+		elif moves + 1 == cells:
+			score = 0
+		else:
+			score = -brute_force(child, (playing + 1) % 2, moves + 1)
+		best = score if best is None else max(best, score)
+	return best
+
+
+def test_same_as_brute_force():
+	for game in random_games(20, CELLS - 8, in_progress=True):
+		solver = EndgameSolver()
+		solution = solver.solve(game.board, game.p_i)
+		assert solution.score == brute_force(game.board, game.p_i, game.move_count)
+		best_move = max(solver.solve_moves(game.board, game.p_i).values(), key=lambda solution: solution.score)
+		assert best_move.score == solution.score
+
+
+def test_plies_to_end():
+	# winning right away
+	assert EndgameSolver.plies_to_end((CELLS + 1 - 10) // 2, 10) == 1
+	# winning with the next own piece
+	assert EndgameSolver.plies_to_end((CELLS + 1 - 12) // 2, 10) == 3
+	# losing to the opponent's next piece
+	assert EndgameSolver.plies_to_end(-((CELLS + 1 - 11) // 2), 10) == 2
+	assert EndgameSolver.plies_to_end(0, 30) == 12
+
+
+def test_engine_plays_fastest_win():
+	for game in random_games(10, CELLS - 12, seed=1, in_progress=True):
+		solutions = EndgameSolver().solve_moves(game.board, game.p_i)
+		best_score = max(solution.score for solution in solutions.values())
+		fiar_mm = FIARMinMax(game, plays=game.p_i)
+		move = fiar_mm.get_best_play()
+		assert solutions[move].score == best_score
+		assert fiar_mm.stats.proven == solutions[move].result
+		assert fiar_mm.stats.plies_to_end == solutions[move].plies
+		# the solver searches the position without the stored tree
+		assert all(not child.children for child in fiar_mm.tree.children)
+
+
+def test_variants():
+	for size in ((5, 4, 3), (8, 7, 4), (9, 7, 5)):
+		board_cls = BitBoard.variant(*size)
+		cells = board_cls.WIDTH * board_cls.HEIGHT
+		for game in random_games(5, cells - 8, board_cls=board_cls, in_progress=True):
+			solution = EndgameSolver(board_cls=board_cls).solve(game.board, game.p_i)
+			assert solution.score == brute_force(game.board, game.p_i, game.move_count)
+
+
+def test_stop():
+	game = next(random_games(1, CELLS - 22, seed=1, in_progress=True))
+	solver = EndgameSolver()
+	solver.stop = Event()
+	solver.stop.set()
+	with pytest.raises(SearchTimeout):
+		solver.solve(game.board, game.p_i)
+	solver.stop = None
+	assert solver.solve(game.board, game.p_i).result in ('win', 'loss', 'draw')
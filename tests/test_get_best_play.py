@@ -1,4 +1,5 @@
-from four_in_a_row import Game
+from four_in_a_row import Board, BitBoard, Game
+from min_max_tree import WIN_SCORE, MinMaxTree, SearchContext
 from fiar_min_max import FIARMinMax
 
 import pytest
@@ -79,3 +80,300 @@ def test_play_smart(mt):
 	fiar_mm = FIARMinMax(game, max_depth=5, plays=1, mt=mt)
 	assert fiar_mm.get_best_play() == 3
 	assert fiar_mm.last_play_options == [3]
+
+
+@pytest.mark.parametrize('plays', [0, 1])
+def test_lazy_same_as_tree(plays):
+	# searching without storing the tree must give the same options as the full tree
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('..+#...'),
+		list('..++...'),
+		list('..#+...'),
+		list('.#+##+#'),
+	]
+	options = []
+	for lazy in (False, True):
+		game = Game(initial_board=[row.copy() for row in initial])
+		fiar_mm = FIARMinMax(game, max_depth=5, plays=plays, lazy=lazy)
+		fiar_mm.get_best_play()
+		options.append(fiar_mm.last_play_options)
+
+		if lazy:
+			# only the children of the new root are kept
+			assert all(not child.children for child in fiar_mm.tree.children)
+	assert options[0] == options[1]
+
+
+def test_time_budget():
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('....+..'),
+		list('....+..'),
+		list('.###+#.'),
+	]
+	game = Game(initial_board=initial)
+	# the block is forced, only a search without the threat checks goes deeper and deeper
+	fiar_mm = FIARMinMax(game, plays=1, threats=False)
+	assert fiar_mm.get_best_play(time_budget=0.5) == 4
+	assert fiar_mm.last_play_options == [4]
+	assert fiar_mm.stats.depth >= 3
+	assert fiar_mm.stats.nodes_per_second > 0
+
+	# the first iteration always finishes, even without any time
+	game = Game()
+	fiar_mm = FIARMinMax(game, plays=0)
+	assert fiar_mm.get_best_play(time_budget=0) in range(7)
+	assert fiar_mm.stats.depth == 1
+	# the budget given to the call is searched without storing the whole tree first
+	assert all(not child.children for child in fiar_mm.tree.children)
+
+
+def test_pool_reused():
+	game = Game()
+	with FIARMinMax(game, max_depth=4, plays=0, mt=True) as fiar_mm:
+		game.play(fiar_mm.get_best_play())
+		pool = fiar_mm.pool
+		game.play(3)
+		game.play(fiar_mm.get_best_play())
+		assert fiar_mm.pool is pool
+		assert fiar_mm.stats.nodes > 0
+	assert fiar_mm.pool is None
+
+
+@pytest.mark.parametrize('smp', [1, 3])
+def test_smp_same_as_single(smp):
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('..+#...'),
+		list('..++...'),
+		list('..#+...'),
+		list('.#+##+#'),
+	]
+	options = []
+	for n_workers in (0, smp):
+		game = Game(initial_board=[row.copy() for row in initial])
+		# the move is forced, so both would play it without searching
+		with FIARMinMax(game, max_depth=5, plays=0, smp=n_workers, threats=False) as fiar_mm:
+			assert fiar_mm.get_best_play() == 4
+			options.append(fiar_mm.last_play_options)
+			assert fiar_mm.stats.depth == 5
+	assert options[0] == options[1]
+
+	game = Game()
+	with FIARMinMax(game, plays=0, smp=smp) as fiar_mm:
+		assert fiar_mm.get_best_play(time_budget=0.2) in range(7)
+		assert fiar_mm.stats.depth >= 1
+
+
+def test_tree_kept_across_moves():
+	game = Game()
+	# on the empty board, which is symmetric, the mirrored moves are not searched
+	game.play(0)
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=1, tt_entries=None)
+	game.play(fiar_mm.get_best_play())
+	root = fiar_mm.tree
+	assert root.node.parent is None
+	# the best moves of the last search are kept when the tree grows
+	child = next(child for child in root.children if child.node.delta == 3)
+	best_move = child.node.best_move
+	assert best_move is not None and child.children
+
+	game.play(3)
+	fiar_mm.get_best_play()
+	assert fiar_mm.tree.node.parent is None
+	# the subtrees of the moves that were not played are released
+	assert all(not sibling.children for sibling in root.children if sibling is not child)
+
+
+def test_generate_tree_keeps_best_moves():
+	tree = MinMaxTree(Board(), 0)
+	tree.generate_tree(3)
+	tree.get_score()
+	best_move = tree.node.best_move
+	tree.generate_tree(4)
+	assert tree.node.score is None
+	assert tree.node.best_move == best_move
+
+
+def test_symmetric_positions():
+	tree = MinMaxTree(Board(), 0)
+	tree.generate_tree(3)
+	assert tree.symmetric
+	assert [child.node.delta for child in tree.folded_children()] == [0, 1, 2, 3]
+	# the mirrored children exist so they can be played, but they are not searched
+	assert all(child.children for child in tree.children[:4])
+	assert not any(child.children for child in tree.children[4:])
+	center = tree.children[3]
+	assert center.symmetric and not tree.children[0].symmetric
+	assert len(center.folded_children()) == 4 and len(tree.children[0].folded_children()) == 7
+
+	# the folded search scores the same as searching every child
+	assert tree.get_score() == MinMaxTree(Board(), 0).get_score(depth=3)
+	full = max(child.get_score(depth=2) for child in MinMaxTree(Board(), 0).gen_children())
+	assert tree.get_score() == full
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_symmetric_root_keeps_mirrored_options(lazy):
+	game = Game()
+	game.play(3)
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=1, lazy=lazy)
+	move = fiar_mm.get_best_play()
+	options = fiar_mm.last_play_options
+	# tied mirrored moves can both be picked
+	assert move in options
+	assert sorted(options) == sorted(6 - option for option in options)
+
+
+@pytest.mark.parametrize('lazy, mt', [(False, False), (True, False), (False, True)])
+def test_variant_boards(lazy, mt):
+	board_cls = BitBoard.variant(9, 7, 5)
+	# the first player has 4 in a row on the bottom row, which the second player has to block
+	game = Game.from_record('1020304', board_cls)
+	with FIARMinMax(game, max_depth=3, plays=1, lazy=lazy, mt=mt) as fiar_mm:
+		assert fiar_mm.get_best_play() == 5
+		assert fiar_mm.last_play_options == [5]
+	# or the first player wins, 4 in a column is not enough for the second player
+	game = Game.from_record('10203040', board_cls)
+	with FIARMinMax(game, max_depth=3, plays=0, lazy=lazy, mt=mt) as fiar_mm:
+		assert fiar_mm.get_best_play() == 5
+
+	# a board of even width has no middle column
+	tree = MinMaxTree(BitBoard.variant(8, 7)(), 0)
+	tree.generate_tree(2)
+	assert [child.node.delta for child in tree.folded_children()] == [0, 1, 2, 3]
+	assert tree.get_score() == MinMaxTree(BitBoard.variant(8, 7)(), 0).get_score(depth=2)
+
+
+POSITIONS = [
+	# (initial board, player to move), the positions of the tests above
+	(['.......', '.......', '.......', '.......', '....#..', '###++.+'], 1),
+	(['.......', '.......', '.......', '...+++.', '..#+#+.', '..#+###'], 1),
+	(['.......', '.......', '.......', '....+..', '....+..', '.###+#.'], 1),
+	(['.......', '.......', '..+#...', '..++...', '..#+...', '.#+##+#'], 0),
+	(['.......', '.......', '.......', '....++.', '..#+#+.', '..#+###'], 1),
+	(['.......', '.......', '..+#...', '..++...', '..#+...', '.#+##+#'], 1),
+]
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_pvs_same_as_full_window(lazy):
+	nodes = {False: 0, True: 0}
+	for rows, plays in POSITIONS:
+		results = []
+		for pvs in (False, True):
+			game = Game(initial_board=BitBoard([list(row) for row in rows]))
+			fiar_mm = FIARMinMax(
+				game, max_depth=7 if lazy else 5, plays=plays, lazy=lazy, pvs=pvs, endgame_threshold=0, threats=False)
+			fiar_mm.get_best_play()
+			results.append((fiar_mm.last_play_options, fiar_mm.stats.score))
+			nodes[pvs] += fiar_mm.stats.nodes
+		assert results[0] == results[1]
+	# the null windows prune more than they search again
+	assert nodes[True] < nodes[False]
+
+
+def test_aspiration_window():
+	initial = [list(row) for row in POSITIONS[4][0]]
+	tree = MinMaxTree(BitBoard(initial), 1)
+	tree.generate_tree(1)
+	scores = tree.score_children(SearchContext(pvs=False), 4)
+	best = min(score for score, _ in scores)
+	# a wrong guess makes the first child fall out of the window, it is then searched again
+	for guess in (best - 10, best, best + 10):
+		for child in tree.children:
+			child.node.score = None
+		windowed = tree.score_children(SearchContext(), 4, guess=guess, aspiration=2)
+		assert min(score for score, _ in windowed) == best
+		# the children tied with the best one are exact
+		assert [child for score, child in windowed if score == best] == [child for score, child in scores if score == best]
+
+
+def test_win_scores():
+	# the sooner the win, the higher the score
+	game = Game(initial_board=[list(row) for row in POSITIONS[0][0]])
+	tree = MinMaxTree(game.board, 1)
+	assert tree.get_score(depth=5) == -(WIN_SCORE - tree.move_count - 1)
+	fiar_mm = FIARMinMax(game, max_depth=5, plays=1)
+	fiar_mm.get_best_play()
+	assert fiar_mm.stats.score == tree.get_score()
+
+
+def test_forced_moves():
+	# a win right away is played without searching
+	rows, plays = POSITIONS[2]
+	game = Game(initial_board=BitBoard([list(row) for row in rows]))
+	fiar_mm = FIARMinMax(game, plays=plays, endgame_threshold=0)
+	assert fiar_mm.get_best_play() == 4
+	assert fiar_mm.stats.forced and fiar_mm.stats.nodes == 0
+	assert fiar_mm.stats.proven == 'win'
+
+	# a single block is the only move searched, which scores it
+	rows, plays = POSITIONS[3]
+	nodes = []
+	for threats in (False, True):
+		game = Game(initial_board=BitBoard([list(row) for row in rows]))
+		fiar_mm = FIARMinMax(game, max_depth=5, plays=plays, endgame_threshold=0, threats=threats)
+		assert fiar_mm.get_best_play() == 4
+		assert fiar_mm.last_play_options == [4]
+		assert fiar_mm.stats.score is not None and not fiar_mm.stats.forced
+		nodes.append(fiar_mm.stats.nodes)
+	assert nodes[1] < nodes[0]
+
+	# two threats can not both be blocked
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('..#.#..'),
+		list('..+++.#'),
+	]
+	fiar_mm = FIARMinMax(Game(initial_board=initial), plays=0)
+	assert fiar_mm.get_best_play() in (1, 5)
+	assert fiar_mm.last_play_options == [1, 5]
+	assert fiar_mm.stats.proven == 'loss' and fiar_mm.stats.plies_to_end == 2
+	assert fiar_mm.stats.score == -(WIN_SCORE - 6 - 2)
+
+
+def test_unsafe_moves_not_searched():
+	# + wins on the second row of columns 1 and 5, playing in them would let it in
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('..+++..'),
+		list('#.#+#.#'),
+	]
+	tree = MinMaxTree(BitBoard(initial), 0)
+	tree.generate_tree(1)
+	# the position is symmetric, so only one of each pair of mirrored moves is left
+	assert sorted(child.node.delta for child in tree.safe_children()) == [0, 2, 3]
+	fiar_mm = FIARMinMax(Game(initial_board=initial), max_depth=5, plays=0)
+	fiar_mm.get_best_play()
+	assert not {1, 5} & set(fiar_mm.last_play_options)
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_threats_same_as_full_search(lazy):
+	nodes = {False: 0, True: 0}
+	for rows, plays in POSITIONS:
+		results = []
+		for threats in (False, True):
+			game = Game(initial_board=BitBoard([list(row) for row in rows]))
+			fiar_mm = FIARMinMax(game, max_depth=5, plays=plays, lazy=lazy, endgame_threshold=0, threats=threats)
+			fiar_mm.get_best_play()
+			results.append(fiar_mm.last_play_options)
+			nodes[threats] += fiar_mm.stats.nodes
+		assert results[0] == results[1]
+	assert nodes[True] < nodes[False]
+
+	# inside the search, the threats only prune moves that lose
+	tree = MinMaxTree(BitBoard([list(row) for row in POSITIONS[4][0]]), 1)
+	assert tree.get_score(SearchContext(threats=False), 5) == tree.get_score(SearchContext(), 5)
@@ -0,0 +1,52 @@
+import pytest
+
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Game
+from move_ordering import MoveOrdering, Strategy
+
+
+def moves_of(ordered):
+	return [move for move, _ in ordered]
+
+
+def test_no_strategy():
+	ordering = MoveOrdering(())
+	assert moves_of(ordering.order(range(7), ply=0, playing=0)) == list(range(7))
+
+
+def test_center_first():
+	ordering = MoveOrdering([Strategy.CENTER])
+	assert moves_of(ordering.order(range(7), ply=0, playing=0)) == [3, 2, 4, 1, 5, 0, 6]
+	assert moves_of(ordering.order([0, 1, 6], ply=0, playing=0)) == [1, 0, 6]
+
+
+def test_promoted_moves():
+	ordering = MoveOrdering(tuple(Strategy))
+	ordering.record_cutoff(6, index=2, ply=4, playing=0, depth=2, source='center')
+	ordering.record_cutoff(5, index=1, ply=4, playing=0, depth=1, source='center')
+
+	# history puts the deepest cutoff first, killers of the ply come next
+	assert moves_of(ordering.order(range(7), ply=3, playing=0)) == [6, 5, 3, 2, 4, 1, 0]
+	assert ordering.order(range(7), ply=4, playing=0)[:2] == [(5, 'killer'), (6, 'killer')]
+	# the hash move is always first
+	assert ordering.order(range(7), ply=4, playing=0, hash_move=0)[0] == (0, 'hash')
+	assert ordering.stats()['cutoffs'] == 2
+	assert ordering.first_move_cutoff_rate == 0
+
+
+@pytest.mark.parametrize('strategies', [(), [Strategy.CENTER], [Strategy.KILLER, Strategy.HISTORY], tuple(Strategy)])
+def test_same_options(strategies):
+	# the order the children are searched in must not change their scores
+	initial = [
+		list('.......'),
+		list('.......'),
+		list('.......'),
+		list('....++.'),
+		list('..#+#+.'),
+		list('..#+###'),
+	]
+	game = Game(initial_board=initial)
+	fiar_mm = FIARMinMax(game, max_depth=5, plays=1, lazy=True, ordering=strategies)
+	assert fiar_mm.get_best_play() == 3
+	assert fiar_mm.last_play_options == [3]
+	assert fiar_mm.cutoff_stats['cutoffs'] > 0
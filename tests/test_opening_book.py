@@ -0,0 +1,86 @@
+import time
+
+from four_in_a_row import Board, BitBoard, Game
+from fiar_min_max import FIARMinMax
+from min_max_tree import MinMaxTree
+from opening_book import OpeningBook, build_book, canonical_key, gen_positions
+
+
+def best_moves(game, depth):
+	tree = MinMaxTree(game.board, game.p_i)
+	tree.generate_tree(1)
+	scores = {child.node.delta: child.get_score(depth=depth - 1) for child in tree.children}
+	best_score = (max if tree.node.maximizing else min)(scores.values())
+	return [col for col, score in scores.items() if score == best_score]
+
+
+def test_key():
+	game = Game()
+	for col in (0, 0, 1, 6):
+		game.play(col)
+	bit_game = Game(initial_board=BitBoard(game.board.state))
+	assert game.board.get_key() == bit_game.board.get_key()
+	assert game.board.get_key(mirror=True) == bit_game.board.get_key(mirror=True)
+
+	mirror = Game()
+	for col in (6, 6, 5, 0):
+		mirror.play(col)
+	assert mirror.board.get_key() == game.board.get_key(mirror=True)
+	assert canonical_key(mirror.board)[0] == canonical_key(game.board)[0]
+	assert Board().get_key() == BitBoard().get_key()
+
+
+def test_gen_positions():
+	# mirror images are only generated once
+	assert sum(1 for _ in gen_positions(1)) == 1 + 4
+	assert sum(1 for _ in gen_positions(2)) == 1 + 4 + 25
+
+
+def test_book(tmp_path):
+	path = tmp_path / 'book.bin'
+	size = build_book(str(path), max_ply=2, depth=3)
+	with OpeningBook(str(path)) as book:
+		assert len(book) == size
+		assert book.lookup(Board()) is not None
+		# the same size with other rules is not in the book
+		assert book.lookup(Board.variant(Board.WIDTH, Board.HEIGHT, 3)()) is None
+
+		# every position, mirrored or not, gets the move a search would play
+		game = Game()
+		for first in range(Board.WIDTH):
+			for second in range(Board.WIDTH):
+				game = Game()
+				game.play(first)
+				game.play(second)
+				move, _ = book.lookup(game.board)
+				assert move in best_moves(game, depth=3)
+		game.play(0)
+		assert book.lookup(game.board) is None
+
+
+def test_engine_uses_book(tmp_path):
+	path = tmp_path / 'book.bin'
+	build_book(str(path), max_ply=1, depth=3)
+	game = Game()
+	with FIARMinMax(game, plays=0, lazy=True, book=str(path)) as fiar_mm:
+		col = fiar_mm.get_best_play()
+		assert fiar_mm.stats.book_hit
+		assert fiar_mm.last_play_options == [col]
+		game.play(col)
+		game.play(0)
+		fiar_mm.get_best_play()
+		assert not fiar_mm.stats.book_hit
+
+
+def test_book_move_grows_no_tree(tmp_path):
+	path = tmp_path / 'book.bin'
+	build_book(str(path), max_ply=1, depth=3)
+	game = Game()
+	with FIARMinMax(game, max_depth=6, plays=0, book=str(path)) as fiar_mm:
+		start = time.perf_counter()
+		fiar_mm.get_best_play()
+		elapsed = time.perf_counter() - start
+		assert fiar_mm.stats.book_hit
+		# only the moves of the opponent are generated, the rest waits for the next search
+		assert fiar_mm.tree.children and all(not child.children for child in fiar_mm.tree.children)
+		assert fiar_mm.stats.time <= elapsed < .1
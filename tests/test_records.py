@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import random_games
+from four_in_a_row import BitBoard, Board, Game
+from records import (
+	POSITION_BYTES, PositionFile, load_games, pack_position, read_games, to_record, unpack_position,
+	write_games, write_positions)
+
+
+def test_from_moves():
+	for game in random_games(50):
+		record = to_record(game)
+		assert BitBoard.from_moves(record) == game.board
+		assert Board.from_moves(record).state == game.board.state
+		assert Board.from_moves([int(move) for move in record]).state == game.board.state
+	with pytest.raises(ValueError):
+		Board.from_moves('0000000')
+
+
+def test_from_record():
+	for game in random_games(50):
+		loaded = Game.from_record(to_record(game))
+		assert loaded.board == game.board
+		assert loaded.moves == game.moves
+		assert (loaded.p_i, loaded.move_count, loaded.get_state()) == (game.p_i, game.move_count, game.get_state())
+
+
+def test_pack_position():
+	for game in random_games(50):
+		data = pack_position(game.board)
+		assert len(data) == POSITION_BYTES
+		assert unpack_position(data) == game.board
+		assert unpack_position(data, Board).state == game.board.state
+
+
+def test_game_file(tmp_path):
+	games = list(random_games(20))
+	write_games(tmp_path / 'games.txt', [games[0]] + [to_record(game) for game in games[1:]])
+	assert list(read_games(tmp_path / 'games.txt')) == [to_record(game) for game in games]
+	assert [loaded.board for loaded in load_games(tmp_path / 'games.txt')] == [game.board for game in games]
+
+
+def test_position_file(tmp_path):
+	boards = [game.board for game in random_games(100)]
+	assert write_positions(tmp_path / 'positions.bin', boards[:50] + [b.get_key() for b in boards[50:]]) == 100
+	with PositionFile(tmp_path / 'positions.bin') as positions:
+		assert len(positions) == 100
+		assert list(positions) == boards
+		assert positions[99] == boards[99]
+		assert positions.keys().tolist() == [board.get_key() for board in boards]
+		assert positions.keys(10, 20).tolist() == [board.get_key() for board in boards[10:20]]
+		with pytest.raises(IndexError):
+			positions.key(100)
+
+	(tmp_path / 'other.bin').write_bytes(b'not positions')
+	with pytest.raises(ValueError):
+		PositionFile(tmp_path / 'other.bin')
+
+
+def test_other_sizes_rejected(tmp_path):
+	board = next(random_games(1, 10, board_cls=BitBoard.variant(9, 7, 5))).board
+	with pytest.raises(ValueError):
+		pack_position(board)
+	with pytest.raises(ValueError):
+		write_positions(tmp_path / 'positions.bin', [board])
+	with pytest.raises(ValueError):
+		write_positions(tmp_path / 'positions.bin', [board.get_key()])
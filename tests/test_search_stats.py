@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from fiar_min_max import FIARMinMax
+from four_in_a_row import Game
+from search_stats import StatsLog
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_detailed_stats(lazy):
+	game = Game()
+	# the mirrored moves of the empty board would not be searched
+	game.play(0)
+	fiar_mm = FIARMinMax(game, max_depth=4, plays=1, lazy=lazy, detailed_stats=True)
+	fiar_mm.get_best_play()
+	stats = fiar_mm.stats
+
+	assert sum(stats.searched_per_ply) == stats.nodes
+	assert stats.searched_per_ply[:2] == [0, 7]
+	assert len(stats.searched_per_ply) == 5
+	assert stats.generated_per_ply[:2] == [1, 7]
+	if not lazy:
+		# some positions 3 plies deep are symmetric, like 0 3 6, and only half their children are generated
+		assert stats.generated_per_ply[:4] == [1, 7, 49, 343]
+		assert 343 * 6 < stats.generated_per_ply[4] < 2401
+	assert 0 < stats.static_evals <= stats.searched_per_ply[-1]
+	assert stats.cutoffs > 0
+	assert 0 < stats.first_move_cutoff_rate <= 1
+	assert stats.tt_probes == stats.nodes
+	assert stats.peak_nodes > 0 and stats.peak_bytes > stats.peak_nodes
+	assert stats.search_time > 0
+
+
+def test_stats_disabled():
+	fiar_mm = FIARMinMax(Game(), max_depth=3, plays=0)
+	fiar_mm.get_best_play()
+	assert fiar_mm.stats.nodes > 0
+	assert fiar_mm.stats.cutoffs > 0
+	assert fiar_mm.stats.searched_per_ply == []
+	assert fiar_mm.stats.peak_nodes == 0
+
+
+def test_stats_log(tmp_path):
+	path = tmp_path / 'stats.jsonl'
+	received = []
+	with StatsLog(path) as log:
+		def on_stats(stats):
+			received.append(stats)
+			log(stats)
+
+		game = Game()
+		fiar_mm = FIARMinMax(game, max_depth=3, plays=0, lazy=True, detailed_stats=True, on_stats=on_stats)
+		for _ in range(2):
+			game.play(fiar_mm.get_best_play())
+			game.play(3)
+
+	lines = path.read_text().splitlines()
+	assert len(lines) == len(received) == 2
+	record = json.loads(lines[0])
+	assert record['nodes'] == received[0].nodes
+	assert record['searched_per_ply'] == received[0].searched_per_ply
+	assert 'first_move_cutoff_rate' in record
@@ -1,5 +1,8 @@
-from four_in_a_row import Board
+from random import Random
+
+from four_in_a_row import Board, Game
 from min_max_tree import MinMaxTree
+from winning_windows import CELL_WINDOWS, WINDOWS, WindowCounts
 
 
 def test_analyse_line():
@@ -54,3 +57,73 @@ def test_score():
 	mmt = MinMaxTree(Board(initial_state=state), 0)
 	assert mmt._score(0) == 2
 	assert mmt._score(1) == 3
+
+
+def test_analyse_line_chain_at_start():
+	assert MinMaxTree._analyze_line(list('##.....'), 0) == 2
+	assert MinMaxTree._analyze_line(list('+##..'), 0) == 2
+	assert MinMaxTree._analyze_line(list('###.'), 0) == 3
+
+
+def test_windows():
+	assert len(WINDOWS) == 69
+	assert all(len(CELL_WINDOWS[row][col]) <= 13 for row in range(Board.HEIGHT) for col in range(Board.WIDTH))
+	# the corners are part of one window in every direction but the wrong diagonal
+	assert len(CELL_WINDOWS[0][0]) == 3
+
+
+def test_window_counts_same_as_score():
+	states = [
+		[
+			['.'] * 7,
+			['.'] * 7,
+			list("....+.."),
+			list("...++#."),
+			list("..###+."),
+			list("+#+##+."),
+		],
+		[
+			['.'] * 7,
+			['.'] * 7,
+			list("....+.."),
+			list("...++#."),
+			list(".#.##+."),
+			list("+#+##+."),
+		],
+		[
+			['.'] * 7,
+			['.'] * 7,
+			list("....+.."),
+			list("...++#."),
+			list(".#.#++."),
+			list("+#+##+#"),
+		],
+	]
+	for state in states:
+		mmt = MinMaxTree(Board(initial_state=state), 0)
+		windows = WindowCounts(mmt.node.board)
+		assert windows.score(0) == mmt._score(0)
+		assert windows.score(1) == mmt._score(1)
+
+	# incremental updates on random games
+	rng = Random(0)
+	for _ in range(30):
+		game = Game()
+		windows = WindowCounts()
+		while not game.over:
+			col = rng.choice(list(game.board.get_valid_columns()))
+			player = game.p_i
+			game.play(col)
+			row = next(row for row in range(Board.HEIGHT) if game.board.state[row][col] != Board.EMPTY)
+			windows.place(row, col, player)
+			if game.over:
+				break
+			mmt = MinMaxTree(game.board, game.p_i)
+			assert windows.score(0) == mmt._score(0)
+			assert windows.score(1) == mmt._score(1)
+		# removing every piece gives back an empty board
+		for row in range(Board.HEIGHT):
+			for col in range(Board.WIDTH):
+				if (elem := game.board.state[row][col]) != Board.EMPTY:
+					windows.remove(row, col, Game.PLAYERS.index(elem))
+		assert windows.open_windows == WindowCounts().open_windows
@@ -0,0 +1,108 @@
+import math
+
+import pytest
+
+from four_in_a_row import BitBoard, Game
+from move_ordering import Strategy
+from tournament import (
+	GameTask, Score, elo_difference, elo_with_error, format_elo, gen_openings, gen_tasks, head_to_head, opening_plies,
+	parse_player, percentiles, play_game, ratings, report, run_tournament)
+
+
+def test_parse_player():
+	player = parse_player('d5:max_depth=5,lazy=true,ordering=hash+killer,time_budget=.5')
+	assert player.name == 'd5'
+	assert player.options == {
+		'max_depth': 5, 'lazy': True, 'ordering': (Strategy('hash'), Strategy('killer')), 'time_budget': .5}
+	assert parse_player('plain').options == {}
+	assert parse_player('x:ordering=none').options == {'ordering': ()}
+	with pytest.raises(ValueError):
+		parse_player('x:depth=3')
+
+
+def test_gen_openings():
+	openings = gen_openings(20, 2)
+	assert len(openings) == 20
+	keys = set()
+	for opening in openings:
+		board = BitBoard()
+		game = Game(initial_board=board)
+		for move in opening:
+			game.play(int(move))
+		assert len(opening) == 2
+		keys.add(min(board.get_key(), board.get_key(mirror=True)))
+	assert len(keys) == 20
+	# there are only 4 first moves that are not the mirror of another
+	with pytest.raises(ValueError):
+		gen_openings(20, 1)
+	assert len(gen_openings(4, 1)) == 4
+	# by default, the openings are as short as they can be
+	assert opening_plies(4) == 1 and opening_plies(5) == 2 and opening_plies(100) == 3
+	assert {len(opening) for opening in gen_openings(100)} == {3}
+
+
+def test_colours_are_swapped():
+	a, b, c = parse_player('a'), parse_player('b'), parse_player('c')
+	tasks = list(gen_tasks([a, b, c], ['33', '01']))
+	assert len(tasks) == 3 * 2 * 2
+	for first, second in zip(tasks[::2], tasks[1::2]):
+		assert first.players == second.players[::-1]
+		assert first.opening == second.opening
+
+
+def test_play_game():
+	task = GameTask((parse_player('a:max_depth=2'), parse_player('b:max_depth=1')), '33', 1)
+	record = play_game(task)
+	assert record.moves.startswith('33')
+	assert record.result in (0, .5, 1)
+	game = Game(initial_board=BitBoard())
+	for move in record.moves:
+		game.play(int(move))
+	assert game.over
+	# the opening was not played by the engines
+	assert len(record.times[0]) + len(record.times[1]) == len(record.moves) - 2
+	assert play_game(task).moves == record.moves
+
+
+def test_elo():
+	assert elo_difference(.5) == 0
+	assert elo_difference(1) == math.inf
+	assert elo_difference(.75) == pytest.approx(190.8, abs=.1)
+	elo, error = elo_with_error(Score(wins=60, draws=0, losses=40))
+	assert elo == pytest.approx(elo_difference(.6))
+	assert 0 < error < 200
+	assert elo_with_error(Score(wins=600, draws=0, losses=400))[1] < error
+
+	assert format_elo(-.4) == format_elo(-0.) == '+0'
+	assert format_elo(-.6) == '-1'
+	assert format_elo(math.inf) == '+inf'
+
+
+def test_ratings():
+	names = ['a', 'b', 'c']
+	scores = {(x, y): Score() for x in names for y in names if x != y}
+	scores['a', 'b'] = Score(75, 0, 25)
+	scores['b', 'a'] = Score(25, 0, 75)
+	scores['b', 'c'] = Score(75, 0, 25)
+	scores['c', 'b'] = Score(25, 0, 75)
+	rating = ratings(scores, names)
+	assert sum(rating.values()) == pytest.approx(0)
+	assert rating['a'] - rating['b'] == pytest.approx(rating['b'] - rating['c'], abs=1)
+	assert rating['a'] > rating['b'] > rating['c']
+
+
+def test_percentiles():
+	latency = percentiles([i / 100 for i in range(100)])
+	assert latency == {'p50': .5, 'p90': .9, 'p99': .99, 'max': .99}
+	assert percentiles([]) == {}
+
+
+def test_run_tournament():
+	players = [parse_player('d1:max_depth=1'), parse_player('d3:max_depth=3')]
+	records = list(run_tournament(players, ['33', '22'], workers=2))
+	assert len(records) == 4
+	scores = head_to_head(records, ['d1', 'd3'])
+	assert scores['d1', 'd3'].games == 4
+	assert scores['d1', 'd3'].score + scores['d3', 'd1'].score == 1
+	text = report(records, ['d1', 'd3'])
+	assert 'd1 vs d3' in text and 'p99 ms' in text
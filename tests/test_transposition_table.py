@@ -0,0 +1,92 @@
+import pickle
+
+from conftest import random_games
+from four_in_a_row import Board, Game
+from min_max_tree import MinMaxTree, SearchContext
+from transposition_table import Bound, SharedTranspositionTable, TranspositionTable, zobrist_hash
+
+
+def test_incremental_hash():
+	tree = MinMaxTree(next(random_games(1, 6, seed=0, board_cls=Board)).board, 0)
+	tree.generate_tree(3)
+	for child in tree.children:
+		assert child.key == zobrist_hash(child.node.board)
+		assert child.mirror_key == zobrist_hash(child.node.board, mirror=True)
+		for grandchild in child.children:
+			assert grandchild.key == zobrist_hash(grandchild.node.board)
+			assert grandchild.mirror_key == zobrist_hash(grandchild.node.board, mirror=True)
+
+
+def test_transposition_same_key():
+	game1, game2 = Game(), Game()
+	for col in (0, 1, 2, 3):
+		game1.play(col)
+	for col in (2, 1, 0, 3):
+		game2.play(col)
+	assert zobrist_hash(game1.board) == zobrist_hash(game2.board)
+
+
+def test_replacement():
+	tt = TranspositionTable(max_entries=4)
+	tt.store(1, depth=3, score=1, bound=Bound.EXACT)
+	# a shallower result from the same search does not replace a deeper one
+	tt.store(5, depth=1, score=2, bound=Bound.EXACT)
+	assert tt.probe(5) is None
+	assert tt.probe(1).score == 1
+	# but anything replaces the results of a previous search
+	tt.new_search()
+	tt.store(5, depth=1, score=2, bound=Bound.LOWER, best_move=3)
+	assert tt.probe(1) is None
+	assert tt.probe(5).best_move == 3
+	assert len(tt) == 1
+	assert tt.hit_rate == 2 / 4
+
+
+def test_same_scores_with_table():
+	for seed in range(10):
+		game = next(random_games(1, 8, seed, Board))
+		if game.over:
+			continue
+		scores = []
+		for tt in (None, TranspositionTable()):
+			tree = MinMaxTree(game.board.__copy__(), game.p_i)
+			tree.generate_tree(4)
+			scores.append([child.get_score(SearchContext(tt=tt)) for child in tree.children])
+		assert scores[0] == scores[1]
+
+
+def test_shared_table():
+	tt = SharedTranspositionTable(max_entries=4)
+	try:
+		tt.store(1, depth=3, score=-993, bound=Bound.LOWER, best_move=2)
+		# a copy in another process attaches to the same memory
+		other = pickle.loads(pickle.dumps(tt))
+		entry = other.probe(1)
+		assert (entry.depth, entry.score, entry.bound, entry.best_move) == (3, -993, Bound.LOWER, 2)
+		other.store(6, depth=0, score=-5, bound=Bound.EXACT)
+		assert tt.probe(6).best_move is None
+		assert len(tt) == 2
+		# the empty board hashes to 0, which must not match an empty slot
+		assert tt.probe(0) is None
+		other.close()
+	finally:
+		tt.close()
+
+
+def test_mirror_images_share_entries():
+	tt = TranspositionTable(2 ** 16)
+	left, right = Board(), Board()
+	left.insert_piece(0, Game.PLAYERS[0])
+	left.insert_piece(1, Game.PLAYERS[1])
+	right.insert_piece(6, Game.PLAYERS[0])
+	right.insert_piece(5, Game.PLAYERS[1])
+	score = MinMaxTree(left, 0).get_score(SearchContext(tt), 3)
+
+	ctx = SearchContext(tt)
+	tree = MinMaxTree(right, 0)
+	assert tree.get_score(ctx, 3) == score
+	# the whole search was found in the table
+	assert ctx.nodes == 1
+	entry = tt.probe(min(tree.key, tree.mirror_key))
+	best_move = 6 - entry.best_move if tree.mirror_key < tree.key else entry.best_move
+	assert best_move in range(Board.WIDTH)
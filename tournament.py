@@ -0,0 +1,320 @@
+"""Play engine configurations against each other, headless and in parallel.
+
+Every pair of players plays every opening twice, once with each colour.
+A player is a name followed by FIARMinMax options: "d5:max_depth=5,lazy=true,ordering=hash+killer".
+
+Run with: python3 tournament.py --player d3:max_depth=3 --player d5:max_depth=5 --openings 50 --out games.jsonl
+"""
+import argparse
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import combinations
+
+from fiar_min_max import FIARMinMax
+from four_in_a_row import BitBoard, Game, canonical_key
+from move_ordering import Strategy
+from records import to_record
+
+
+@dataclass
+class Player:
+	name: str
+	options: dict = field(default_factory=dict)  # FIARMinMax keyword arguments
+
+
+@dataclass
+class GameTask:
+	players: tuple[Player, Player]  # first and second player
+	opening: str  # the columns played before the engines take over
+	seed: int  # seeds the random tie-breaks of the engines
+	board_cls: type = BitBoard  # the size of the board, see Board.variant
+
+
+@dataclass
+class GameRecord:
+	players: tuple[str, str]
+	opening: str
+	moves: str  # every column played from the empty board, the opening included
+	result: float  # 1 if the first player won, 0 if the second did, .5 for a draw
+	times: tuple[list[float], list[float]]  # seconds each move of each player took
+
+	def to_json(self) -> str:
+		return json.dumps({
+			'players': self.players, 'opening': self.opening, 'moves': self.moves, 'result': self.result})
+
+
+# the options that can be given to a player, with how to read their value
+OPTIONS = {
+	'max_depth': int,
+	'time_budget': float,
+	'mt': lambda value: value.lower() == 'true',
+	'lazy': lambda value: value.lower() == 'true',
+	'tt_entries': lambda value: None if value.lower() == 'none' else int(value),
+	'ordering': lambda value: () if value.lower() == 'none' else tuple(Strategy(s) for s in value.split('+')),
+	'smp': int,
+	'endgame_threshold': int,
+	'pvs': lambda value: value.lower() == 'true',
+	'aspiration': lambda value: None if value.lower() == 'none' else int(value),
+	'threats': lambda value: value.lower() == 'true',
+}
+
+
+def parse_player(spec: str) -> Player:
+	"""Read a player from "name:option=value,option=value"."""
+	name, _, options = spec.partition(':')
+	player = Player(name)
+	for option in filter(None, options.split(',')):
+		key, _, value = option.partition('=')
+		if key not in OPTIONS:
+			raise ValueError(f"Unknown option {key!r}, the options are {', '.join(OPTIONS)}")
+		player.options[key] = OPTIONS[key](value)
+	return player
+
+
+def opening_plies(n, board_cls=BitBoard) -> int:
+	"""Return the fewest plies that make at least n openings: positions in progress, up to mirror images."""
+	positions = {canonical_key(board_cls())[0]: Game(initial_board=board_cls())}
+	plies = 0
+	while len(positions) < n:
+		if not positions:
+			raise ValueError(f"There are fewer than {n} openings on the board")
+		next_positions = {}
+		for game in positions.values():
+			for col in game.board.get_valid_columns():
+				child = Game(initial_board=game.board.__copy__())
+				child.play(col)
+				if not child.over:
+					next_positions.setdefault(canonical_key(child.board)[0], child)
+		positions = next_positions
+		plies += 1
+	return plies
+
+
+def gen_openings(n, plies=None, seed=0, board_cls=BitBoard) -> list[str]:
+	"""Return n random openings of the given number of plies, none of them the mirror image of another.
+	Raises ValueError if fewer are found.
+	:param plies: by default, the fewest plies that make enough openings, see opening_plies
+	"""
+	plies = opening_plies(n, board_cls) if plies is None else plies
+	rng = random.Random(seed)
+	openings = {}
+	# there may be fewer distinct openings than asked for
+	for _ in range(n * 100):
+		if len(openings) == n:
+			break
+		game = Game(initial_board=board_cls())
+		moves = ''
+		while len(moves) < plies and not game.over:
+			move = rng.choice(list(game.board.get_valid_columns()))
+			game.play(move)
+			moves += str(move)
+		if not game.over:
+			openings.setdefault(canonical_key(game.board)[0], moves)
+	if len(openings) < n:
+		raise ValueError(f"Only {len(openings)} openings of {plies} plies were found, out of the {n} asked for")
+	return list(openings.values())
+
+
+def play_game(task: GameTask) -> GameRecord:
+	random.seed(task.seed)
+	game = Game.from_record(task.opening, task.board_cls)
+
+	engines = [FIARMinMax(game, plays=i, **player.options) for i, player in enumerate(task.players)]
+	times = ([], [])
+	try:
+		while not game.over:
+			start = time.perf_counter()
+			move = engines[game.p_i].get_best_play()
+			times[game.p_i].append(time.perf_counter() - start)
+			game.play(move)
+	finally:
+		for engine in engines:
+			engine.close()
+
+	state = game.get_state()
+	result = 1. if state is Game.GameState.P1_WON else 0. if state is Game.GameState.P2_WON else .5
+	return GameRecord(
+		(task.players[0].name, task.players[1].name), task.opening, to_record(game), result, times)
+
+
+def gen_tasks(players: list[Player], openings: list[str], seed=0, board_cls=BitBoard):
+	"""Every pair of players plays every opening with both colours."""
+	for a, b in combinations(players, 2):
+		for opening_i, opening in enumerate(openings):
+			yield GameTask((a, b), opening, seed + 2 * opening_i, board_cls)
+			yield GameTask((b, a), opening, seed + 2 * opening_i + 1, board_cls)
+
+
+def run_tournament(players, openings, *, workers=None, seed=0, board_cls=BitBoard):
+	"""Play the games in parallel processes and yield their records as they finish."""
+	with ProcessPoolExecutor(workers) as executor:
+		futures = [executor.submit(play_game, task) for task in gen_tasks(players, openings, seed, board_cls)]
+		for future in as_completed(futures):
+			yield future.result()
+
+
+@dataclass
+class Score:
+	wins: int = 0
+	draws: int = 0
+	losses: int = 0
+
+	@property
+	def games(self) -> int:
+		return self.wins + self.draws + self.losses
+
+	@property
+	def score(self) -> float:
+		return (self.wins + self.draws / 2) / self.games if self.games else .5
+
+	def add(self, result: float):
+		if result == 1:
+			self.wins += 1
+		elif result == 0:
+			self.losses += 1
+		else:
+			self.draws += 1
+
+
+def elo_difference(score: float) -> float:
+	"""Elo difference that makes the expected score what it is. +-inf at 1 and 0."""
+	if score <= 0:
+		return -math.inf
+	if score >= 1:
+		return math.inf
+	return -400 * math.log10(1 / score - 1)
+
+
+def elo_with_error(score: Score) -> tuple[float, float]:
+	"""Return the Elo difference of the score and half the width of its 95% confidence interval."""
+	n = score.games
+	s = score.score
+	variance = (score.wins * (1 - s) ** 2 + score.draws * (.5 - s) ** 2 + score.losses * s ** 2) / n
+	margin = 1.96 * math.sqrt(variance / n)
+	low, high = elo_difference(s - margin), elo_difference(s + margin)
+	return elo_difference(s), (high - low) / 2
+
+
+def format_elo(elo: float) -> str:
+	"""Format an Elo difference with its sign. The differences that round to 0 print as +0, not -0."""
+	# rounding -0.4 gives -0., and adding 0. to it gives 0.
+	return f'{round(elo, 0) + 0.:+.0f}'
+
+
+def head_to_head(records, names) -> dict[tuple[str, str], Score]:
+	"""The score of every player against every other, from the point of view of the first one."""
+	scores = {(a, b): Score() for a in names for b in names if a != b}
+	for record in records:
+		first, second = record.players
+		scores[first, second].add(record.result)
+		scores[second, first].add(1 - record.result)
+	return scores
+
+
+def ratings(scores: dict[tuple[str, str], Score], names, iterations=1000) -> dict[str, float]:
+	"""Fit Elo ratings to the head to head scores (draws count as half a win), averaging to 0."""
+	rating = {name: 0. for name in names}
+	for _ in range(iterations):
+		for name in names:
+			# move the rating until the expected score of the player matches their actual score
+			played = [(other, scores[name, other]) for other in names if other != name and scores[name, other].games]
+			games = sum(score.games for _, score in played)
+			if not games:
+				continue
+			actual = sum(score.score * score.games for _, score in played) / games
+			expected = sum(
+				score.games / (1 + 10 ** ((rating[other] - rating[name]) / 400)) for other, score in played) / games
+			# clamp the scores, a player who won or lost every game has an infinite rating
+			actual = min(max(actual, .5 / games), 1 - .5 / games)
+			rating[name] += elo_difference(actual) - elo_difference(expected)
+		mean = sum(rating.values()) / len(rating)
+		rating = {name: value - mean for name, value in rating.items()}
+	return rating
+
+
+def percentiles(values, points=(50, 90, 99)) -> dict[str, float]:
+	values = sorted(values)
+	if not values:
+		return {}
+	result = {f'p{p}': values[min(len(values) - 1, int(len(values) * p / 100))] for p in points}
+	result['max'] = values[-1]
+	return result
+
+
+def report(records, names) -> str:
+	scores = head_to_head(records, names)
+	width = max(len(name) for name in names) + 2
+	lines = ["W/D/L of the row player against the column player"]
+	lines.append(' ' * width + ''.join(f'{name:>{width + 12}}' for name in names))
+	for a in names:
+		cells = ''.join(
+			f'{"-":>{width + 12}}' if a == b else
+			f'{f"{scores[a, b].wins}/{scores[a, b].draws}/{scores[a, b].losses}":>{width + 12}}' for b in names)
+		lines.append(f'{a:<{width}}{cells}')
+
+	lines.append("")
+	lines.append("Elo of the row player against the column player (95% interval)")
+	for a, b in combinations(names, 2):
+		if scores[a, b].games:
+			elo, error = elo_with_error(scores[a, b])
+			lines.append(f'{a} vs {b}: {format_elo(elo)} +- {error:.0f} over {scores[a, b].games} games')
+
+	lines.append("")
+	lines.append(f"{'player':<{width}} {'elo':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+	times = {name: [] for name in names}
+	for record in records:
+		for name, player_times in zip(record.players, record.times):
+			times[name].extend(player_times)
+	for name, rating in sorted(ratings(scores, names).items(), key=lambda item: -item[1]):
+		latency = percentiles(times[name])
+		lines.append(f'{name:<{width}} {format_elo(rating):>7} ' + ' '.join(
+			f'{latency.get(key, 0) * 1000:>8.1f}' for key in ('p50', 'p90', 'p99', 'max')))
+	return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+	def main():
+		parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+		parser.add_argument('--player', action='append', required=True, type=parse_player, help="name:option=value,...")
+		parser.add_argument('--openings', type=int, default=20, help="how many openings each pair plays")
+		parser.add_argument(
+			'--opening-plies', type=int, help="defaults to the fewest plies that make enough distinct openings")
+		parser.add_argument('--workers', type=int, help="defaults to the number of CPUs")
+		parser.add_argument('--seed', type=int, default=0)
+		parser.add_argument('--width', type=int, default=BitBoard.WIDTH)
+		parser.add_argument('--height', type=int, default=BitBoard.HEIGHT)
+		parser.add_argument('--connect', type=int, default=BitBoard.CONNECT, help="how many aligned pieces win")
+		parser.add_argument('--out', help="write a record of every game to this JSONL file")
+		args = parser.parse_args()
+
+		names = [player.name for player in args.player]
+		if len(set(names)) != len(names):
+			parser.error("the players need different names")
+		if args.width > 10:
+			parser.error("the games are recorded with one digit per move, so at most 10 columns")
+		board_cls = BitBoard.variant(args.width, args.height, args.connect)
+		try:
+			openings = gen_openings(args.openings, args.opening_plies, args.seed, board_cls)
+		except ValueError as e:
+			parser.error(str(e))
+		n_games = len(names) * (len(names) - 1) * len(openings)
+		out = open(args.out, 'w') if args.out else None
+		records = []
+		try:
+			for record in run_tournament(args.player, openings, workers=args.workers, seed=args.seed, board_cls=board_cls):
+				records.append(record)
+				if out is not None:
+					out.write(record.to_json() + '\n')
+				print(f"\r{len(records)}/{n_games} games", end='', flush=True)
+		finally:
+			if out is not None:
+				out.close()
+		print()
+		print(report(records, names))
+
+
+	main()
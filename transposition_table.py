@@ -0,0 +1,205 @@
+import struct
+from dataclasses import dataclass
+from enum import Enum, auto
+from functools import cache
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from random import Random
+
+from four_in_a_row import Game
+
+
+@cache
+def zobrist_keys(width, height) -> list[list[list[int]]]:
+	"""Return one random key per (player, row, col) of a board of that size,
+	the hash of a board is the xor of the keys of its pieces."""
+	# the seed is fixed so that every process computes the same hashes for the same positions
+	rng = Random(0xF1A2)
+	return [[[rng.getrandbits(64) for _ in range(width)] for _ in range(height)] for _ in Game.PLAYERS]
+
+
+def zobrist_hash(board, mirror=False) -> int:
+	"""Hash a whole board (or its left-right mirror image). Children should rather xor the key
+	of the piece that was played into the hash of their parent."""
+	keys = zobrist_keys(board.WIDTH, board.HEIGHT)
+	key = 0
+	for row_i, row in enumerate(board):
+		for col_i, elem in enumerate(row):
+			if elem in Game.PLAYERS:
+				key ^= keys[Game.PLAYERS.index(elem)][row_i][board.WIDTH - 1 - col_i if mirror else col_i]
+	return key
+
+
+class Bound(Enum):
+	"""How the stored score relates to the real minmax score of the position."""
+	EXACT = auto()
+	LOWER = auto()  # the real score is at least the stored score (the search failed high)
+	UPPER = auto()  # the real score is at most the stored score (the search failed low)
+
+
+@dataclass(slots=True)
+class Entry:
+	key: int
+	depth: int  # how deep the position was searched
+	score: int
+	bound: Bound
+	best_move: int | None
+	generation: int  # which search stored the entry, older entries are replaced first
+
+
+class TranspositionTable:
+	"""A fixed capacity cache of search results, indexed by the zobrist hash of the positions.
+
+	Each hash maps to a single slot. When two positions collide on a slot, the new entry replaces
+	the old one if the old one comes from a previous search or was searched less deep."""
+
+	def __init__(self, max_entries: int = 2 ** 20):
+		if max_entries <= 0:
+			raise ValueError("The transposition table needs at least one entry")
+		self.max_entries = max_entries
+		self.slots: dict[int, Entry] = {}
+		self.generation = 0
+
+		self.probes = 0
+		self.hits = 0
+
+	def __len__(self):
+		return len(self.slots)
+
+	@property
+	def hit_rate(self) -> float:
+		return self.hits / self.probes if self.probes else 0.
+
+	def new_search(self):
+		"""Mark the entries that are already stored as replaceable."""
+		self.generation += 1
+
+	def clear(self):
+		self.slots.clear()
+		self.probes = self.hits = 0
+
+	def probe(self, key) -> Entry | None:
+		"""Return the entry stored for the given hash, if any."""
+		self.probes += 1
+		entry = self.slots.get(key % self.max_entries)
+		if entry is None or entry.key != key:
+			return None
+		self.hits += 1
+		return entry
+
+	def store(self, key, depth, score, bound: Bound, best_move=None):
+		index = key % self.max_entries
+		old = self.slots.get(index)
+		if old is not None and old.key != key and old.generation == self.generation and old.depth > depth:
+			# keep the deeper result of the current search
+			return
+		self.slots[index] = Entry(key, depth, score, bound, best_move, self.generation)
+
+
+class SharedTranspositionTable(TranspositionTable):
+	"""A transposition table whose slots live in shared memory, so that several processes can fill the same table.
+
+	There is no lock. Every slot stores the hash of its position xor-ed with its data, so a slot that
+	is read while another process writes it looks like a different position and is ignored.
+	Some results get lost that way, which only costs a bit of search."""
+	# check (hash ^ score bits ^ meta), score bits (two's complement), meta
+	SLOT = struct.Struct('<QQQ')
+	HEADER = struct.Struct('<Q')  # generation
+	# layout of the meta word
+	USED = 1 << 63
+	NO_MOVE = 0xFF
+
+	def __init__(self, max_entries: int = 2 ** 20, *, name: str | None = None):
+		if max_entries <= 0:
+			raise ValueError("The transposition table needs at least one entry")
+		self.max_entries = max_entries
+		self.owner = name is None
+		if self.owner:
+			# new shared memory is zero filled, which marks every slot as unused
+			self.shm = SharedMemory(create=True, size=self.HEADER.size + self.SLOT.size * max_entries)
+		else:
+			self.shm = _attach_shared_memory(name)
+		self.buf = self.shm.buf
+
+		self.probes = 0
+		self.hits = 0
+
+	def __reduce__(self):
+		# other processes attach to the same memory instead of copying the table
+		return _attach_table, (self.shm.name, self.max_entries)
+
+	def __len__(self):
+		metas = self.buf[self.HEADER.size:].cast('Q')[2::3]
+		return sum(1 for meta in metas if meta & self.USED)
+
+	@property
+	def generation(self) -> int:
+		return self.HEADER.unpack_from(self.buf)[0]
+
+	def new_search(self):
+		self.HEADER.pack_into(self.buf, 0, self.generation + 1)
+
+	def clear(self):
+		self.buf[:] = bytes(len(self.buf))
+		self.probes = self.hits = 0
+
+	def _offset(self, key) -> int:
+		return self.HEADER.size + (key % self.max_entries) * self.SLOT.size
+
+	def probe(self, key) -> Entry | None:
+		self.probes += 1
+		check, score_bits, meta = self.SLOT.unpack_from(self.buf, self._offset(key))
+		if not meta & self.USED or check ^ score_bits ^ meta != key:
+			return None
+		self.hits += 1
+		best_move = meta >> 24 & 0xFF
+		return Entry(
+			key, depth=meta & 0xFFFF, score=_bits_to_score(score_bits), bound=Bound(meta >> 16 & 0xFF),
+			best_move=None if best_move == self.NO_MOVE else best_move, generation=meta >> 32 & 0xFFFF)
+
+	def store(self, key, depth, score, bound: Bound, best_move=None):
+		offset = self._offset(key)
+		check, score_bits, meta = self.SLOT.unpack_from(self.buf, offset)
+		generation = self.generation & 0xFFFF
+		if meta & self.USED and check ^ score_bits ^ meta != key \
+				and meta >> 32 & 0xFFFF == generation and meta & 0xFFFF > depth:
+			# keep the deeper result of the current search
+			return
+		score_bits = _score_to_bits(score)
+		meta = self.USED | generation << 32 \
+			| (self.NO_MOVE if best_move is None else best_move) << 24 | bound.value << 16 | depth
+		self.SLOT.pack_into(self.buf, offset, key ^ score_bits ^ meta, score_bits, meta)
+
+	def close(self):
+		"""Detach from the shared memory, and free it if this table created it."""
+		self.buf = None
+		self.shm.close()
+		if self.owner:
+			self.shm.unlink()
+
+
+_SCORE = struct.Struct('<q')
+_BITS = struct.Struct('<Q')
+
+
+def _score_to_bits(score: int) -> int:
+	return _BITS.unpack(_SCORE.pack(score))[0]
+
+
+def _bits_to_score(bits: int) -> int:
+	return _SCORE.unpack(_BITS.pack(bits))[0]
+
+
+def _attach_table(name, max_entries) -> SharedTranspositionTable:
+	return SharedTranspositionTable(max_entries, name=name)
+
+
+def _attach_shared_memory(name) -> SharedMemory:
+	"""Attach to existing shared memory without letting this process' resource tracker free it on exit."""
+	try:
+		return SharedMemory(name=name, track=False)
+	except TypeError:
+		# python < 3.13 always tracks the memory
+		shm = SharedMemory(name=name)
+		resource_tracker.unregister(shm._name, 'shared_memory')
+		return shm
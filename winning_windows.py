@@ -0,0 +1,81 @@
+from functools import cache
+
+from four_in_a_row import Board, Game
+
+
+def _gen_windows(width, height, connect):
+	"""Yield the cells of every group of CONNECT aligned cells of the board."""
+	for d_row, d_col in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+		for row in range(height):
+			for col in range(width):
+				end_row, end_col = row + (connect - 1) * d_row, col + (connect - 1) * d_col
+				if 0 <= end_row < height and 0 <= end_col < width:
+					yield tuple((row + j * d_row, col + j * d_col) for j in range(connect))
+
+
+@cache
+def window_tables(width, height, connect) -> tuple[list, list[list[list[int]]]]:
+	"""Return every way to make CONNECT in a row on a board of that size,
+	and the indices of the windows going through each cell."""
+	windows = list(_gen_windows(width, height, connect))
+	cell_windows = [[[] for _ in range(width)] for _ in range(height)]
+	for window_i, window in enumerate(windows):
+		for row, col in window:
+			cell_windows[row][col].append(window_i)
+	return windows, cell_windows
+
+
+# the tables of the default board
+WINDOWS, CELL_WINDOWS = window_tables(Board.WIDTH, Board.HEIGHT, Board.CONNECT)
+
+
+class WindowCounts:
+	"""How many pieces each player has in every winning window, updated one piece at a time.
+
+	A window is open for a player when the opponent has no piece in it. The length of the
+	longest chain a player can still expand to CONNECT is the highest count among their open windows,
+	so a histogram of the counts of the open windows is kept to make that a lookup."""
+
+	def __init__(self, board=None):
+		board_cls = Board if board is None else type(board)
+		self.connect = board_cls.CONNECT
+		windows, self.cell_windows = window_tables(board_cls.WIDTH, board_cls.HEIGHT, board_cls.CONNECT)
+		self.counts = [[0] * len(windows) for _ in Game.PLAYERS]
+		# open_windows[p][k] is the number of windows with k pieces of p and none of the opponent
+		self.open_windows = [[len(windows)] + [0] * self.connect for _ in Game.PLAYERS]
+		if board is not None:
+			for row_i, row in enumerate(board):
+				for col_i, elem in enumerate(row):
+					if elem in Game.PLAYERS:
+						self.place(row_i, col_i, Game.PLAYERS.index(elem))
+
+	def place(self, row, col, player):
+		self._update(row, col, player, 1)
+
+	def remove(self, row, col, player):
+		self._update(row, col, player, -1)
+
+	def _update(self, row, col, player, delta):
+		mine, theirs = self.counts[player], self.counts[(player + 1) % 2]
+		open_mine, open_theirs = self.open_windows[player], self.open_windows[(player + 1) % 2]
+		for window_i in self.cell_windows[row][col]:
+			m, t = mine[window_i], theirs[window_i]
+			# take the window out of the histograms, then put it back with the new count
+			if t == 0:
+				open_mine[m] -= 1
+			if m == 0:
+				open_theirs[t] -= 1
+			m += delta
+			mine[window_i] = m
+			if t == 0:
+				open_mine[m] += 1
+			if m == 0:
+				open_theirs[t] += 1
+
+	def score(self, player) -> int:
+		"""Return the length of the longest chain the player can still expand to CONNECT."""
+		open_windows = self.open_windows[player]
+		for count in range(self.connect, 0, -1):
+			if open_windows[count]:
+				return count
+		return 0